@@ -5,6 +5,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_babel import Babel, get_locale
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from utils.db_routing import RoutingSession
+from utils.fast_json import FastJSONProvider
+from utils.compression import install_compression
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -12,11 +15,12 @@ logging.basicConfig(level=logging.DEBUG)
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 
 # Create the app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET")
+app.json = FastJSONProvider(app)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure supported languages
@@ -42,10 +46,10 @@ def get_locale():
     # 2. Check if user is logged in and has a preferred language
     if 'user_id' in session:
         try:
-            from models_multi_user import User
-            user = User.query.get(session['user_id'])
-            if user and user.preferred_language:
-                return user.preferred_language
+            from utils.user_context import user_profile_cache
+            profile = user_profile_cache.get(session['user_id'])
+            if profile and profile.preferred_language:
+                return profile.preferred_language
         except:
             pass
     
@@ -90,19 +94,63 @@ app.config.update(
 # Configure the database
 database_url = os.environ.get("DATABASE_URL", "sqlite:///callbunker.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+from utils.db_pool import engine_options, install_pool_listeners
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(database_url)
+
+# Optional read replica for analytics/history reads
+replica_url = os.environ.get("DATABASE_REPLICA_URL")
+if replica_url:
+    app.config["SQLALCHEMY_BINDS"] = {
+        "replica": {"url": replica_url, **engine_options(replica_url)},
+    }
 
 # Initialize the app with the extension
 db.init_app(app)
 
 with app.app_context():
+    for engine in db.engines.values():
+        install_pool_listeners(engine)
+
     # Import models to ensure tables are created
     import models
     import models_multi_user
     db.create_all()
+
+    # Load the Defense Number routing table used by the incoming-call path
+    from utils.routing_table import routing_table
+    routing_table.install(models_multi_user.User)
+    try:
+        routing_table.load()
+    except Exception as e:
+        print(f"Routing table load failed, will load on first call: {e}")
+
+    # Keep upcoming monthly call log partitions in place (PostgreSQL only)
+    from utils.call_log_partitions import ensure_partitions
+    try:
+        with db.engine.begin() as connection:
+            ensure_partitions(connection)
+    except Exception as e:
+        print(f"Call log partition check failed: {e}")
+
+    # Drop cached user profiles when a user row changes
+    from utils.user_context import user_profile_cache
+    user_profile_cache.install(models_multi_user.User)
+
+    # Drop cached Voice tokens of deleted or deactivated users
+    from utils.voice_tokens import voice_token_cache
+    voice_token_cache.install(models_multi_user.User)
+
+    # Keep the cached phone pool counts in step with pool row changes
+    from utils.pool_status import pool_status_cache
+    pool_status_cache.install()
+
+    # Journal contact, block and call history changes for mobile delta sync
+    from utils.sync_journal import sync_journal
+    sync_journal.install({
+        models_multi_user.UserWhitelist: 'contacts',
+        models_multi_user.UserBlocklist: 'blocked',
+        models_multi_user.MultiUserCallLog: 'calls',
+    })
     
     # Auto-seed phone pool from Twilio if empty (for production deployment)
     def ensure_phone_pool_seeded():
@@ -158,6 +206,7 @@ from routes.dialer import dialer_bp
 from routes.demo_api import demo_api_bp
 from routes.call_quality import call_quality_bp
 from routes.phone_admin import phone_admin_bp
+from routes.status_callbacks import status_callbacks_bp
 
 app.register_blueprint(voice_bp, url_prefix='/voice')
 app.register_blueprint(admin_bp, url_prefix='/admin')
@@ -170,6 +219,15 @@ app.register_blueprint(dialer_bp)
 app.register_blueprint(demo_api_bp)
 app.register_blueprint(call_quality_bp, url_prefix='/quality')
 app.register_blueprint(phone_admin_bp)
+app.register_blueprint(status_callbacks_bp, url_prefix='/status')
+
+# Compress larger JSON/HTML bodies for mobile clients
+install_compression(app)
+
+# Async serving mode: cap in-flight voice webhooks per worker
+from utils.async_serving import async_mode_enabled, WebhookConcurrencyLimiter
+if async_mode_enabled():
+    app.wsgi_app = WebhookConcurrencyLimiter(app.wsgi_app)
 
 # Simple test route to verify deployment is working
 @app.route('/working')
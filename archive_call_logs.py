@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Call log archival job
+Creates upcoming monthly partitions (PostgreSQL) or rolls finished months into
+rollover tables (SQLite), then moves months older than CALL_LOG_HOT_MONTHS into
+compressed archive segments and drops their tables. Run daily from cron; a
+month is only archived once it is entirely past the horizon, and only into
+CALL_LOG_ARCHIVE_DIR, the shared directory call history and exports read.
+
+Usage: python archive_call_logs.py
+"""
+import sys
+from app import app, db
+from utils.call_log_archive import call_log_archive, CALL_LOG_ARCHIVE_DIR, CALL_LOG_HOT_MONTHS
+
+def main():
+    with app.app_context():
+        if not CALL_LOG_ARCHIVE_DIR:
+            print("⚠️ CALL_LOG_ARCHIVE_DIR is not set; only rolling partitions")
+        else:
+            print(f"Archiving call logs older than {CALL_LOG_HOT_MONTHS} months into {CALL_LOG_ARCHIVE_DIR}...")
+        try:
+            results = call_log_archive.archive_old_months(db.engine)
+        except Exception as e:
+            print(f"❌ Archival failed: {e}")
+            return 1
+
+        for table_name, rows in results.items():
+            print(f"   - {table_name}: archived {rows} rows")
+        print(f"✅ Archived {len(results)} month(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
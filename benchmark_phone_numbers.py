@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for phone number normalization.
+
+Compares the per-route implementations that utils/phone_numbers.py
+replaced with the shared precompiled + memoized versions, on the mix of
+formats a webhook sees (Twilio E.164 plus user-typed numbers).
+
+Usage: python benchmark_phone_numbers.py [--number 200000]
+"""
+import re
+import timeit
+import argparse
+from utils import phone_numbers
+from utils.phone_numbers import canonical_e164, canonicalize_many, digits_only, format_display
+
+SAMPLES = [
+    "+15551234567", "+16316417727", "(555) 123-4567", "555.987.6543",
+    "1-555-222-3333", "+447700900123", "5550001111", "+15551234567",
+]
+
+def legacy_e164(phone_number):
+    """Inner helper formerly redefined on every voice_sdk_outbound call"""
+    def normalize_phone_number(phone_number):
+        digits = re.sub(r'\D', '', phone_number)
+        if len(digits) == 10:
+            return '+1' + digits
+        elif len(digits) == 11 and digits.startswith('1'):
+            return '+' + digits
+        return phone_number
+    return normalize_phone_number(phone_number)
+
+def legacy_digits(phone):
+    """Former multi_user.normalize_phone"""
+    return re.sub(r'[^\d]', '', phone)
+
+def legacy_display(phone):
+    """Former multi_user.format_phone_display"""
+    digits = re.sub(r'[^\d]', '', phone)
+    if len(digits) == 10:
+        return f"({digits[0:3]}) {digits[3:6]}-{digits[6:10]}"
+    elif len(digits) == 11 and digits[0] == '1':
+        return f"({digits[1:4]}) {digits[4:7]}-{digits[7:11]}"
+    return phone
+
+def bench(label, func, number):
+    calls = number * len(SAMPLES)
+    seconds = timeit.timeit(lambda: [func(p) for p in SAMPLES], number=number)
+    print(f"{label:<38} {seconds / calls * 1e9:8.1f} ns/call")
+
+def main():
+    parser = argparse.ArgumentParser(description="Phone normalization microbenchmarks")
+    parser.add_argument('--number', type=int, default=200000, help="Passes over the sample set")
+    args = parser.parse_args()
+    number = args.number
+
+    print(f"{len(SAMPLES)} sample numbers x {number} passes\n")
+
+    print("E.164 canonicalization")
+    bench("  legacy inner function + re.sub", legacy_e164, number)
+    phone_numbers._canonicalize.cache_clear()
+    bench("  canonical_e164 (memoized)", canonical_e164, number)
+    bench("  canonical_e164 (uncached)", lambda p: phone_numbers._canonicalize.__wrapped__(p, 'US'), number)
+
+    print("\nDigits only")
+    bench("  legacy re.sub per call", legacy_digits, number)
+    bench("  digits_only (precompiled)", digits_only, number)
+
+    print("\nDisplay formatting")
+    bench("  legacy format_phone_display", legacy_display, number)
+    bench("  format_display (memoized)", format_display, number)
+
+    print("\nBulk canonicalization (10,000 numbers, 1,000 distinct)")
+    batch = [f"(555) 555-{i % 1000:04d}" for i in range(10000)]
+    seconds = timeit.timeit(lambda: [legacy_e164(p) for p in batch], number=20) / 20
+    print(f"  {'legacy per-number loop':<36} {seconds * 1000:8.2f} ms/batch")
+    phone_numbers._canonicalize.cache_clear()
+    seconds = timeit.timeit(lambda: canonicalize_many(batch), number=20) / 20
+    print(f"  {'canonicalize_many':<36} {seconds * 1000:8.2f} ms/batch")
+
+    print(f"\nCache: {phone_numbers.cache_info()['canonical_e164']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared /voice/incoming webhook for multi-user calls:
+TwiML <Redirect> hop versus in-process dispatch.
+
+Runs against the configured database using the Flask test client, so it
+measures app time only. Pass --rtt-ms to add the Twilio <-> app network
+round-trip that each extra webhook hop costs in production.
+
+Usage: python benchmark_webhooks.py [--iterations 500] [--rtt-ms 150]
+"""
+import io
+import re
+import sys
+import time
+import argparse
+import statistics
+from contextlib import redirect_stdout
+from app import app
+from models_multi_user import User
+import routes.voice as voice_routes
+
+CALLER = "+15005550006"  # Not whitelisted, so every call takes the PIN prompt path
+REDIRECT_PATTERN = re.compile(r'<Redirect[^>]*>([^<]+)</Redirect>')
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_mode(client, to_number, iterations, inprocess):
+    """Time one full screening decision per iteration; returns (samples_ms, hops)"""
+    voice_routes.INPROCESS_DISPATCH = inprocess
+    samples = []
+    hops = 0
+
+    with redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.post('/voice/incoming', data={'To': to_number, 'From': CALLER})
+            hops = 1
+            body = response.get_data(as_text=True)
+
+            # Twilio follows the redirect with a second webhook request
+            redirect = REDIRECT_PATTERN.search(body)
+            if redirect:
+                redirect_url = redirect.group(1)
+                response = client.post(redirect_url, data={'To': to_number, 'From': CALLER})
+                hops = 2
+
+            samples.append((time.perf_counter() - started) * 1000)
+
+    return samples, hops
+
+def report(label, samples, hops, rtt_ms):
+    network = (hops - 1) * rtt_ms
+    print(f"{label:<22} hops={hops}  p50={percentile(samples, 50):7.2f}ms  "
+          f"p99={percentile(samples, 99):7.2f}ms  mean={statistics.mean(samples):7.2f}ms  "
+          f"+extra network={network:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare redirect and in-process webhook dispatch")
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help="Twilio <-> app round-trip per extra hop")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user = User.query.filter_by(is_active=True).first()
+        if not user:
+            print("No active multi-user account found; sign up a user first.")
+            sys.exit(1)
+        to_number = user.assigned_twilio_number
+
+    original = voice_routes.INPROCESS_DISPATCH
+    client = app.test_client()
+    print(f"Benchmarking /voice/incoming for {to_number} ({args.iterations} calls per mode)\n")
+
+    try:
+        # Warm up the routing table and template caches
+        run_mode(client, to_number, 10, True)
+
+        redirect_samples, redirect_hops = run_mode(client, to_number, args.iterations, False)
+        inprocess_samples, inprocess_hops = run_mode(client, to_number, args.iterations, True)
+    finally:
+        voice_routes.INPROCESS_DISPATCH = original
+
+    report("TwiML <Redirect>", redirect_samples, redirect_hops, args.rtt_ms)
+    report("In-process dispatch", inprocess_samples, inprocess_hops, args.rtt_ms)
+
+    saved = statistics.median(redirect_samples) - statistics.median(inprocess_samples)
+    saved += (redirect_hops - inprocess_hops) * args.rtt_ms
+    print(f"\nEstimated ring delay saved per call: {saved:.2f}ms")
+
+if __name__ == "__main__":
+    main()
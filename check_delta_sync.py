@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Delta sync journal check
+Blocks a caller for a throwaway user through the voice screening helpers,
+clears the block, and verifies /multi/user/<id>/sync reports it under
+deleted.blocked; then re-blocks and verifies the client sees exactly one
+live block. Runs against the configured database with the Flask test
+client and removes the throwaway user afterwards.
+
+Usage: python check_delta_sync.py
+"""
+import io
+import sys
+import uuid
+from contextlib import redirect_stdout
+from sqlalchemy import select, func
+from app import app, db
+from models_multi_user import User, UserBlocklist, UserFailLog, SyncChange
+from routes.multi_user_voice import note_failure_and_maybe_block, clear_failures
+
+CALLER = "+15005550006"
+HEADERS = {'X-API-Key': 'dev-key-123'}
+
+def block(user):
+    with redirect_stdout(io.StringIO()):
+        for _ in range(user.rl_max_attempts):
+            note_failure_and_maybe_block(user, CALLER)
+
+def sync(client, user_id, since):
+    response = client.get(f'/multi/user/{user_id}/sync?since={since}&resources=blocked', headers=HEADERS)
+    return response.get_json()
+
+def journal_cursor(user):
+    """Cursor of a client that has already synced everything journaled so far"""
+    return db.session.execute(
+        select(func.max(SyncChange.id)).where(SyncChange.user_id == user.id)
+    ).scalar() or 0
+
+def check(user, client):
+    block(user)
+    blocked_id = UserBlocklist.query.filter_by(user_id=user.id, caller_number=CALLER).one().id
+    since = journal_cursor(user)
+    if not since:
+        print("❌ Blocking a caller was not journaled")
+        return False
+
+    clear_failures(user, CALLER)
+    result = sync(client, user.id, since)
+    if blocked_id not in result['deleted']['blocked']:
+        print(f"❌ Cleared block {blocked_id} missing from deleted.blocked: {result}")
+        return False
+    print(f"   - cleared block {blocked_id} arrives in deleted.blocked")
+
+    since = journal_cursor(user)
+    block(user)
+    block(user)  # A second round extends the block instead of adding a row
+    result = sync(client, user.id, since)
+    live = [entry['id'] for entry in result['upserts']['blocked']]
+    if len(live) != 1 or result['deleted']['blocked']:
+        print(f"❌ Expected exactly one live block after re-blocking: {result}")
+        return False
+    print(f"   - re-block arrives as one upsert ({live[0]})")
+    return True
+
+def main():
+    with app.app_context():
+        suffix = uuid.uuid4().hex[:8]
+        user = User(email=f"delta-sync-check-{suffix}@example.invalid", name="Delta sync check",
+                    real_phone_number=f"+1555{int(suffix, 16) % 10**7:07d}",
+                    assigned_twilio_number=f"+1999{int(suffix, 16) % 10**7:07d}",
+                    pin='1234', verbal_code='check')
+        db.session.add(user)
+        db.session.commit()
+
+        print("Checking delta sync tombstones for blocked callers...")
+        try:
+            ok = check(user, app.test_client())
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Check failed: {e}")
+            ok = False
+        finally:
+            for model in (UserBlocklist, UserFailLog, SyncChange):
+                model.query.filter_by(user_id=user.id).delete()
+            db.session.delete(user)
+            db.session.commit()
+
+        if ok:
+            print("✅ Delta sync journals block tombstones")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
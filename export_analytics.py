@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Analytics export job
+Writes new call logs since the last watermark, and a fresh full copy of call
+quality metrics and quality alerts, into day-partitioned Parquet files
+(<dir>/<table>/date=YYYY-MM-DD/) for offline analysis. Run hourly or daily from cron; requires pyarrow
+(pip install .[analytics]).
+
+Usage: python export_analytics.py [--dir PATH]
+"""
+import sys
+import argparse
+from app import app, db
+from utils.analytics_export import analytics_exporter, export_dir, PYARROW_AVAILABLE
+
+def main():
+    parser = argparse.ArgumentParser(description="Export analytics tables to Parquet")
+    parser.add_argument('--dir', help="Export directory (default: ANALYTICS_EXPORT_DIR or instance/analytics_export)")
+    args = parser.parse_args()
+
+    if not PYARROW_AVAILABLE:
+        print("❌ pyarrow is not installed; install the 'analytics' extra")
+        return 1
+
+    with app.app_context():
+        directory = args.dir or export_dir()
+        print(f"Exporting analytics tables into {directory}...")
+        try:
+            results = analytics_exporter.run(db, directory=directory)
+        except Exception as e:
+            print(f"❌ Export failed: {e}")
+            return 1
+
+        for table_name, (rows, files) in results.items():
+            print(f"   - {table_name}: {rows} rows in {files} file(s)")
+        print("✅ Analytics export complete")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for CallBunker
+
+SERVING_MODE=sync (default) keeps the classic one-request-per-worker model.
+SERVING_MODE=async switches to gevent workers so each process can hold
+thousands of in-flight Twilio webhooks while they wait on the database.
+Command line flags (e.g. --bind) still take precedence over this file.
+Every worker warms its verified caller ID list once the app is loaded, so
+outbound dialing never waits on Twilio.
+"""
+import os
+
+serving_mode = os.environ.get("SERVING_MODE", "sync").strip().lower()
+
+if serving_mode == "async":
+    worker_class = "gevent"
+    worker_connections = int(os.environ.get("WEB_WORKER_CONNECTIONS", 2000))
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+
+    def post_fork(server, worker):
+        """Patch the Postgres driver before the app opens any connections"""
+        from utils.async_serving import patch_database_driver
+        patch_database_driver()
+
+def post_worker_init(worker):
+    """Start the caller ID refresher so the list is loaded before the first dial"""
+    from utils.caller_id_registry import caller_id_registry
+    caller_id_registry.start()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Background job worker
+Claims and runs jobs from the background_jobs table (pool replenishment,
+webhook reconciliation, retention cleanup, call log archival). Run one or
+more workers next to the web processes; whichever holds the scheduler lease
+also enqueues the periodic jobs and requeues jobs whose worker died.
+
+Usage: python job_worker.py [--once] [--worker-id ID] [--batch N]
+"""
+import sys
+import signal
+import argparse
+import logging
+from app import app
+from utils.jobs import job_queue, JobWorker
+import utils.maintenance_jobs  # noqa: F401 - registers handlers and schedules
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument('--once', action='store_true', help="Schedule due jobs, run everything queued, then exit")
+    parser.add_argument('--worker-id', help="Worker identity (default: hostname:pid)")
+    parser.add_argument('--batch', type=int, default=1, help="Jobs claimed per poll")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    worker = JobWorker(job_queue, worker_id=args.worker_id, batch=args.batch)
+
+    def stop(signum, frame):
+        print(f"Stopping worker {worker.worker_id} after the current job...")
+        worker.stopping = True
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    with app.app_context():
+        if args.once:
+            try:
+                worker.scheduler_tick()
+                ran = worker.run_once()
+            except Exception as e:
+                print(f"❌ Job run failed: {e}")
+                return 1
+            stats = job_queue.stats()
+            print(f"✅ Ran {ran} job(s); {stats['queued']} queued, {stats['failed']} failed")
+            return 0
+
+        print(f"Starting job worker {worker.worker_id} ({', '.join(sorted(job_queue.jobs))})")
+        worker.run_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
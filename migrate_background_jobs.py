@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Background jobs
+Creates the background_jobs queue and job_leases tables used by
+job_worker.py on databases created before they existed. Safe to re-run.
+"""
+import sys
+from app import app, db
+from models_multi_user import BackgroundJob, JobLease
+
+def migrate_background_jobs():
+    print("Adding background job tables...")
+
+    with app.app_context():
+        try:
+            for model in (BackgroundJob, JobLease):
+                model.__table__.create(bind=db.engine, checkfirst=True)
+                for index in model.__table__.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+                print(f"   - {model.__tablename__}: table ready")
+
+            print("✅ Background job migration complete!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_background_jobs()
+    sys.exit(0 if success else 1)
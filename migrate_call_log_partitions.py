@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Monthly partitions for multi_user_call_logs (PostgreSQL)
+Rebuilds the call log table as a RANGE (created_at) partitioned table with one
+partition per month plus a default partition, copies the rows across, and keeps
+the id sequence. Partitioned tables need the partition key in their primary
+key, so the key becomes (id, created_at) and the call_quality_metrics foreign
+key to call logs is dropped (the ORM relationship is unaffected).
+On SQLite, archive_call_logs.py uses rollover tables instead; a call log table
+created without AUTOINCREMENT is rebuilt with it, and its id sequence is moved
+past every rolled-over and archived id so ids are never handed out twice.
+Safe to re-run.
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import text, inspect
+from sqlalchemy.schema import CreateTable
+from app import app, db
+from models_multi_user import MultiUserCallLog
+from utils.call_log_archive import call_log_archive
+from utils.call_log_partitions import (
+    CALL_LOG_TABLE, CALL_LOG_COLUMNS, CALL_LOG_PARTITIONS_AHEAD, add_months, month_start, create_partition,
+    ensure_partitions, month_tables, is_postgres, is_partitioned, uses_autoincrement, reserve_ids,
+)
+
+OLD_TABLE = f"{CALL_LOG_TABLE}_unpartitioned"
+SEQUENCE = f"{CALL_LOG_TABLE}_id_seq"
+
+def drop_quality_foreign_key(connection):
+    for fk in inspect(connection).get_foreign_keys('call_quality_metrics'):
+        if fk['referred_table'] == CALL_LOG_TABLE and fk.get('name'):
+            connection.execute(text(f'ALTER TABLE call_quality_metrics DROP CONSTRAINT "{fk["name"]}"'))
+            print(f"   - dropped foreign key {fk['name']}")
+
+def partition_call_logs(connection):
+    oldest = connection.execute(text(f"SELECT min(created_at) FROM {CALL_LOG_TABLE}")).scalar()
+
+    drop_quality_foreign_key(connection)
+    connection.execute(text(f"ALTER SEQUENCE {SEQUENCE} OWNED BY NONE"))
+    connection.execute(text(f"ALTER TABLE {CALL_LOG_TABLE} RENAME TO {OLD_TABLE}"))
+    connection.execute(text(
+        f"CREATE TABLE {CALL_LOG_TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS, "
+        f"PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"CREATE TABLE {CALL_LOG_TABLE}_default PARTITION OF {CALL_LOG_TABLE} DEFAULT"))
+
+    # One partition per month from the oldest row through the months ahead
+    month = month_start(oldest or datetime.utcnow())
+    last = add_months(month_start(datetime.utcnow()), CALL_LOG_PARTITIONS_AHEAD)
+    count = 0
+    while month <= last:
+        create_partition(connection, month)
+        month = add_months(month, 1)
+        count += 1
+    print(f"   - created {count} monthly partitions")
+
+    copied = connection.execute(text(f"INSERT INTO {CALL_LOG_TABLE} SELECT * FROM {OLD_TABLE}")).rowcount
+    print(f"   - copied {copied} call logs")
+
+    connection.execute(text(f"DROP TABLE {OLD_TABLE}"))
+    connection.execute(text(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {CALL_LOG_TABLE}.id"))
+
+    # Indexes on the parent cascade to every partition
+    connection.execute(text(f"CREATE INDEX ix_{CALL_LOG_TABLE}_user_id ON {CALL_LOG_TABLE} (user_id)"))
+    connection.execute(text(f"CREATE INDEX ix_call_logs_user_created ON {CALL_LOG_TABLE} (user_id, created_at)"))
+
+def rebuild_with_autoincrement(connection):
+    rebuilt = f"{CALL_LOG_TABLE}_rebuild"
+    columns = ", ".join(CALL_LOG_COLUMNS)
+    create = str(CreateTable(MultiUserCallLog.__table__).compile(dialect=connection.dialect))
+    connection.execute(text(create.replace(f"CREATE TABLE {CALL_LOG_TABLE} ", f"CREATE TABLE {rebuilt} ", 1)))
+    copied = connection.execute(text(
+        f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {CALL_LOG_TABLE}"
+    )).rowcount
+    connection.execute(text(f"DROP TABLE {CALL_LOG_TABLE}"))
+    connection.execute(text(f"ALTER TABLE {rebuilt} RENAME TO {CALL_LOG_TABLE}"))
+    for index in MultiUserCallLog.__table__.indexes:
+        index.create(connection)
+    print(f"   - rebuilt {CALL_LOG_TABLE} with AUTOINCREMENT ({copied} call logs)")
+
+def reserve_rolled_ids(connection):
+    """Start new ids after the highest id in the hot table, rollover tables and archive"""
+    ids = [connection.execute(text(f"SELECT max(id) FROM {CALL_LOG_TABLE}")).scalar()]
+    ids += [connection.execute(text(f"SELECT max(id) FROM {name}")).scalar()
+            for name in month_tables(connection).values()]
+    ids += [segment.index['max_id'] for segment in call_log_archive.segments()]
+    max_id = max((i for i in ids if i is not None), default=0)
+    reserve_ids(connection, max_id)
+    print(f"   - new call log ids start after {max_id}")
+
+def migrate_call_log_partitions():
+    print("Partitioning call logs by month...")
+
+    with app.app_context():
+        try:
+            with db.engine.begin() as connection:
+                if not is_postgres(connection):
+                    if not uses_autoincrement(connection):
+                        rebuild_with_autoincrement(connection)
+                    reserve_rolled_ids(connection)
+                elif is_partitioned(connection):
+                    created = ensure_partitions(connection)
+                    print(f"   - already partitioned; ensured {len(created)} upcoming partitions")
+                else:
+                    partition_call_logs(connection)
+
+            print("✅ Call log partitioning complete!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_call_log_partitions()
+    sys.exit(0 if success else 1)
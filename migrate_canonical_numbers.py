@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Canonical E.164 caller numbers
+Rewrites Whitelist, UserWhitelist, UserFailLog and UserBlocklist caller
+numbers to canonical E.164 in batches (user rows in their owner's country,
+legacy tenant rows as US numbers), merges rows that collapse onto the
+same (owner, caller) pair, then creates the composite indexes.
+Safe to re-run.
+"""
+import os
+import sys
+from sqlalchemy import func
+from app import app, db
+from models import Whitelist
+from models_multi_user import User, UserWhitelist, UserFailLog, UserBlocklist
+from utils.phone_numbers import canonicalize_many
+
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 500))
+
+def merge_whitelist(keeper, duplicates):
+    """Keep any custom PIN and verbal permission from the duplicates"""
+    for row in duplicates:
+        keeper.pin = keeper.pin or row.pin
+        keeper.verbal = keeper.verbal or row.verbal
+
+def merge_user_whitelist(keeper, duplicates):
+    for row in duplicates:
+        keeper.custom_pin = keeper.custom_pin or row.custom_pin
+        keeper.allows_verbal = keeper.allows_verbal or row.allows_verbal
+        if row.created_at and (keeper.created_at is None or row.created_at < keeper.created_at):
+            keeper.created_at = row.created_at
+
+def merge_user_blocklist(keeper, duplicates):
+    """The longest block wins"""
+    for row in duplicates:
+        if row.unblock_at > keeper.unblock_at:
+            keeper.unblock_at = row.unblock_at
+
+# (model, owner column, caller number column, merge function or None to keep duplicates)
+TABLES = [
+    (Whitelist, Whitelist.screening_number, Whitelist.number, merge_whitelist),
+    (UserWhitelist, UserWhitelist.user_id, UserWhitelist.caller_number, merge_user_whitelist),
+    (UserFailLog, UserFailLog.user_id, UserFailLog.caller_number, None),
+    (UserBlocklist, UserBlocklist.user_id, UserBlocklist.caller_number, merge_user_blocklist),
+]
+
+def owner_countries(owner_column, rows):
+    """{owner: country} for user-owned rows; legacy tenants have no country (read as US)"""
+    if owner_column.key != 'user_id':
+        return {}
+    owners = {row.user_id for row in rows}
+    return dict(db.session.query(User.id, User.country).filter(User.id.in_(owners)))
+
+def rewrite_numbers(model, owner_column, number_column):
+    """Rewrite caller numbers to canonical form, BATCH_SIZE rows per transaction"""
+    last_id = 0
+    scanned = updated = 0
+
+    while True:
+        rows = model.query.filter(model.id > last_id).order_by(model.id).limit(BATCH_SIZE).all()
+        if not rows:
+            break
+
+        # Canonicalize each owner country's rows in one batch
+        countries = owner_countries(owner_column, rows)
+        by_country = {}
+        for row in rows:
+            by_country.setdefault(countries.get(getattr(row, owner_column.key)), []).append(row)
+        for country, country_rows in by_country.items():
+            current_numbers = [getattr(row, number_column.key) for row in country_rows]
+            for row, current, canonical in zip(country_rows, current_numbers, canonicalize_many(current_numbers, country)):
+                if canonical and canonical != current:
+                    setattr(row, number_column.key, canonical)
+                    updated += 1
+
+        scanned += len(rows)
+        last_id = rows[-1].id
+        db.session.commit()
+
+    return scanned, updated
+
+def merge_duplicates(model, owner_column, number_column, merge):
+    """Collapse rows that now share an (owner, caller) pair onto the oldest row"""
+    groups = db.session.query(owner_column, number_column).group_by(
+        owner_column, number_column
+    ).having(func.count(model.id) > 1).all()
+
+    removed = 0
+    for index, (owner, number) in enumerate(groups, start=1):
+        rows = model.query.filter(owner_column == owner, number_column == number).order_by(model.id).all()
+        keeper, duplicates = rows[0], rows[1:]
+        merge(keeper, duplicates)
+        for row in duplicates:
+            db.session.delete(row)
+        removed += len(duplicates)
+
+        if index % BATCH_SIZE == 0:
+            db.session.commit()
+
+    db.session.commit()
+    return removed
+
+def create_indexes(model):
+    """Create the model's declared indexes that an older schema is missing"""
+    for index in model.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+
+def migrate_canonical_numbers():
+    print("Migrating caller numbers to canonical E.164...")
+
+    with app.app_context():
+        try:
+            for model, owner_column, number_column, merge in TABLES:
+                table = model.__tablename__
+                scanned, updated = rewrite_numbers(model, owner_column, number_column)
+                print(f"   - {table}: scanned {scanned}, rewrote {updated}")
+
+                if merge:
+                    removed = merge_duplicates(model, owner_column, number_column, merge)
+                    print(f"   - {table}: merged {removed} duplicate rows")
+
+                create_indexes(model)
+                print(f"   - {table}: indexes ready")
+
+            print("✅ Caller numbers migrated successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_canonical_numbers()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Area code number inventory
+Adds the area_code and requested_area_code columns to twilio_phone_pool,
+fills area_code for existing numbers in batches and creates the
+per-area-code inventory indexes. Safe to re-run.
+"""
+import os
+import sys
+from sqlalchemy import inspect, text, update
+from app import app, db
+from models_multi_user import TwilioPhonePool
+from utils.phone_numbers import area_code
+
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 500))
+
+def add_columns():
+    existing = {column['name'] for column in inspect(db.engine).get_columns(TwilioPhonePool.__tablename__)}
+    with db.engine.begin() as connection:
+        for name in ('area_code', 'requested_area_code'):
+            if name not in existing:
+                connection.execute(text(f"ALTER TABLE {TwilioPhonePool.__tablename__} ADD COLUMN {name} VARCHAR(3)"))
+                print(f"   - {name}: column added")
+
+def backfill_area_codes():
+    """Derive area_code from phone_number, BATCH_SIZE rows per transaction"""
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.execute(
+            db.select(TwilioPhonePool.id, TwilioPhonePool.phone_number)
+            .where(TwilioPhonePool.id > last_id, TwilioPhonePool.area_code.is_(None))
+            .order_by(TwilioPhonePool.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            code = area_code(row.phone_number)
+            if code:
+                db.session.execute(update(TwilioPhonePool).where(TwilioPhonePool.id == row.id).values(area_code=code))
+                updated += 1
+        db.session.commit()
+        last_id = rows[-1].id
+    return updated
+
+def migrate_number_inventory():
+    print("Adding area code number inventory...")
+
+    with app.app_context():
+        try:
+            add_columns()
+            print(f"   - twilio_phone_pool: {backfill_area_codes()} area codes filled")
+
+            for index in TwilioPhonePool.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+            print("   - twilio_phone_pool: indexes ready")
+
+            print("✅ Number inventory migration complete!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_number_inventory()
+    sys.exit(0 if success else 1)
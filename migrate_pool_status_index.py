@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Phone pool partial index
+Creates the partial index on unassigned twilio_phone_pool rows used by the
+pool status counts and signup number selection, on databases created
+before it existed. Safe to re-run.
+"""
+import sys
+from app import app, db
+from models_multi_user import TwilioPhonePool
+
+def migrate_pool_status_index():
+    print("Adding phone pool partial index...")
+
+    with app.app_context():
+        try:
+            for index in TwilioPhonePool.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+            print(f"   - {TwilioPhonePool.__tablename__}: indexes ready")
+
+            print("✅ Pool status index migration complete!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_pool_status_index()
+    sys.exit(0 if success else 1)
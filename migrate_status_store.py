@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Twilio status store
+Creates the twilio_statuses table written by /status/messages and
+/status/calls callbacks on databases created before it existed.
+Safe to re-run.
+"""
+import sys
+from app import app, db
+from models_multi_user import TwilioStatus
+
+def migrate_status_store():
+    print("Adding Twilio status store...")
+
+    with app.app_context():
+        try:
+            TwilioStatus.__table__.create(bind=db.engine, checkfirst=True)
+            print("   - twilio_statuses: table ready")
+            print("✅ Status store migration complete!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_status_store()
+    sys.exit(0 if success else 1)
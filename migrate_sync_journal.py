@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Database Migration: Delta sync journal
+Creates the sync_changes table and the call history index used by
+/multi/user/<id>/sync on databases created before they existed.
+Existing clients start with a full resync. Safe to re-run.
+"""
+import sys
+from app import app, db
+from models_multi_user import SyncChange, MultiUserCallLog
+
+def migrate_sync_journal():
+    print("Adding delta sync journal...")
+
+    with app.app_context():
+        try:
+            SyncChange.__table__.create(bind=db.engine, checkfirst=True)
+            print("   - sync_changes: table ready")
+
+            for model in (SyncChange, MultiUserCallLog):
+                for index in model.__table__.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+                print(f"   - {model.__tablename__}: indexes ready")
+
+            print("✅ Sync journal migration complete!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {e}")
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    success = migrate_sync_journal()
+    sys.exit(0 if success else 1)
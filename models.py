@@ -35,12 +35,17 @@ class Whitelist(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     screening_number = db.Column(db.String(20), ForeignKey('tenant.screening_number'), nullable=False, index=True)
-    number = db.Column(db.String(20), nullable=False, index=True)  # caller digits/e164-ish
+    number = db.Column(db.String(20), nullable=False, index=True)  # caller number, canonical E.164
     pin = db.Column(db.String(4), nullable=True)
     verbal = db.Column(db.Boolean, default=False, nullable=False)
     
     # Relationships
     tenant = relationship("Tenant", back_populates="whitelists")
+    
+    # One row per (tenant, caller); number is canonical E.164
+    __table_args__ = (
+        Index('uq_whitelist_tenant_number', 'screening_number', 'number', unique=True),
+    )
 
 class FailLog(db.Model):
     __tablename__ = 'faillog'
@@ -46,6 +46,11 @@ class User(db.Model):
     fail_logs = relationship("UserFailLog", back_populates="user", cascade="all, delete-orphan")
     blocklists = relationship("UserBlocklist", back_populates="user", cascade="all, delete-orphan")
 
+def _pool_area_code(context):
+    """Inventory bucket of a new pool number, derived from the number itself"""
+    from utils.phone_numbers import area_code
+    return area_code(context.get_current_parameters()['phone_number'])
+
 class TwilioPhonePool(db.Model):
     """Pool of available Twilio phone numbers for assignment"""
     __tablename__ = 'twilio_phone_pool'
@@ -56,6 +61,10 @@ class TwilioPhonePool(db.Model):
     assigned_to_user_id = db.Column(db.Integer, ForeignKey('users.id'), nullable=True)
     monthly_cost = db.Column(db.Numeric(5,2), default=1.00, nullable=False)  # $1/month per Twilio number
     
+    # Inventory buckets
+    area_code = db.Column(db.String(3), default=_pool_area_code, nullable=True)  # NANP area code of this number
+    requested_area_code = db.Column(db.String(3), nullable=True)  # Area code the assigned user asked for (demand)
+    
     # Webhook configuration
     webhook_configured = db.Column(db.Boolean, default=False, nullable=False)
     
@@ -64,6 +73,16 @@ class TwilioPhonePool(db.Model):
     
     # Relationships
     assigned_user = relationship("User", foreign_keys=[assigned_to_user_id])
+    
+    __table_args__ = (
+        # Partial index: the unassigned rows counted for pool status and picked at signup
+        db.Index('ix_twilio_phone_pool_unassigned', 'id',
+                 postgresql_where=db.text('NOT is_assigned'), sqlite_where=db.text('is_assigned = 0')),
+        # Per-area-code seek for local numbers at signup
+        db.Index('ix_twilio_phone_pool_unassigned_area', 'area_code', 'id',
+                 postgresql_where=db.text('NOT is_assigned'), sqlite_where=db.text('is_assigned = 0')),
+        db.Index('ix_twilio_phone_pool_demand', 'assigned_at', 'requested_area_code'),
+    )
 
 class MultiUserCallLog(db.Model):
     """Call logs for multi-user system"""
@@ -84,6 +103,13 @@ class MultiUserCallLog(db.Model):
     
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
+    
+    # Newest-first history and sync snapshots per user. On SQLite, AUTOINCREMENT
+    # stops ids of rows rolled out of this table from being handed out again.
+    __table_args__ = (
+        db.Index('ix_call_logs_user_created', 'user_id', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
 
 class UserWhitelist(db.Model):
     """Per-user whitelisted numbers"""
@@ -99,6 +125,11 @@ class UserWhitelist(db.Model):
     
     # Relationships
     user = relationship("User", back_populates="whitelists")
+    
+    # One row per (user, caller); caller_number is canonical E.164
+    __table_args__ = (
+        db.Index('uq_user_whitelist_user_caller', 'user_id', 'caller_number', unique=True),
+    )
 
 class UserFailLog(db.Model):
     """Per-user authentication failure tracking"""
@@ -111,6 +142,11 @@ class UserFailLog(db.Model):
     
     # Relationships
     user = relationship("User", back_populates="fail_logs")
+    
+    # Covers the recent-failure count on the call path
+    __table_args__ = (
+        db.Index('ix_user_fail_log_user_caller_time', 'user_id', 'caller_number', 'failure_time'),
+    )
 
 class UserBlocklist(db.Model):
     """Per-user temporarily blocked numbers"""
@@ -123,6 +159,11 @@ class UserBlocklist(db.Model):
     
     # Relationships
     user = relationship("User", back_populates="blocklists")
+    
+    # One active block per (user, caller)
+    __table_args__ = (
+        db.Index('uq_user_blocklist_user_caller', 'user_id', 'caller_number', unique=True),
+    )
 
 class CallQualityMetrics(db.Model):
     """Real-time call quality monitoring and metrics"""
@@ -189,4 +230,73 @@ class QualityAlert(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
-    user = relationship("User", foreign_keys=[user_id])
\ No newline at end of file
+    user = relationship("User", foreign_keys=[user_id])
+
+class SyncChange(db.Model):
+    """Per-user change journal behind mobile delta sync"""
+    __tablename__ = 'sync_changes'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Monotonic sync cursor
+    user_id = db.Column(db.Integer, nullable=False)
+    resource = db.Column(db.String(20), nullable=False)  # contacts, blocked, calls
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    # Ids are never reused (SQLite would otherwise recycle them after pruning)
+    __table_args__ = (
+        db.Index('ix_sync_changes_user_seq', 'user_id', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
+class TwilioStatus(db.Model):
+    """Latest known state of a Twilio message or call, fed by status callbacks"""
+    __tablename__ = 'twilio_statuses'
+    
+    sid = db.Column(db.String(64), primary_key=True)  # MessageSid / CallSid
+    kind = db.Column(db.String(10), nullable=False)  # message, call
+    status = db.Column(db.String(20), nullable=False)  # Twilio status string
+    
+    error_code = db.Column(db.Integer, nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+    duration_seconds = db.Column(db.Integer, nullable=True)  # Calls only
+    from_number = db.Column(db.String(20), nullable=True)
+    to_number = db.Column(db.String(20), nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)  # Message date_sent / call start_time
+    ended_at = db.Column(db.DateTime, nullable=True)  # Call end_time
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Last callback or fetch
+
+class BackgroundJob(db.Model):
+    """Durable job queue consumed by job_worker.py"""
+    __tablename__ = 'background_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)  # Registered handler name
+    payload = db.Column(db.Text, nullable=True)  # JSON arguments
+    
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, done, failed
+    unique_key = db.Column(db.String(100), nullable=True, unique=True)  # Set while queued/running to dedupe
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Not claimed before this
+    locked_by = db.Column(db.String(100), nullable=True)  # Worker id while running
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_background_jobs_claim', 'status', 'run_at'),
+        db.Index('ix_background_jobs_name_run', 'name', 'run_at'),
+    )
+
+class JobLease(db.Model):
+    """Time-limited leases electing one worker for singleton duties (e.g. the scheduler)"""
+    __tablename__ = 'job_leases'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
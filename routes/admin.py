@@ -3,8 +3,10 @@ from datetime import datetime, timedelta
 from app import db
 from models import Tenant, Whitelist, FailLog, Blocklist
 # Import models inside functions to avoid circular imports
-from utils.auth import require_admin_web, parse_annotated_number, norm_digits
+from utils.auth import require_admin_web, require_admin_api, parse_annotated_number, norm_digits
 from utils.sendgrid_helper import send_notification_email
+from utils.db_routing import use_read_replica
+from utils.phone_numbers import canonical_e164
 from sqlalchemy import func, and_
 import re
 
@@ -12,6 +14,7 @@ admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/')
 @require_admin_web
+@use_read_replica
 def admin_home():
     """Admin dashboard"""
     tenants = Tenant.query.all()
@@ -106,13 +109,13 @@ def google_voice_setup():
         # ALL forwarded calls will appear to come from this Google Voice number
         existing_whitelist = Whitelist.query.filter_by(
             screening_number=google_voice_number,
-            number=google_voice_number
+            number=canonical_e164(google_voice_number)
         ).first()
         
         if not existing_whitelist:
             whitelist_entry = Whitelist(
                 screening_number=google_voice_number,
-                number=google_voice_number,
+                number=canonical_e164(google_voice_number),
                 pin=None,  # No PIN needed for auto-whitelisted calls
                 verbal=False
             )
@@ -230,7 +233,7 @@ def whitelist_add(screening_number):
         return redirect(url_for('admin.whitelist_manage', screening_number=screening_number))
     
     # Normalize the number using the same logic as the voice system
-    number = norm_digits(number_raw)
+    number = canonical_e164(number_raw)
     
     # Check if entry already exists
     existing = Whitelist.query.filter_by(screening_number=screening_number, number=number).first()
@@ -305,26 +308,18 @@ def test_autowhitelist(screening_number):
     test_number_raw = request.form.get('test_number', '+15551234567').strip()
     
     # Normalize the test number using the same logic as the voice system
-    test_number_normalized = norm_digits(test_number_raw)
+    test_number_normalized = canonical_e164(test_number_raw)
     
     # Get all whitelisted numbers for debugging
     all_whitelist = Whitelist.query.filter_by(screening_number=screening_number).all()
     whitelist_numbers = [wl.number for wl in all_whitelist]
     
     # Check current whitelist status with normalized number
-    # First try the normalized format (without +)
     existing = Whitelist.query.filter_by(
         screening_number=screening_number,
         number=test_number_normalized
     ).first()
     
-    # If not found, try the original format (with +) for legacy data
-    if not existing:
-        existing = Whitelist.query.filter_by(
-            screening_number=screening_number,
-            number=f"+{test_number_normalized}"
-        ).first()
-    
     if existing:
         return jsonify({
             'success': True,
@@ -493,6 +488,7 @@ def test_tenant_config(screening_number):
 
 @admin_bp.route('/tenant/list')
 @require_admin_web
+@use_read_replica
 def tenant_list():
     """Simple tenant list view"""
     tenants = Tenant.query.order_by(Tenant.created_at.desc()).all()
@@ -525,3 +521,26 @@ def sms_verification_guide():
 def call_verification_guide():
     """Call verification guide with temporary forwarding"""
     return render_template('admin/call_verification_guide.html')
+
+@admin_bp.route('/api/db-pool-stats')
+@require_admin_api
+def db_pool_stats():
+    """Connection pool telemetry for the primary and replica engines"""
+    from utils.db_pool import pool_statistics, pool_profile
+    engines = {
+        'primary' if bind_key is None else bind_key: pool_statistics(engine)
+        for bind_key, engine in db.engines.items()
+    }
+    return jsonify({'success': True, 'profile': pool_profile(), 'engines': engines})
+
+@admin_bp.route('/api/cache-stats')
+@require_admin_api
+def cache_stats():
+    """Per-worker hit rates of the Voice token and Twilio status caches"""
+    from utils.voice_tokens import voice_token_cache
+    from utils.status_store import status_store
+    return jsonify({
+        'success': True,
+        'voice_tokens': voice_token_cache.stats(),
+        'twilio_statuses': status_store.stats(),
+    })
@@ -12,7 +12,10 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, render_template, session
 from sqlalchemy import func, desc, and_
 from app import db
-from models_multi_user import User, MultiUserCallLog, CallQualityMetrics, QualityAlert
+from models_multi_user import MultiUserCallLog, CallQualityMetrics, QualityAlert
+from utils.db_routing import use_read_replica
+from utils.user_context import load_user_or_404, session_user
+from utils.etag import check_not_modified, with_etag, time_bucket
 
 call_quality_bp = Blueprint('call_quality', __name__)
 
@@ -52,6 +55,10 @@ def require_user_auth(user_id):
     if session['user_id'] != user_id:
         return False, jsonify({'error': 'Unauthorized access'}), 403
     
+    # Resolve the session user once; the handler's lookup reuses it
+    if session_user() is None:
+        return False, jsonify({'error': 'Authentication required'}), 401
+    
     return True, None, None
 
 @call_quality_bp.route('/twilio/insights', methods=['POST'])
@@ -128,7 +135,7 @@ def submit_quality_metrics(user_id, call_log_id):
     if not auth_valid:
         return error_response, status_code
     
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     call_log = MultiUserCallLog.query.filter_by(user_id=user_id, id=call_log_id).first()
     
     if not call_log:
@@ -201,7 +208,7 @@ def submit_user_feedback(user_id, call_log_id):
     if not auth_valid:
         return error_response, status_code
     
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     data = request.get_json()
     user_rating = data.get('rating')  # 1-5 scale
@@ -243,7 +250,15 @@ def submit_user_feedback(user_id, call_log_id):
         'quality_id': quality_metrics.id
     })
 
+SUMMARY_COLUMNS = (
+    CallQualityMetrics.call_log_id, CallQualityMetrics.mos_score, CallQualityMetrics.latency_ms,
+    CallQualityMetrics.jitter_ms, CallQualityMetrics.packet_loss_percent, CallQualityMetrics.quality_category,
+    CallQualityMetrics.user_rating, CallQualityMetrics.network_type, CallQualityMetrics.device_platform,
+    CallQualityMetrics.created_at,
+)
+
 @call_quality_bp.route('/api/users/<int:user_id>/quality/summary', methods=['GET'])
+@use_read_replica
 def get_quality_summary(user_id):
     """Get call quality summary for a user"""
     # Require authentication
@@ -251,17 +266,27 @@ def get_quality_summary(user_id):
     if not auth_valid:
         return error_response, status_code
     
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     # Query parameters
     days = request.args.get('days', 7, type=int)
     limit = request.args.get('limit', 50, type=int)
     
+    # One aggregate over the user's metrics versions the summary; the hourly
+    # bucket covers metrics aging out of the window
+    latest_id, latest_update = db.session.query(
+        func.max(CallQualityMetrics.id), func.max(CallQualityMetrics.updated_at)
+    ).filter(CallQualityMetrics.user_id == user_id).one()
+    not_modified = check_not_modified(days, limit, latest_id, latest_update, time_bucket(3600))
+    if not_modified:
+        return not_modified
+    
     since_date = datetime.utcnow() - timedelta(days=days)
     
     # Get recent quality metrics
-    quality_metrics = db.session.query(CallQualityMetrics)\
-        .join(MultiUserCallLog)\
+    # Only the columns the summary reads
+    quality_metrics = db.session.query(*SUMMARY_COLUMNS)\
+        .join(MultiUserCallLog, CallQualityMetrics.call_log_id == MultiUserCallLog.id)\
         .filter(CallQualityMetrics.user_id == user_id)\
         .filter(CallQualityMetrics.created_at >= since_date)\
         .order_by(desc(CallQualityMetrics.created_at))\
@@ -270,14 +295,14 @@ def get_quality_summary(user_id):
     # Calculate averages
     total_calls = len(quality_metrics)
     if total_calls == 0:
-        return jsonify({
+        return with_etag(jsonify({
             'total_calls': 0,
             'average_mos': None,
             'average_latency': None,
             'average_jitter': None,
             'quality_distribution': {},
             'recent_metrics': []
-        })
+        }))
     
     # Calculate statistics
     mos_scores = [m.mos_score for m in quality_metrics if m.mos_score is not None]
@@ -294,7 +319,7 @@ def get_quality_summary(user_id):
         category = metric.quality_category or 'unknown'
         quality_counts[category] = quality_counts.get(category, 0) + 1
     
-    return jsonify({
+    return with_etag(jsonify({
         'total_calls': total_calls,
         'average_mos': round(avg_mos, 2) if avg_mos else None,
         'average_latency': round(avg_latency, 1) if avg_latency else None,
@@ -312,19 +337,27 @@ def get_quality_summary(user_id):
             'device_platform': m.device_platform,
             'created_at': m.created_at.isoformat()
         } for m in quality_metrics]
-    })
+    }))
 
 @call_quality_bp.route('/api/users/<int:user_id>/quality/alerts', methods=['GET'])
 def get_quality_alerts(user_id):
     """Get active quality alerts for a user"""
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
+    
+    # The active set changes when alerts are raised or resolved
+    active_count, active_id_sum, latest_id = db.session.query(
+        func.count(QualityAlert.id), func.sum(QualityAlert.id), func.max(QualityAlert.id)
+    ).filter(QualityAlert.user_id == user_id, QualityAlert.is_active == True).one()
+    not_modified = check_not_modified(active_count, active_id_sum, latest_id)
+    if not_modified:
+        return not_modified
     
     active_alerts = QualityAlert.query.filter_by(
         user_id=user_id,
         is_active=True
     ).order_by(desc(QualityAlert.created_at)).all()
     
-    return jsonify([{
+    return with_etag(jsonify([{
         'alert_id': alert.id,
         'alert_type': alert.alert_type,
         'severity': alert.severity,
@@ -332,7 +365,7 @@ def get_quality_alerts(user_id):
         'calls_affected': alert.calls_affected,
         'time_period_hours': alert.time_period_hours,
         'created_at': alert.created_at.isoformat()
-    } for alert in active_alerts])
+    } for alert in active_alerts]))
 
 @call_quality_bp.route('/api/users/<int:user_id>/quality/alerts/<int:alert_id>/acknowledge', methods=['POST'])
 def acknowledge_alert(user_id, alert_id):
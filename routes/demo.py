@@ -3,7 +3,8 @@ Demo routes to showcase both CallBunker systems
 """
 from flask import Blueprint, render_template
 from models import Tenant
-from models_multi_user import User, TwilioPhonePool
+from models_multi_user import User
+from utils.pool_status import pool_status_cache
 from app import db
 
 demo_bp = Blueprint('demo', __name__, url_prefix='/demo')
@@ -15,7 +16,7 @@ def compare_systems():
     # Get current system stats
     personal_tenants = Tenant.query.count()
     business_users = User.query.count()
-    available_slots = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+    available_slots = pool_status_cache.available()
     
     return render_template('demo/systems_comparison.html',
                          personal_tenants=personal_tenants,
@@ -5,6 +5,8 @@ Provides call simulation and history for web-based testing
 
 from flask import Blueprint, request, jsonify
 from models_multi_user import db, User, UserWhitelist
+from utils.user_context import load_user_or_404
+from utils.demo_history import demo_history
 from datetime import datetime, timedelta
 import json
 from sqlalchemy.exc import IntegrityError
@@ -12,9 +14,6 @@ import psycopg2
 
 demo_api_bp = Blueprint('demo_api', __name__, url_prefix='/demo/api')
 
-# In-memory call history for demo purposes
-demo_call_history = {}
-
 # Demo blocked numbers for testing
 demo_blocked_numbers = [
     {
@@ -52,16 +51,16 @@ def demo_signup():
         if existing_user:
             return jsonify({'success': False, 'error': 'This email address is already registered. Please use a different email or sign in with your existing account.'})
         
-        # Get available phone number
-        from models_multi_user import TwilioPhonePool
-        available_number = TwilioPhonePool.query.filter_by(is_assigned=False).first()
+        # Get available phone number (local to the user when possible)
+        from utils.number_inventory import allocate_number
+        available_number = allocate_number(data.get('real_phone_number', ''))
         if not available_number:
-            return jsonify({'success': False, 'error': 'No CallBunker numbers available. Please contact support.'})
+            from utils.pool_forecast import request_replenishment
+            request_replenishment(force=True)
+            return jsonify({'success': False, 'error': 'No CallBunker numbers available right now. Please try again in a few minutes.'})
         
         # Normalize phone numbers
-        import re
-        def normalize_phone(phone):
-            return re.sub(r'[^\d]', '', phone)
+        from utils.phone_numbers import digits_only as normalize_phone
         
         # Create new user
         user = User()
@@ -90,6 +89,7 @@ def demo_signup():
         # Now assign the phone number
         available_number.is_assigned = True
         available_number.assigned_to_user_id = user.id
+        available_number.assigned_at = datetime.utcnow()
         
         # Commit everything
         try:
@@ -104,6 +104,9 @@ def demo_signup():
             else:
                 return jsonify({'success': False, 'error': 'Unable to create account. Please try again.'})
         
+        from utils.pool_forecast import request_replenishment
+        request_replenishment()
+        
         return jsonify({
             'success': True,
             'message': 'Account created successfully',
@@ -131,15 +134,11 @@ def demo_make_call():
         user_id = data.get('user_id')
         target_number = data.get('target_number')
         
-        user = User.query.get_or_404(user_id)
+        user = load_user_or_404(user_id)
         
         # Generate call log entry
         call_id = f"demo_{user_id}_{int(datetime.now().timestamp())}"
         
-        # Store in demo history
-        if user_id not in demo_call_history:
-            demo_call_history[user_id] = []
-        
         call_entry = {
             'id': call_id,
             'target_number': target_number,
@@ -150,7 +149,7 @@ def demo_make_call():
             'timestamp': datetime.now().isoformat()
         }
         
-        demo_call_history[user_id].insert(0, call_entry)  # Add to front
+        demo_history.add(user_id, call_entry)  # Newest first, bounded per user
         
         return jsonify({
             'success': True,
@@ -167,8 +166,8 @@ def demo_make_call():
 def demo_call_history_route(user_id):
     """Get call history for demo user"""
     try:
-        user = User.query.get_or_404(user_id)
-        calls = demo_call_history.get(user_id, [])
+        user = load_user_or_404(user_id)
+        calls = demo_history.get(user_id)
         
         return jsonify({
             'success': True,
@@ -210,9 +209,9 @@ def demo_add_contact():
         name = data.get('name')
         phone_number = data.get('phone_number')
         
-        # Normalize phone number
-        import re
-        normalized_phone = re.sub(r'[^\d]', '', phone_number)
+        # Normalize phone number to the canonical stored form
+        from utils.phone_numbers import canonical_e164
+        normalized_phone = canonical_e164(phone_number)
         
         # Create new contact (UserWhitelist only has caller_number, not name)
         contact = UserWhitelist()
@@ -287,7 +286,7 @@ def demo_delete_contact(contact_id):
 def demo_call_direct(user_id):
     """Simulate call initiation for demo"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = load_user_or_404(user_id)
         data = request.get_json()
         to_number = data.get('to_number', '')
         
@@ -309,10 +308,7 @@ def demo_call_direct(user_id):
         }
         
         # Store call in demo history
-        if user_id not in demo_call_history:
-            demo_call_history[user_id] = []
-        
-        demo_call_history[user_id].append({
+        demo_history.add(user_id, {
             "id": call_log_id,
             "to_number": to_number,
             "from_number": call_config["from_number"],
@@ -338,13 +334,8 @@ def demo_complete_call(user_id, call_log_id):
         duration = data.get('duration_seconds', 0)
         
         # Update call in demo history
-        if user_id in demo_call_history:
-            for call in demo_call_history[user_id]:
-                if call['id'] == call_log_id:
-                    call['status'] = status
-                    call['duration'] = duration
-                    call['completed_at'] = datetime.now().isoformat()
-                    break
+        demo_history.update(user_id, call_log_id, status=status, duration=duration,
+                            completed_at=datetime.now().isoformat())
         
         return jsonify({
             "success": True,
@@ -361,10 +352,10 @@ def demo_complete_call(user_id, call_log_id):
 def demo_get_call_history(user_id):
     """Get call history for demo"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = load_user_or_404(user_id)
         
         # Get demo call history
-        user_calls = demo_call_history.get(user_id, [])
+        user_calls = demo_history.get(user_id)
         
         # Add some sample calls if none exist
         if not user_calls:
@@ -386,7 +377,7 @@ def demo_get_call_history(user_id):
                     "timestamp": (datetime.now() - timedelta(hours=1)).isoformat()
                 }
             ]
-            demo_call_history[user_id] = sample_calls
+            demo_history.set(user_id, sample_calls)
             user_calls = sample_calls
         
         # Format for display
@@ -447,13 +438,13 @@ def demo_get_blocked_numbers(user_id):
 def demo_user_status(user_id):
     """Get user status and stats for demo"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = load_user_or_404(user_id)
         
         # Count trusted contacts
         contacts_count = UserWhitelist.query.filter_by(user_id=user_id).count()
         
         # Count calls
-        calls_count = len(demo_call_history.get(user_id, []))
+        calls_count = demo_history.count(user_id)
         
         return jsonify({
             "user": {
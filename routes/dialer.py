@@ -1,11 +1,13 @@
 from flask import Blueprint, render_template, request, jsonify, session
 from app import db
-from models_multi_user import User as MultiUser, MultiUserCallLog
-from utils.twilio_helpers import twilio_client
+from models_multi_user import MultiUserCallLog
+from utils.caller_id_registry import caller_id_registry
+from utils.user_context import load_user_or_404
+from utils.status_store import status_store, advance_call_log, call_log_status
+from utils.call_events import publish_call_status
+from utils.phone_numbers import canonical_e164, format_display, is_nanp_e164
 from twilio.twiml.voice_response import VoiceResponse
 import logging
-from datetime import datetime
-import re
 
 dialer_bp = Blueprint('dialer', __name__)
 
@@ -13,33 +15,17 @@ def format_phone_number(phone):
     """Format phone number for display"""
     if not phone:
         return ""
-    # Remove all non-digits
-    digits = re.sub(r'\D', '', phone)
-    if len(digits) == 11 and digits.startswith('1'):
-        digits = digits[1:]
-    if len(digits) == 10:
-        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
-    return phone
+    return format_display(phone)
 
 def normalize_phone_number(phone):
-    """Normalize phone number to E.164 format"""
-    if not phone:
-        return None
-    # Remove all non-digits
-    digits = re.sub(r'\D', '', phone)
-    # Add country code if missing
-    if len(digits) == 10:
-        digits = '1' + digits
-    elif len(digits) == 11 and digits.startswith('1'):
-        pass
-    else:
-        return None
-    return '+' + digits
+    """Normalize phone number to E.164 format (US/Canada only)"""
+    number = canonical_e164(phone)
+    return number if is_nanp_e164(number) else None
 
 @dialer_bp.route('/dialer/<int:user_id>')
 def dialer_interface(user_id):
     """Web-based dialer interface"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     # Get recent call history
     recent_calls = MultiUserCallLog.query.filter_by(user_id=user_id)\
@@ -54,7 +40,7 @@ def dialer_interface(user_id):
 @dialer_bp.route('/dialer/<int:user_id>/call', methods=['POST'])
 def initiate_call(user_id):
     """Initiate an outgoing call through Twilio Voice SDK"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     data = request.get_json()
     to_number = data.get('to_number')
@@ -68,19 +54,12 @@ def initiate_call(user_id):
         return jsonify({'error': 'Invalid phone number format'}), 400
     
     try:
-        client = twilio_client()
-        
         # Debug logging
         logging.info(f"Making call - From: {user.assigned_twilio_number}, To: {user.real_phone_number}")
         
-        # Get available verified numbers from Twilio
-        try:
-            outgoing_caller_ids = client.outgoing_caller_ids.list()
-            verified_numbers = [caller_id.phone_number for caller_id in outgoing_caller_ids]
-            logging.info(f"Available verified numbers: {verified_numbers}")
-        except Exception as e:
-            logging.error(f"Failed to get verified numbers: {e}")
-            verified_numbers = []
+        # Get available verified numbers (cached registry, refreshed in the background)
+        verified_numbers = caller_id_registry.verified_numbers()
+        logging.info(f"Available verified numbers: {verified_numbers}")
         
         # Try to find a verified number to use
         from_number = None
@@ -156,7 +135,7 @@ def initiate_call(user_id):
 @dialer_bp.route('/api/users/<int:user_id>/call_direct', methods=['POST'])
 def api_call_direct(user_id):
     """Cleanest approach: Just notify target, let mobile app handle native calling"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     data = request.get_json()
     to_number = data.get('to_number')
@@ -198,7 +177,7 @@ def api_call_direct(user_id):
 @dialer_bp.route('/api/users/<int:user_id>/calls', methods=['POST'])
 def api_initiate_call(user_id):
     """API endpoint for mobile app to initiate calls"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     data = request.get_json()
     to_number = data.get('to_number')
@@ -212,15 +191,8 @@ def api_initiate_call(user_id):
         return jsonify({'error': 'Invalid phone number format'}), 400
     
     try:
-        client = twilio_client()
-        
         # Get verified number
-        try:
-            outgoing_caller_ids = client.outgoing_caller_ids.list()
-            verified_numbers = [caller_id.phone_number for caller_id in outgoing_caller_ids]
-        except Exception as e:
-            logging.error(f"Failed to get verified numbers: {e}")
-            verified_numbers = []
+        verified_numbers = caller_id_registry.verified_numbers()
         
         from_number = None
         if user.assigned_twilio_number in verified_numbers:
@@ -272,7 +244,7 @@ def api_initiate_call(user_id):
 @dialer_bp.route('/api/users/<int:user_id>/calls/<int:call_log_id>/status', methods=['GET'])
 def api_call_status(user_id, call_log_id):
     """API endpoint to get call status for native mobile calling"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     call_log = MultiUserCallLog.query.filter_by(
         user_id=user_id,
@@ -282,13 +254,15 @@ def api_call_status(user_id, call_log_id):
     if not call_log:
         return jsonify({'error': 'Call not found'}), 404
     
+    status, duration_seconds = call_log_status(call_log)
+    
     return jsonify({
         'call_log_id': call_log_id,
-        'status': call_log.status,
+        'status': status,
         'approach': 'native_calling',
         'to_number': call_log.to_number,
         'from_number': call_log.from_number,
-        'duration_seconds': call_log.duration_seconds,
+        'duration_seconds': duration_seconds,
         'created_at': call_log.created_at.isoformat(),
         'native_call_info': {
             'target_number': call_log.to_number,
@@ -300,7 +274,7 @@ def api_call_status(user_id, call_log_id):
 @dialer_bp.route('/api/users/<int:user_id>/calls/<int:call_log_id>/complete', methods=['POST'])
 def api_call_complete(user_id, call_log_id):
     """Update call status when native call completes"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     call_log = MultiUserCallLog.query.filter_by(
         user_id=user_id,
@@ -377,7 +351,7 @@ def api_call_complete(user_id, call_log_id):
 @dialer_bp.route('/api/users/<int:user_id>/calls', methods=['GET'])
 def api_call_history(user_id):
     """API endpoint to get call history for mobile app"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
@@ -401,6 +375,10 @@ def dial_status(user_id):
     """Handle call completion status"""
     dial_status = request.form.get('DialCallStatus')
     
+    call_log = MultiUserCallLog.query.filter_by(twilio_call_sid=request.form.get('CallSid')).first()
+    if call_log and dial_status:
+        publish_call_status(call_log, dial_status, 'dial_status')
+    
     response = VoiceResponse()
     
     if dial_status == 'no-answer':
@@ -418,19 +396,26 @@ def call_status(user_id):
     call_sid = request.form.get('CallSid')
     call_status = request.form.get('CallStatus')
     
-    # Update call log
+    if not call_sid or not call_status:
+        return '', 200
+    
+    # Keep the status store current for pollers; it orders late callbacks
+    entry = status_store.record('call', call_sid, call_status,
+                                duration_seconds=request.form.get('CallDuration', type=int))
+    
+    # Update call log, never moving it backwards
     call_log = MultiUserCallLog.query.filter_by(twilio_call_sid=call_sid).first()
     if call_log:
-        call_log.status = call_status
-        call_log.updated_at = datetime.utcnow()
-        db.session.commit()
+        if advance_call_log(call_log, entry):
+            db.session.commit()
+        publish_call_status(call_log, entry.status, 'dialer')
     
     return '', 200
 
 @dialer_bp.route('/dialer/<int:user_id>/history')
 def call_history(user_id):
     """Get call history for user"""
-    user = MultiUser.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     calls = MultiUserCallLog.query.filter_by(user_id=user_id)\
         .order_by(MultiUserCallLog.created_at.desc())\
@@ -6,7 +6,24 @@ from flask_babel import gettext, ngettext, get_locale
 from werkzeug.security import generate_password_hash, check_password_hash
 from models_multi_user import User, TwilioPhonePool, UserWhitelist, MultiUserCallLog, UserBlocklist, UserFailLog
 from app import db
-from utils.twilio_helpers import twilio_client, generate_voice_access_token
+from utils.twilio_helpers import twilio_client
+from utils.voice_tokens import voice_token_cache
+from utils.db_routing import use_read_replica
+from utils.user_context import load_user, load_user_or_404, session_user
+from utils.phone_numbers import canonical_e164, digits_only as normalize_phone, format_display as format_phone_display
+from utils.contact_sync import sync_contacts, ContactSyncError
+from utils.sync_journal import sync_journal
+from utils.etag import check_not_modified, with_etag, time_bucket
+from sqlalchemy import func, select
+from utils.fast_json import ndjson_response
+from utils.call_history import iter_call_history, call_history_page
+from utils.call_export import call_export_response
+from utils.status_store import call_log_status
+from utils.call_events import call_event_broker, user_channel, call_event, publish_call_status, sse_response
+from utils.pool_status import pool_status_cache
+from utils.number_inventory import allocate_number
+from utils.twilio_helpers import validate_twilio_request
+from sqlalchemy.exc import IntegrityError
 import re
 import uuid
 from datetime import datetime, timedelta
@@ -37,7 +54,7 @@ def set_language(language=None):
         # If user is logged in, update their preferred language
         if session.get('user_id'):
             try:
-                user = User.query.get(session['user_id'])
+                user = session_user()
                 if user:
                     user.preferred_language = language
                     db.session.commit()
@@ -62,7 +79,7 @@ def language_status():
     if 'user_id' in session:
         try:
             from models_multi_user import User
-            user = User.query.get(session['user_id'])
+            user = session_user()
             if user:
                 user_language = user.preferred_language
         except:
@@ -151,7 +168,7 @@ def verify_user_access(requested_user_id):
     
     # Additional verification could be added here
     # e.g., check if user_id matches session user_id
-    user = User.query.get_or_404(requested_user_id)
+    user = load_user_or_404(requested_user_id)
     return user
 
 @multi_user_bp.route('/list')
@@ -162,19 +179,6 @@ def user_list():
                          users=users,
                          format_phone=format_phone_display)
 
-def normalize_phone(phone):
-    """Normalize phone number to digits only"""
-    return re.sub(r'[^\d]', '', phone)
-
-def format_phone_display(phone):
-    """Format phone for display: (555) 123-4567"""
-    digits = normalize_phone(phone)
-    if len(digits) == 10:
-        return f"({digits[0:3]}) {digits[3:6]}-{digits[6:10]}"
-    elif len(digits) == 11 and digits[0] == '1':
-        return f"({digits[1:4]}) {digits[4:7]}-{digits[7:11]}"
-    return phone
-
 @multi_user_bp.route('/dashboard')
 def dashboard_redirect():
     """Redirect to user dashboard based on session"""
@@ -194,7 +198,7 @@ def mobile_signup():
     """Clean mobile-style signup interface"""
     if request.method == 'GET':
         session.clear()  # Clear any old session data
-        available_numbers = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+        available_numbers = pool_status_cache.available()
         return render_template('multi_user/mobile_signup.html', available_numbers=available_numbers)
     
     # Handle POST - create user with same logic as regular signup
@@ -210,7 +214,7 @@ def mobile_signup():
         selected_language = request.form.get('selected_language', 'en').strip().lower()
         
         # Check available numbers for template
-        available_numbers = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+        available_numbers = pool_status_cache.available()
         
         # Helper function to return error (JSON for AJAX, flash+template for regular)
         def return_error(message):
@@ -241,19 +245,14 @@ def mobile_signup():
         if User.query.filter_by(real_phone_number=real_phone_number).first():
             return return_error('Phone number already registered')
         
-        # Assign next available Twilio number from pool with database lock
-        available_number = TwilioPhonePool.query.filter_by(is_assigned=False).with_for_update().first()
+        # Assign the next available Twilio number, local to the user when possible, with database lock
+        available_number = allocate_number(real_phone_number, country)
         if not available_number:
-            # No numbers available - try emergency purchase
-            from utils.phone_provisioning import phone_provisioning
-            logger.warning("Phone pool empty! Attempting emergency purchase...")
-            
-            emergency_number = phone_provisioning.purchase_phone_number()
-            if emergency_number:
-                available_number = emergency_number
-                logger.info(f"Emergency purchase successful: {available_number.phone_number}")
-            else:
-                return return_error('No CallBunker numbers available. Please contact support.')
+            # Never buy inside the request; the job worker tops the pool up
+            from utils.pool_forecast import request_replenishment
+            logger.warning("Phone pool empty! Queueing replenishment...")
+            request_replenishment(force=True)
+            return return_error('No CallBunker numbers available right now. Please try again in a few minutes.')
         
         # Create new user with password hash
         user = User(
@@ -279,18 +278,9 @@ def mobile_signup():
         
         db.session.commit()
         
-        # Check pool threshold and trigger replenishment if needed (async)
-        from utils.phone_provisioning import phone_provisioning
-        pool_status = phone_provisioning.get_pool_status()
-        
-        if pool_status['status'] in ['low', 'critical']:
-            logger.warning(f"Pool {pool_status['status']}: {pool_status['available']} numbers remaining. Triggering replenishment...")
-            # Trigger async replenishment (don't block signup)
-            import threading
-            threading.Thread(
-                target=phone_provisioning.check_and_replenish,
-                daemon=True
-            ).start()
+        # Queue replenishment when inventory is below the signup forecast (don't block signup)
+        from utils.pool_forecast import request_replenishment
+        request_replenishment()
         
         # Set up login session for the new user
         session['user_id'] = user.id
@@ -339,14 +329,7 @@ def signup_success():
     if not defense_number:
         return redirect(url_for('multi_user.mobile_signup'))
     
-    # Format phone number inline instead of importing missing utility
-    formatted_number = defense_number
-    if defense_number:
-        digits = re.sub(r'\\D', '', defense_number)
-        if len(digits) == 11 and digits.startswith('1'):
-            digits = digits[1:]
-        if len(digits) == 10:
-            formatted_number = f'({digits[:3]}) {digits[3:6]}-{digits[6:]}'
+    formatted_number = format_phone_display(defense_number)
     
     return f"""
     <html>
@@ -378,13 +361,7 @@ def show_my_number():
             return "<h1>User Not Found</h1><p>No user found with that email</p>"
         
         # Format phone number for display
-        defense_number = user.assigned_twilio_number
-        if defense_number:
-            digits = re.sub(r'\\D', '', defense_number)
-            if len(digits) == 11 and digits.startswith('1'):
-                digits = digits[1:]
-            if len(digits) == 10:
-                defense_number = f'({digits[:3]}) {digits[3:6]}-{digits[6:]}'
+        defense_number = format_phone_display(user.assigned_twilio_number)
         
         return f"""
         <html>
@@ -409,9 +386,8 @@ def show_my_number():
 def debug_database():
     """Check production database phone pool status"""
     try:
-        total = TwilioPhonePool.query.count()
-        available = TwilioPhonePool.query.filter_by(is_assigned=False).count()
-        assigned = TwilioPhonePool.query.filter_by(is_assigned=True).count()
+        counts = pool_status_cache.snapshot(fresh=True)
+        total, available, assigned = counts['total'], counts['available'], counts['assigned']
         
         all_numbers = TwilioPhonePool.query.all()
         numbers_list = [(n.phone_number, n.is_assigned) for n in all_numbers]
@@ -632,10 +608,12 @@ def quick_signup():
         if existing_user:
             return return_error('Account already exists! Please login instead.')
         
-        # Get available Twilio number
-        available_number = TwilioPhonePool.query.filter_by(is_assigned=False).first()
+        # Get available Twilio number (local to the user when possible)
+        available_number = allocate_number(real_phone_number, country)
         if not available_number:
-            return return_error('No phone numbers available. Contact support.')
+            from utils.pool_forecast import request_replenishment
+            request_replenishment(force=True)
+            return return_error('No phone numbers available right now. Please try again in a few minutes.')
         
         # Create user account
         password_hash = generate_password_hash(password)
@@ -667,6 +645,9 @@ def quick_signup():
         db.session.add(new_user)
         db.session.commit()
         
+        from utils.pool_forecast import request_replenishment
+        request_replenishment()
+        
         # Log the user in immediately
         session['user_id'] = new_user.id
         session['user_email'] = new_user.email
@@ -750,7 +731,7 @@ def reset_database():
         # Delete related data first (to avoid foreign key constraints)
         if user_ids:
             # Clean up related tables
-            from models_multi_user import MultiUserCallLog, UserWhitelist, UserFailLog, UserBlocklist
+            from models_multi_user import MultiUserCallLog, UserWhitelist, UserFailLog, UserBlocklist, SyncChange
             
             # Delete call logs
             for user_id in user_ids:
@@ -758,6 +739,7 @@ def reset_database():
                 UserWhitelist.query.filter_by(user_id=user_id).delete()
                 UserFailLog.query.filter_by(user_id=user_id).delete()
                 UserBlocklist.query.filter_by(user_id=user_id).delete()
+                SyncChange.query.filter_by(user_id=user_id).delete()
         
         # Release all phone numbers
         phone_numbers = TwilioPhonePool.query.all()
@@ -772,6 +754,13 @@ def reset_database():
         # Commit all changes
         db.session.commit()
         
+        # Bulk delete bypasses mapper events, so rebuild the routing table
+        # and drop the deleted users' Voice tokens
+        from utils.routing_table import routing_table
+        routing_table.load()
+        for user_id in user_ids:
+            voice_token_cache.invalidate(user_id)
+        
         return """
         <html>
         <head><title>✅ Database Reset Complete</title></head>
@@ -854,7 +843,7 @@ def signup():
     if request.method == 'GET':
         session.clear()
         # Check available Twilio numbers
-        available_numbers = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+        available_numbers = pool_status_cache.available()
         response = make_response(render_template('multi_user/mobile_signup.html', available_numbers=available_numbers))
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
@@ -870,7 +859,7 @@ def signup():
         password = request.form.get('password', '').strip()
         
         # Check available numbers for template
-        available_numbers = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+        available_numbers = pool_status_cache.available()
         
         # Validation
         if not all([email, name, real_phone_number, password]):
@@ -891,10 +880,12 @@ def signup():
             flash('Phone number already registered', 'error')
             return render_template('multi_user/mobile_signup.html', available_numbers=available_numbers)
         
-        # Get next available Twilio number with database lock to prevent race conditions
-        available_twilio = TwilioPhonePool.query.filter_by(is_assigned=False).with_for_update().first()
+        # Get next available Twilio number (local when possible) with database lock to prevent race conditions
+        available_twilio = allocate_number(real_phone_number)
         if not available_twilio:
-            flash('No CallBunker numbers available. Please contact support.', 'error')
+            from utils.pool_forecast import request_replenishment
+            request_replenishment(force=True)
+            flash('No CallBunker numbers available right now. Please try again in a few minutes.', 'error')
             return render_template('multi_user/mobile_signup.html', available_numbers=0)
         
         # Create new user
@@ -915,8 +906,12 @@ def signup():
         db.session.flush()  # Get user.id without committing
         
         available_twilio.assigned_to_user_id = user.id
+        available_twilio.assigned_at = datetime.utcnow()
         db.session.commit()
         
+        from utils.pool_forecast import request_replenishment
+        request_replenishment()
+        
         flash(f'Account created! Your Defense Number is {format_phone_display(user.assigned_twilio_number)}', 'success')
         
         # Set up login session for the new user
@@ -930,18 +925,19 @@ def signup():
     except Exception as e:
         db.session.rollback()
         flash(f'Registration failed: {str(e)}', 'error')
-        available_numbers = TwilioPhonePool.query.filter_by(is_assigned=False).count()
+        available_numbers = pool_status_cache.available()
         return render_template('multi_user/mobile_signup.html', available_numbers=available_numbers)
 
 @multi_user_bp.route('/user/<int:user_id>/dashboard')
 def dashboard(user_id):
     """Alias for user_dashboard for cleaner URLs"""
-    return user_dashboard(user_id)
+    return user_dashboard(user_id=user_id)
 
 @multi_user_bp.route('/user/<int:user_id>/dashboard')
+@use_read_replica
 def user_dashboard(user_id):
     """Individual user dashboard"""
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     # Get user statistics
     whitelist_count = UserWhitelist.query.filter_by(user_id=user_id).count()
@@ -989,11 +985,15 @@ def add_twilio_number():
 def api_get_user_settings(user_id):
     """Get user settings for mobile app - SECURED"""
     user = verify_user_access(user_id)
+    not_modified = check_not_modified(user.updated_at)
+    if not_modified:
+        return not_modified
+    
     # Get available languages
     from flask import current_app
     available_languages = current_app.config.get('LANGUAGES', {})
     
-    return jsonify({
+    return with_etag(jsonify({
         'pin': user.pin,
         'verbal_code': user.verbal_code,
         'retry_limit': user.retry_limit,
@@ -1005,7 +1005,7 @@ def api_get_user_settings(user_id):
         'preferred_language': user.preferred_language,
         'country': user.country,
         'available_languages': available_languages
-    })
+    }))
 
 @multi_user_bp.route('/user/<int:user_id>/settings', methods=['PUT'])
 def api_update_user_settings(user_id):
@@ -1049,6 +1049,42 @@ def api_update_user_settings(user_id):
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def contact_json(contact):
+    """Mobile app representation of a trusted contact"""
+    return {
+        'id': contact.id,
+        'phone_number': contact.caller_number,
+        'display_name': format_phone_display(contact.caller_number),
+        'custom_pin': contact.custom_pin,
+        'created_at': contact.created_at.isoformat() if contact.created_at else None
+    }
+
+def blocked_json(block, user):
+    """Mobile app representation of a blocked caller"""
+    return {
+        'id': block.id,
+        'phone_number': block.caller_number,
+        'display_name': format_phone_display(block.caller_number),
+        'unblock_at': block.unblock_at.isoformat() if block.unblock_at else None,
+        'blocked_at': (block.unblock_at - timedelta(minutes=user.rl_block_minutes)).isoformat() if block.unblock_at else None
+    }
+
+# Columns the mobile serializers read; list endpoints select only these
+CONTACT_COLUMNS = (UserWhitelist.id, UserWhitelist.caller_number, UserWhitelist.custom_pin, UserWhitelist.created_at)
+CALL_FIELDS = ('id', 'to_number', 'from_number', 'direction', 'status', 'duration_seconds', 'created_at')
+
+def call_json(call):
+    """Mobile app representation of a call history entry"""
+    return {
+        'id': call.id,
+        'to_number': call.to_number,
+        'from_number': call.from_number,
+        'direction': call.direction,
+        'status': call.status,
+        'duration_seconds': call.duration_seconds,
+        'created_at': call.created_at.isoformat() if call.created_at else None
+    }
+
 @multi_user_bp.route('/user/<int:user_id>/blocked', methods=['GET'])
 def api_get_blocked_calls(user_id):
     """Get blocked calls for mobile app - SECURED"""
@@ -1059,17 +1095,7 @@ def api_get_blocked_calls(user_id):
         UserBlocklist.unblock_at > datetime.utcnow()
     ).all()
     
-    blocked_list = []
-    for block in blocked:
-        blocked_list.append({
-            'id': block.id,
-            'phone_number': block.caller_number,
-            'display_name': format_phone_display(block.caller_number),
-            'unblock_at': block.unblock_at.isoformat() if block.unblock_at else None,
-            'blocked_at': (block.unblock_at - timedelta(minutes=user.rl_block_minutes)).isoformat() if block.unblock_at else None
-        })
-    
-    return jsonify(blocked_list)
+    return jsonify([blocked_json(block, user) for block in blocked])
 
 @multi_user_bp.route('/user/<int:user_id>/blocked/<int:block_id>', methods=['DELETE'])
 def api_remove_blocked_call(user_id, block_id):
@@ -1120,10 +1146,22 @@ def api_whitelist_blocked_call(user_id, block_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @multi_user_bp.route('/user/<int:user_id>/analytics', methods=['GET'])
+@use_read_replica
 def api_get_user_analytics(user_id):
     """Get user analytics data for mobile app - SECURED"""
     user = verify_user_access(user_id)
     
+    # Counts move with journaled changes, new auth failures, and time (blocks
+    # lapse, windows slide); the time bucket bounds staleness to a minute
+    not_modified = check_not_modified(
+        user.updated_at,
+        sync_journal.version(db.session, user_id, ('contacts', 'blocked', 'calls')),
+        db.session.query(func.max(UserFailLog.id)).filter(UserFailLog.user_id == user_id).scalar(),
+        time_bucket(60)
+    )
+    if not_modified:
+        return not_modified
+    
     # Get blocked calls count (current blocks)
     blocked_count = UserBlocklist.query.filter(
         UserBlocklist.user_id == user_id,
@@ -1147,7 +1185,7 @@ def api_get_user_analytics(user_id):
         UserFailLog.failure_time >= seven_days_ago
     ).count()
     
-    return jsonify({
+    return with_etag(jsonify({
         'blocked_calls': blocked_count,
         'trusted_contacts': trusted_count,
         'recent_calls': recent_calls,
@@ -1156,7 +1194,7 @@ def api_get_user_analytics(user_id):
         'real_phone_number': format_phone_display(user.real_phone_number),
         'account_status': 'Active' if user.is_active else 'Inactive',
         'twilio_configured': user.twilio_number_configured
-    })
+    }))
 
 # API Endpoints for Mobile App  
 @multi_user_bp.route('/lookup-user', methods=['POST'])
@@ -1179,15 +1217,13 @@ def lookup_user():
 def api_get_contacts(user_id):
     """Get trusted contacts for mobile app - SECURED"""
     user = verify_user_access(user_id)
-    contacts = UserWhitelist.query.filter_by(user_id=user_id).all()
+    not_modified = check_not_modified(sync_journal.version(db.session, user_id, ('contacts',)))
+    if not_modified:
+        return not_modified
     
-    return jsonify([{
-        'id': contact.id,
-        'phone_number': contact.caller_number,
-        'display_name': format_phone_display(contact.caller_number),
-        'custom_pin': contact.custom_pin,
-        'created_at': contact.created_at.isoformat() if contact.created_at else None
-    } for contact in contacts])
+    contacts = db.session.execute(select(*CONTACT_COLUMNS).where(UserWhitelist.user_id == user_id))
+    
+    return with_etag(jsonify([contact_json(contact) for contact in contacts]))
 
 @multi_user_bp.route('/user/<int:user_id>/contacts', methods=['POST'])
 def api_add_contact(user_id):
@@ -1198,10 +1234,10 @@ def api_add_contact(user_id):
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
-        phone_number = normalize_phone(data.get('phone_number', ''))
+        phone_number = canonical_e164(data.get('phone_number', ''), user.country)
         custom_pin = data.get('custom_pin', '').strip()
         
-        if len(phone_number) < 10:
+        if len(normalize_phone(phone_number)) < 10:
             return jsonify({'error': 'Invalid phone number'}), 400
         
         # Check if already exists
@@ -1232,6 +1268,45 @@ def api_add_contact(user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@multi_user_bp.route('/user/<int:user_id>/contacts/sync', methods=['POST'])
+def api_sync_contacts(user_id):
+    """
+    Bulk sync trusted contacts for mobile app - SECURED
+    Body: {"mode": "full"|"partial", "contacts": [{"phone_number", "custom_pin", "allows_verbal"}], "remove": [...]}
+    Full mode replaces the whitelist with the given contacts; partial mode upserts them and deletes "remove".
+    """
+    user = verify_user_access(user_id)
+
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+        mode = data.get('mode', 'partial')
+        if mode not in ('full', 'partial'):
+            return jsonify({'error': "mode must be 'full' or 'partial'"}), 400
+
+        summary = sync_contacts(
+            user_id,
+            data.get('contacts', []),
+            full=(mode == 'full'),
+            remove=data.get('remove', []) if mode == 'partial' else (),
+            country=user.country
+        )
+        db.session.commit()
+
+        return jsonify(dict(summary, success=True))
+
+    except ContactSyncError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        # Another request added one of these numbers mid-sync
+        db.session.rollback()
+        return jsonify({'error': 'Contacts changed during sync, please retry'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @multi_user_bp.route('/user/<int:user_id>/contacts/<int:contact_id>', methods=['DELETE'])
 def api_delete_contact(user_id, contact_id):
     """Delete trusted contact for mobile app - SECURED"""
@@ -1248,28 +1323,138 @@ def api_delete_contact(user_id, contact_id):
         return jsonify({'error': str(e)}), 500
 
 @multi_user_bp.route('/user/<int:user_id>/calls', methods=['GET'])
+@use_read_replica
 def api_get_calls(user_id):
     """Get call history for mobile app - SECURED"""
     user = verify_user_access(user_id)
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
     
-    # Get actual call logs from database
-    calls = MultiUserCallLog.query.filter_by(user_id=user_id).order_by(MultiUserCallLog.created_at.desc()).limit(limit).offset(offset).all()
-    
-    call_list = []
-    for call in calls:
-        call_list.append({
-            'id': call.id,
-            'to_number': call.to_number,
-            'from_number': call.from_number,
-            'direction': call.direction,
-            'status': call.status,
-            'duration_seconds': call.duration_seconds,
-            'created_at': call.created_at.isoformat() if call.created_at else None
-        })
+    # Pages continue from the hot table into archived months
+    # Large histories: ?format=ndjson streams rows instead of buffering one array
+    if request.args.get('format') == 'ndjson':
+        limit = request.args.get('limit', None, type=int)  # Whole history unless capped
+        return ndjson_response(iter_call_history(user_id, offset, limit, CALL_FIELDS), call_json)
+    
+    calls = call_history_page(user_id, limit, offset, CALL_FIELDS)
     
-    return jsonify(call_list)
+    return jsonify([call_json(call) for call in calls])
+
+@multi_user_bp.route('/user/<int:user_id>/calls/export', methods=['GET'])
+@use_read_replica
+def api_export_calls(user_id):
+    """
+    Full call history export - SECURED
+    Streams every call, oldest first, with its latest quality metrics as
+    ?format=csv (default) or ndjson. To resume an interrupted download,
+    pass ?after=<id of the last row received>.
+    """
+    verify_user_access(user_id)
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    after = request.args.get('after', 0, type=int)
+    
+    return call_export_response(user_id, export_format, after)
+
+@multi_user_bp.route('/user/<int:user_id>/calls/events', methods=['GET'])
+def api_call_events(user_id):
+    """
+    Live call status stream for mobile app - SECURED
+    Server-sent events: one call_status event per state change of the user's
+    calls, pushed as Twilio callbacks arrive. ?call_id= narrows the stream to
+    one call and starts it with that call's current state. Replaces polling
+    /calls/<call_id>/status while a call is being set up.
+    """
+    verify_user_access(user_id)
+    call_id = request.args.get('call_id', type=int)
+    
+    # Subscribe before reading the snapshot so no transition falls in between
+    subscription = call_event_broker.subscribe(user_channel(user_id))
+    initial = []
+    if call_id is not None:
+        call_log = MultiUserCallLog.query.filter_by(id=call_id, user_id=user_id).first()
+        if call_log is None:
+            subscription.close()
+            return jsonify({'error': 'Call not found'}), 404
+        status, _ = call_log_status(call_log)
+        initial.append(('call_status', call_event(call_log, status, 'snapshot')))
+    
+    return sse_response(subscription, initial, call_id)
+
+@multi_user_bp.route('/user/<int:user_id>/sync', methods=['GET'])
+def api_delta_sync(user_id):
+    """
+    Delta sync for mobile app - SECURED
+    Returns contacts, blocked callers and calls changed after ?since=<cursor> as
+    upserts plus tombstones (deleted ids). Without a cursor, or when the cursor
+    is older than the journal, returns full_resync with complete lists that
+    replace the client's copy. Store the returned cursor; repeat while has_more.
+    Blocked entries lapse client-side once their unblock_at passes.
+    """
+    user = verify_user_access(user_id)
+    since = request.args.get('since', 0, type=int)
+    requested = request.args.get('resources')
+    resources = [r for r in requested.split(',') if r in sync_journal.resources] if requested else list(sync_journal.resources)
+    if not resources:
+        return jsonify({'error': f"resources must be among: {', '.join(sync_journal.resources)}"}), 400
+
+    try:
+        now = datetime.utcnow()
+        upserts = {resource: [] for resource in resources}
+        deleted = {resource: [] for resource in resources}
+
+        full_resync = since <= 0 or sync_journal.cursor_expired(db.session, since)
+        if full_resync:
+            # Take the cursor first: anything committed after it is sent again next time
+            cursor = sync_journal.settled_cursor(db.session)
+            has_more = False
+            if 'contacts' in upserts:
+                upserts['contacts'] = [contact_json(c) for c in UserWhitelist.query.filter_by(user_id=user_id)]
+            if 'blocked' in upserts:
+                upserts['blocked'] = [blocked_json(b, user) for b in UserBlocklist.query.filter(
+                    UserBlocklist.user_id == user_id, UserBlocklist.unblock_at > now)]
+            if 'calls' in upserts:
+                limit = request.args.get('limit', 50, type=int)
+                upserts['calls'] = [call_json(c) for c in MultiUserCallLog.query.filter_by(user_id=user_id).order_by(
+                    MultiUserCallLog.created_at.desc()).limit(limit)]
+        else:
+            changes, cursor, has_more = sync_journal.changes_since(db.session, user_id, since, resources)
+            models = {'contacts': UserWhitelist, 'blocked': UserBlocklist, 'calls': MultiUserCallLog}
+            for resource, ops in changes.items():
+                ids = [row_id for row_id, op in ops.items() if op == 'upsert']
+                deleted[resource] = sorted(row_id for row_id, op in ops.items() if op == 'delete')
+                if not ids:
+                    continue
+
+                model = models[resource]
+                rows = {row.id: row for row in model.query.filter(model.user_id == user_id, model.id.in_(ids))}
+                for row_id in ids:
+                    row = rows.get(row_id)
+                    if row is None or (resource == 'blocked' and row.unblock_at <= now):
+                        # Deleted by a later change, or the block has lapsed
+                        deleted[resource].append(row_id)
+                    elif resource == 'contacts':
+                        upserts[resource].append(contact_json(row))
+                    elif resource == 'blocked':
+                        upserts[resource].append(blocked_json(row, user))
+                    else:
+                        upserts[resource].append(call_json(row))
+
+        sync_journal.maybe_prune(db.session)
+
+        return jsonify({
+            'success': True,
+            'cursor': cursor,
+            'full_resync': full_resync,
+            'has_more': has_more,
+            'upserts': upserts,
+            'deleted': deleted
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @multi_user_bp.route('/user/<int:user_id>/calls/<int:call_id>/complete', methods=['POST'])
 def api_complete_call(user_id, call_id):
@@ -1307,14 +1492,16 @@ def api_get_call_status(user_id, call_id):
     
     try:
         call_log = MultiUserCallLog.query.filter_by(id=call_id, user_id=user_id).first_or_404()
+        # Live state comes from the status store, not a Twilio fetch per poll
+        status, duration_seconds = call_log_status(call_log)
         
         return jsonify({
             'call_id': call_log.id,
-            'status': call_log.status,
+            'status': status,
             'to_number': call_log.to_number,
             'from_number': call_log.from_number,
             'direction': call_log.direction,
-            'duration_seconds': call_log.duration_seconds,
+            'duration_seconds': duration_seconds,
             'created_at': call_log.created_at.isoformat() if call_log.created_at else None
         })
         
@@ -1377,6 +1564,8 @@ def handle_conference_call(conference_name):
     This is the TwiML endpoint that both call legs hit
     """
     participant = request.args.get('participant', 'unknown')
+    # Conference progress is pushed to the caller's live event stream
+    events_url = url_for('multi_user.conference_events', conference_name=conference_name, _external=True)
     
     vr = VoiceResponse()
     
@@ -1387,6 +1576,8 @@ def handle_conference_call(conference_name):
             conference_name,
             start_conference_on_enter=True,
             end_conference_on_exit=False,
+            status_callback=events_url,
+            status_callback_event='start end join leave',
             wait_url="http://twimlets.com/holdmusic?Bucket=com.twilio.music.ambient"
         )
     elif participant == 'user':
@@ -1397,6 +1588,8 @@ def handle_conference_call(conference_name):
             conference_name,
             start_conference_on_enter=True,
             end_conference_on_exit=True,  # End when user hangs up
+            status_callback=events_url,
+            status_callback_event='start end join leave',
             wait_url="http://twimlets.com/holdmusic?Bucket=com.twilio.music.ambient"
         )
     elif participant == 'mobile_app':
@@ -1406,6 +1599,8 @@ def handle_conference_call(conference_name):
             conference_name,
             start_conference_on_enter=True,
             end_conference_on_exit=True,  # End when mobile app disconnects
+            status_callback=events_url,
+            status_callback_event='start end join leave',
             wait_url=""  # No hold music for mobile app
         )
     else:
@@ -1414,6 +1609,16 @@ def handle_conference_call(conference_name):
     
     return xml_response(vr)
 
+@multi_user_bp.route('/voice/conference/<conference_name>/events', methods=['POST'])
+@validate_twilio_request
+def conference_events(conference_name):
+    """Conference statusCallback: push joins, leaves, start and end to the caller's event stream"""
+    event = request.form.get('StatusCallbackEvent')
+    call_log = MultiUserCallLog.query.filter_by(conference_name=conference_name).first()
+    if event and call_log:
+        publish_call_status(call_log, event, 'conference', participant_call_sid=request.form.get('CallSid'))
+    return '', 204
+
 def xml_response(voice_response):
     """Helper to return proper TwiML XML response"""
     response = Response(str(voice_response), mimetype='application/xml')
@@ -1425,7 +1630,7 @@ def api_call_direct(user_id):
     TRUE NO-CALLBACK CALLING - User speaks through web/mobile, only target phone rings
     Uses Twilio Voice SDK for direct calling without callback
     """
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     data = request.get_json()
     
     try:
@@ -1433,15 +1638,8 @@ def api_call_direct(user_id):
         if not to_number:
             return jsonify({'error': 'to_number is required'}), 400
         
-        # Normalize phone numbers  
-        import re
-        digits = re.sub(r'\\D', '', to_number)
-        if len(digits) == 10:
-            to_number_normalized = '+1' + digits
-        elif len(digits) == 11 and digits.startswith('1'):
-            to_number_normalized = '+' + digits
-        else:
-            to_number_normalized = to_number
+        # Normalize phone numbers
+        to_number_normalized = canonical_e164(to_number, user.country)
         # Use assigned Twilio number for CallBunker Voice SDK calling
         caller_id_number = user.assigned_twilio_number
         
@@ -1511,38 +1709,26 @@ def get_voice_token(user_id):
     """
     Generate Twilio Voice Access Token for direct calling through web/mobile
     """
+    user = verify_user_access(user_id)
+    if not user.is_active:
+        return jsonify({'error': 'Account is inactive'}), 403
+    
     try:
-        from twilio.jwt.access_token import AccessToken
-        from twilio.jwt.access_token.grants import VoiceGrant
-        
-        user = User.query.get_or_404(user_id)
-        
-        # Use your Twilio credentials
-        account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
-        api_key = os.environ.get('TWILIO_API_KEY')
-        api_secret = os.environ.get('TWILIO_API_SECRET')
-        app_sid = os.environ.get('TWIML_APP_SID')
-        
         # Create a TwiML App URL for device outbound calls
         public_url = os.environ.get('PUBLIC_APP_URL')
         if not public_url:
             return jsonify({'error': 'PUBLIC_APP_URL not configured'}), 500
             
-        # Create an Access Token with proper caller ID
-        token = AccessToken(account_sid, api_key, api_secret, identity=f"user_{user_id}")
-        
-        # Create a Voice grant with outbound TwiML app
-        voice_grant = VoiceGrant(
-            outgoing_application_sid=app_sid,
-            incoming_allow=True
-        )
-        token.add_grant(voice_grant)
+        # Reuse this user's token until it nears expiry
+        voice_token = voice_token_cache.get(user_id)
         
         return jsonify({
             'success': True,
-            'token': token.to_jwt(),
-            'identity': f"user_{user_id}",
-            'caller_id': user.assigned_twilio_number
+            'token': voice_token.token,
+            'identity': voice_token.identity,
+            'caller_id': user.assigned_twilio_number,
+            'expires_in': voice_token.expires_in,
+            'expires_at': datetime.utcfromtimestamp(voice_token.expires_at).isoformat() + 'Z'
         })
         
     except Exception as e:
@@ -1554,7 +1740,7 @@ def api_call_bridge(user_id):
     BRIDGE CALLING (OLD) - Both phones ring with hold music
     Creates a Twilio conference call bridging user and target
     """
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     data = request.get_json()
     
     try:
@@ -1583,7 +1769,9 @@ def api_call_bridge(user_id):
             to=to_number_normalized,
             from_=caller_id_number,  # Target sees your assigned CallBunker number!
             url=f"{public_url}/multi/voice/conference/{conference_name}?participant=target",
-            method='POST'
+            method='POST',
+            status_callback=f"{public_url}/status/calls",
+            status_callback_event=['initiated', 'ringing', 'answered', 'completed']
         )
         
         # Call 2: Call the user
@@ -1645,6 +1833,8 @@ def api_call_mobile_app(user_id):
     Only calls target, mobile app connects via Twilio Voice SDK (no callback to user's phone!)
     """
     user = verify_user_access(user_id)
+    if not user.is_active:
+        return jsonify({'error': 'Account is inactive'}), 403
     data = request.get_json()
     
     try:
@@ -1664,15 +1854,17 @@ def api_call_mobile_app(user_id):
         client = twilio_client()
         public_url = os.environ.get('PUBLIC_APP_URL', 'https://4ec224cf-933c-4ca6-b58f-2fce3ea2d59f-00-23vazcc99oamt.janeway.replit.dev')
         
-        # Generate Voice Access Token for mobile app
-        access_token = generate_voice_access_token(user_id)
+        # Voice Access Token for mobile app (cached until it nears expiry)
+        voice_token = voice_token_cache.get(user_id)
         
         # Call ONLY the target number (no callback to user's phone!)
         target_call = client.calls.create(
             to=to_number_normalized,
             from_=user.assigned_twilio_number,  # Use assigned Twilio number as caller ID
             url=f"{public_url}/multi/voice/conference/{conference_name}?participant=target",
-            method='POST'
+            method='POST',
+            status_callback=f"{public_url}/status/calls",
+            status_callback_event=['initiated', 'ringing', 'answered', 'completed']
         )
         
         # Create call log entry
@@ -1697,7 +1889,8 @@ def api_call_mobile_app(user_id):
             'to_number': to_number_normalized,
             'from_number': user.assigned_twilio_number,
             'target_call_sid': target_call.sid,
-            'access_token': access_token,
+            'access_token': voice_token.token,
+            'access_token_expires_in': voice_token.expires_in,
             'mobile_config': {
                 'target_sees': user.assigned_twilio_number,
                 'no_callback': True,
@@ -1721,15 +1914,18 @@ def api_call_mobile_app(user_id):
 def get_voice_access_token(user_id):
     """Get Twilio Voice Access Token for mobile app"""
     user = verify_user_access(user_id)
+    if not user.is_active:
+        return jsonify({'error': 'Account is inactive'}), 403
     
     try:
-        access_token = generate_voice_access_token(user_id)
+        voice_token = voice_token_cache.get(user_id)
         
         return jsonify({
             'success': True,
-            'access_token': access_token,
-            'identity': f'callbunker_user_{user_id}',
-            'expires_in': 3600,  # 1 hour
+            'access_token': voice_token.token,
+            'identity': voice_token.identity,
+            'expires_in': voice_token.expires_in,  # Seconds left; request a new token before this runs out
+            'expires_at': datetime.utcfromtimestamp(voice_token.expires_at).isoformat() + 'Z',
             'usage': 'Use this token to initialize Twilio Voice SDK in mobile app'
         })
         
@@ -1764,21 +1960,17 @@ def voice_sdk_outbound():
             return Response('<Response><Say>Invalid caller identity format</Say></Response>', mimetype='application/xml')
         
         user_id = int(caller_identity.replace('callbunker_user_', ''))
-        user = User.query.get(user_id)
+        user = load_user(user_id)
         
         if not user or not user.assigned_twilio_number:
             return Response('<Response><Say>User not found or no assigned number</Say></Response>', mimetype='application/xml')
         
+        # Tokens already handed out stay valid until they expire
+        if not user.is_active:
+            return Response('<Response><Say>This account is currently inactive</Say></Response>', mimetype='application/xml')
+        
         # Normalize the destination number
-        def normalize_phone_number(phone_number):
-            digits = re.sub(r'\D', '', phone_number)
-            if len(digits) == 10:
-                return '+1' + digits
-            elif len(digits) == 11 and digits.startswith('1'):
-                return '+' + digits
-            return phone_number
-        
-        to_number_normalized = normalize_phone_number(to_number)
+        to_number_normalized = canonical_e164(to_number, user.country)
         
         # Create TwiML response to dial the target number using user's CallBunker number as caller ID
         vr = VoiceResponse()
@@ -3,9 +3,13 @@ CallBunker Voice Handling - Each user has their own Twilio number
 """
 from flask import Blueprint, request
 from twilio.twiml.voice_response import VoiceResponse, Gather
-from models_multi_user import User, UserWhitelist, UserFailLog, UserBlocklist
-from routes.multi_user import get_user_by_twilio_number, normalize_phone
+from models_multi_user import UserWhitelist, UserFailLog, UserBlocklist
+from routes.multi_user import normalize_phone
+from utils.routing_table import routing_table
+from utils.phone_numbers import canonical_e164
+from utils.block_filter import block_filter, USER_BLOCKS
 from utils.twilio_helpers import xml_response
+from utils.user_context import load_user_or_404
 from urllib.parse import quote
 from datetime import datetime, timedelta
 from app import db
@@ -21,6 +25,10 @@ def normalize_speech(speech_text):
 
 def is_user_blocked(user, caller_number):
     """Check if caller is temporarily blocked for this user"""
+    # Most callers are not blocked: skip the query when the filter says so
+    if not block_filter.might_be_blocked(USER_BLOCKS, user.id, caller_number):
+        return None
+    
     blocked = UserBlocklist.query.filter_by(
         user_id=user.id,
         caller_number=caller_number
@@ -83,21 +91,26 @@ def note_failure_and_maybe_block(user, caller_number):
     if recent_failures >= user.rl_max_attempts:
         unblock_time = datetime.utcnow() + timedelta(minutes=user.rl_block_minutes)
         
-        # Remove existing block and add new one
-        UserBlocklist.query.filter_by(
+        # Extend an existing block or add a new one (through the ORM so the sync journal sees it)
+        block = UserBlocklist.query.filter_by(
             user_id=user.id,
             caller_number=caller_number
-        ).delete()
-        
-        block = UserBlocklist(
-            user_id=user.id,
-            caller_number=caller_number,
-            unblock_at=unblock_time
-        )
-        db.session.add(block)
+        ).first()
+        if block:
+            block.unblock_at = unblock_time
+        else:
+            block = UserBlocklist(
+                user_id=user.id,
+                caller_number=caller_number,
+                unblock_at=unblock_time
+            )
+            db.session.add(block)
         print(f"Blocked caller {caller_number} for user {user.id} until {unblock_time}")
     
     db.session.commit()
+    
+    if recent_failures >= user.rl_max_attempts:
+        block_filter.add(USER_BLOCKS, user.id, caller_number)
 
 def clear_failures(user, caller_number):
     """Clear authentication failures for successful caller"""
@@ -106,12 +119,14 @@ def clear_failures(user, caller_number):
         caller_number=caller_number
     ).delete()
     
-    UserBlocklist.query.filter_by(
-        user_id=user.id,
-        caller_number=caller_number
-    ).delete()
-    
+    # Whitelisted callers are almost never blocked: skip the lookup when the filter says so.
+    # Otherwise delete blocks through the ORM so delta sync journals the tombstones
+    if block_filter.might_be_blocked(USER_BLOCKS, user.id, caller_number):
+        for block in UserBlocklist.query.filter_by(user_id=user.id, caller_number=caller_number):
+            db.session.delete(block)
+
     db.session.commit()
+    block_filter.discard(USER_BLOCKS, user.id, caller_number)
 
 @multi_user_voice_bp.route('/incoming/<phone_number>', methods=['POST'])
 def voice_incoming(phone_number):
@@ -121,8 +136,16 @@ def voice_incoming(phone_number):
     
     print(f"MULTI-USER INCOMING CALL to {twilio_number} - Form data: {dict(request.form)}")
     
-    # Find the user assigned to this Twilio number
-    user = get_user_by_twilio_number(twilio_number)
+    return handle_incoming_call(twilio_number)
+
+def handle_incoming_call(twilio_number, user=None):
+    """
+    Screen an incoming call to a user's Twilio number and return TwiML.
+    Also called in-process by /voice/incoming, which passes the user it already resolved.
+    """
+    # Find the user assigned to this Twilio number (in-memory routing table)
+    if user is None:
+        user = routing_table.lookup(twilio_number)
     if not user:
         print(f"No user found for Twilio number {twilio_number}")
         vr = VoiceResponse()
@@ -140,8 +163,9 @@ def voice_incoming(phone_number):
     from_number = request.form.get("From", "").strip()
     forwarded_from = request.form.get("ForwardedFrom", "").strip()
     caller_digits = normalize_phone(from_number)
+    caller_number = canonical_e164(from_number)  # Stored form for whitelist/blocklist lookups
     
-    print(f"User: {user.name} ({user.id}), From: {from_number}, ForwardedFrom: {forwarded_from}")
+    print(f"User: {user.id}, From: {from_number}, ForwardedFrom: {forwarded_from}")
     
     # CHECK FOR GOOGLE VOICE OTP VERIFICATION CALLS
     google_voice_verification_numbers = [
@@ -159,10 +183,10 @@ def voice_incoming(phone_number):
     # Multi-user system uses direct Twilio numbers, not Google Voice forwarding
     if not forwarded_from:
         # Direct call to user's assigned Twilio number - proceed with authentication
-        print(f"Direct call to user {user.id}'s Twilio number {user.assigned_twilio_number} - performing authentication")
+        print(f"Direct call to user {user.id}'s Twilio number {twilio_number} - performing authentication")
     
     # Check if caller is blocked
-    block_remaining = is_user_blocked(user, caller_digits)
+    block_remaining = is_user_blocked(user, caller_number)
     if block_remaining is not None:
         vr = VoiceResponse()
         vr.say(f"Sorry, this number is temporarily blocked for {block_remaining} more minutes due to repeated failed attempts. Goodbye.", voice="polly.Joanna")
@@ -170,13 +194,13 @@ def voice_incoming(phone_number):
         return xml_response(vr)
     
     # Check if caller is whitelisted
-    if is_caller_whitelisted(user, caller_digits):
-        print(f"WHITELISTED CALLER: {caller_digits} calling user {user.id} - bypassing authentication")
-        clear_failures(user, caller_digits)
+    if is_caller_whitelisted(user, caller_number):
+        print(f"WHITELISTED CALLER: {caller_number} calling user {user.id} - bypassing authentication")
+        clear_failures(user, caller_number)
         return connect_call(user, from_number)
     
     # Require authentication
-    print(f"AUTHENTICATION REQUIRED for caller {caller_digits} to user {user.id}")
+    print(f"AUTHENTICATION REQUIRED for caller {caller_number} to user {user.id}")
     vr = VoiceResponse()
     vr.pause(length=1)
     
@@ -200,17 +224,17 @@ def voice_incoming(phone_number):
 @multi_user_voice_bp.route('/verify/<int:user_id>/<int:attempts>', methods=['POST'])
 def verify_auth(user_id, attempts):
     """Verify PIN or verbal authentication for specific user"""
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     from_number = request.form.get("From", "").strip()
-    caller_digits = normalize_phone(from_number)
+    caller_number = canonical_e164(from_number)
     pressed = request.form.get("Digits")
     speech = request.form.get("SpeechResult")
     
     print(f"VERIFY AUTH for user {user.id}: PIN={pressed}, Speech={speech}, Attempt={attempts}")
     
     # Check if caller is blocked
-    block_remaining = is_user_blocked(user, caller_digits)
+    block_remaining = is_user_blocked(user, caller_number)
     if block_remaining is not None:
         vr = VoiceResponse()
         vr.say("Sorry, this number is now blocked. Goodbye.", voice="polly.Joanna")
@@ -219,8 +243,8 @@ def verify_auth(user_id, attempts):
     
     # Verify PIN
     if pressed and len(pressed) == 4 and pressed == user.pin:
-        clear_failures(user, caller_digits)
-        auto_whitelist_caller(user, caller_digits, pressed if pressed != user.pin else None)
+        clear_failures(user, caller_number)
+        auto_whitelist_caller(user, caller_number, pressed if pressed != user.pin else None)
         return connect_call(user, from_number)
     
     # Verify verbal code
@@ -229,12 +253,12 @@ def verify_auth(user_id, attempts):
         expected = normalize_speech(user.verbal_code)
         
         if said == expected:
-            clear_failures(user, caller_digits)
-            auto_whitelist_caller(user, caller_digits)
+            clear_failures(user, caller_number)
+            auto_whitelist_caller(user, caller_number)
             return connect_call(user, from_number)
     
     # Authentication failed
-    note_failure_and_maybe_block(user, caller_digits)
+    note_failure_and_maybe_block(user, caller_number)
     
     # Check retry limit
     next_attempts = attempts + 1
@@ -5,8 +5,12 @@ Monitor and manage phone number provisioning
 from flask import Blueprint, render_template, jsonify, request, flash, redirect, url_for, session
 from models_multi_user import TwilioPhonePool, User
 from utils.phone_provisioning import phone_provisioning
+from utils.caller_id_registry import caller_id_registry
+from utils.maintenance_jobs import job_queue
+from utils.pool_forecast import pool_forecaster
 from app import db
 from datetime import datetime
+from sqlalchemy import select
 from functools import wraps
 import logging
 import os
@@ -88,8 +92,15 @@ def dashboard():
 def api_status():
     """Get pool status as JSON"""
     pool_status = phone_provisioning.get_pool_status()
+    pool_status['target'] = pool_forecaster.target()
     return jsonify(pool_status)
 
+@phone_admin_bp.route('/api/forecast')
+@require_admin_auth
+def api_forecast():
+    """Full replenishment plan (signup windows, caps); runs the forecast queries"""
+    return jsonify(pool_forecaster.plan())
+
 @phone_admin_bp.route('/api/purchase', methods=['POST'])
 @require_admin_auth
 def api_purchase():
@@ -138,11 +149,33 @@ def api_configure_webhooks():
         logger.error(f"Webhook configuration failed: {e}")
         return jsonify({'error': str(e)}), 500
 
+@phone_admin_bp.route('/api/caller-ids')
+@require_admin_auth
+def api_caller_ids():
+    """Get the cached verified caller IDs"""
+    return jsonify(caller_id_registry.status())
+
+@phone_admin_bp.route('/api/caller-ids/refresh', methods=['POST'])
+@require_admin_auth
+def api_refresh_caller_ids():
+    """Refresh verified caller IDs from Twilio now (e.g. after verifying a number)"""
+    try:
+        caller_id_registry.refresh()
+        return jsonify({'success': True, **caller_id_registry.status()})
+    except Exception as e:
+        logger.error(f"Caller ID refresh failed: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @phone_admin_bp.route('/api/numbers')
 @require_admin_auth
 def api_numbers():
     """Get all phone numbers in pool"""
-    numbers = TwilioPhonePool.query.order_by(TwilioPhonePool.created_at.desc()).all()
+    numbers = db.session.execute(
+        select(TwilioPhonePool.id, TwilioPhonePool.phone_number, TwilioPhonePool.is_assigned,
+               TwilioPhonePool.assigned_to_user_id, TwilioPhonePool.webhook_configured,
+               TwilioPhonePool.created_at, TwilioPhonePool.assigned_at)
+        .order_by(TwilioPhonePool.created_at.desc())
+    )
     
     return jsonify([
         {
@@ -169,16 +202,20 @@ def cron_auto_replenish():
     - UptimeRobot monitoring
     
     Example cron schedule: Call every 4 hours
+    
+    Queues a replenish_pool job for job_worker.py instead of purchasing
+    inline; a job already pending is reused.
     """
     try:
         logger.info("Automatic replenishment cron job triggered")
         
-        result = phone_provisioning.check_and_replenish()
+        job_id = job_queue.enqueue('replenish_pool')
         
         response = {
             'success': True,
             'timestamp': datetime.utcnow().isoformat(),
-            'result': result
+            'queued': job_id is not None,
+            'job_id': job_id
         }
         
         logger.info(f"Cron job completed: {response}")
@@ -0,0 +1,79 @@
+"""
+CallBunker Status Callback Routes
+Twilio message and call status callbacks feeding the local status store
+"""
+import logging
+from email.utils import parsedate_to_datetime
+from flask import Blueprint, request
+from app import db
+from models_multi_user import MultiUserCallLog
+from utils.status_store import status_store, advance_call_log, TERMINAL_STATUSES
+from utils.twilio_helpers import validate_twilio_request
+from utils.call_events import publish_call_status
+
+logger = logging.getLogger(__name__)
+
+status_callbacks_bp = Blueprint('status_callbacks', __name__)
+
+def _int_param(name):
+    value = request.form.get(name)
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+def _timestamp_param(name):
+    """Twilio sends callback timestamps as RFC 2822 dates"""
+    value = request.form.get(name)
+    try:
+        return parsedate_to_datetime(value).replace(tzinfo=None) if value else None
+    except (TypeError, ValueError):
+        return None
+
+@status_callbacks_bp.route('/messages', methods=['POST'])
+@validate_twilio_request
+def message_status_callback():
+    """StatusCallback for outgoing SMS"""
+    sid = request.form.get('MessageSid')
+    status = request.form.get('MessageStatus')
+    if not sid or not status:
+        return 'Missing MessageSid or MessageStatus', 400
+
+    status_store.record(
+        'message', sid, status,
+        error_code=_int_param('ErrorCode'),
+        error_message=request.form.get('ErrorMessage'),
+        from_number=request.form.get('From'),
+        to_number=request.form.get('To'),
+    )
+    return '', 204
+
+@status_callbacks_bp.route('/calls', methods=['POST'])
+@validate_twilio_request
+def call_status_callback():
+    """StatusCallback for outgoing calls; also keeps the matching call log current"""
+    sid = request.form.get('CallSid')
+    status = request.form.get('CallStatus')
+    if not sid or not status:
+        return 'Missing CallSid or CallStatus', 400
+
+    duration = _int_param('CallDuration')
+    timestamp = _timestamp_param('Timestamp')
+    ended = status in TERMINAL_STATUSES['call']
+
+    entry = status_store.record(
+        'call', sid, status,
+        duration_seconds=duration,
+        from_number=request.form.get('From'),
+        to_number=request.form.get('To'),
+        started_at=timestamp if status == 'in-progress' else None,
+        ended_at=timestamp if ended else None,
+    )
+
+    # The store has already ordered this against earlier callbacks
+    call_log = MultiUserCallLog.query.filter_by(twilio_call_sid=sid).first()
+    if call_log:
+        if advance_call_log(call_log, entry):
+            db.session.commit()
+        publish_call_status(call_log, entry.status, 'status_callback')
+    return '', 204
@@ -1,28 +1,17 @@
 from flask import Blueprint, render_template, request, session, redirect, url_for, flash, jsonify
 from app import db
 from models import Tenant
-from models_multi_user import User
-import re
+from utils.phone_numbers import format_display as format_phone_display
+from utils.user_context import load_user, load_user_or_404
 
 tutorial_bp = Blueprint('tutorial', __name__)
 
-def format_phone_display(phone):
-    """Format phone for display: (555) 123-4567"""
-    if not phone:
-        return phone
-    digits = re.sub(r'[^\d]', '', phone)
-    if len(digits) == 10:
-        return f"({digits[0:3]}) {digits[3:6]}-{digits[6:10]}"
-    elif len(digits) == 11 and digits[0] == '1':
-        return f"({digits[1:4]}) {digits[4:7]}-{digits[7:11]}"
-    return phone
-
 
 
 @tutorial_bp.route('/multi-user/<int:user_id>')
 def multi_user_tutorial(user_id):
     """Interactive tutorial for CallBunker system"""
-    user = User.query.get_or_404(user_id)
+    user = load_user_or_404(user_id)
     
     return render_template('tutorial/multi_user.html', 
                          user=user,
@@ -57,7 +46,7 @@ def initiate_test_call():
         if not user_id:
             return jsonify({'success': False, 'error': 'User ID required'})
             
-        user = User.query.get(user_id)
+        user = load_user(user_id)
         if not user:
             return jsonify({'success': False, 'error': 'User not found'})
         
@@ -1,3 +1,4 @@
+import os
 import re
 from datetime import datetime
 from urllib.parse import quote
@@ -8,77 +9,51 @@ from models import Tenant, Whitelist
 from utils.twilio_helpers import xml_response, get_tenant_or_404, get_tenant_by_real_number
 from utils.rate_limiting import is_blocked, note_failure_and_maybe_block, clear_failures
 from utils.auth import norm_digits, norm_speech
+from utils.phone_numbers import canonical_e164
 
 voice_bp = Blueprint('voice', __name__)
 
+# Hand multi-user calls to the multi-user handler in-process (0 restores the TwiML <Redirect> hop)
+INPROCESS_DISPATCH = os.environ.get("VOICE_INPROCESS_DISPATCH", "1") == "1"
+
 def caller_expected_pin(tenant, caller_digits):
     """Get the expected PIN for a caller - either custom or tenant default"""
-    normalized_caller = norm_digits(caller_digits)
-    
-    # First try the normalized format (without +)
     whitelist_entry = Whitelist.query.filter_by(
         screening_number=tenant.screening_number,
-        number=normalized_caller
-    ).filter(Whitelist.pin.isnot(None)).first()
-    
-    # If not found, try the original format (with +) for legacy data
-    if not whitelist_entry:
-        whitelist_entry = Whitelist.query.filter_by(
-            screening_number=tenant.screening_number,
-            number=f"+{normalized_caller}"
-        ).filter(Whitelist.pin.isnot(None)).first()
+        number=canonical_e164(caller_digits)
+    ).first()
     
-    return whitelist_entry.pin if whitelist_entry else tenant.current_pin
+    if whitelist_entry and whitelist_entry.pin:
+        return whitelist_entry.pin
+    return tenant.current_pin
 
 def is_caller_whitelisted_verbal(tenant, caller_digits):
     """Check if caller is whitelisted for verbal authentication"""
-    normalized_caller = norm_digits(caller_digits)
-    
-    # First try the normalized format (without +)
     whitelist_entry = Whitelist.query.filter_by(
         screening_number=tenant.screening_number,
-        number=normalized_caller,
-        verbal=True
+        number=canonical_e164(caller_digits)
     ).first()
     
-    # If not found, try the original format (with +) for legacy data
-    if not whitelist_entry:
-        whitelist_entry = Whitelist.query.filter_by(
-            screening_number=tenant.screening_number,
-            number=f"+{normalized_caller}",
-            verbal=True
-        ).first()
-    
-    return bool(whitelist_entry)
+    return bool(whitelist_entry and whitelist_entry.verbal)
 
 def is_caller_whitelisted_bypass(tenant, caller_digits):
     """Check if caller is whitelisted and should bypass authentication entirely"""
-    normalized_caller = norm_digits(caller_digits)
-    
-    # First try the normalized format (without +)
     whitelist_entry = Whitelist.query.filter_by(
         screening_number=tenant.screening_number,
-        number=normalized_caller
+        number=canonical_e164(caller_digits)
     ).first()
     
-    # If not found, try the original format (with +) for legacy data
-    if not whitelist_entry:
-        whitelist_entry = Whitelist.query.filter_by(
-            screening_number=tenant.screening_number,
-            number=f"+{normalized_caller}"
-        ).first()
-    
     return bool(whitelist_entry)
 
 def auto_whitelist_caller(tenant, caller_digits, custom_pin=None):
     """Automatically add caller to whitelist after successful authentication"""
-    # Normalize caller digits to match storage format
-    normalized_caller = norm_digits(caller_digits)
+    # Store callers in canonical E.164 form
+    caller_number = canonical_e164(caller_digits)
     
     # Check if already whitelisted
     existing = Whitelist.query.filter_by(
         screening_number=tenant.screening_number,
-        number=normalized_caller
+        number=caller_number
     ).first()
     
     if existing:
@@ -87,7 +62,7 @@ def auto_whitelist_caller(tenant, caller_digits, custom_pin=None):
     # Add to whitelist
     whitelist_entry = Whitelist(
         screening_number=tenant.screening_number,
-        number=normalized_caller,
+        number=caller_number,
         pin=custom_pin,
         verbal=False  # Default to PIN-only for auto-whitelisted numbers
     )
@@ -95,7 +70,7 @@ def auto_whitelist_caller(tenant, caller_digits, custom_pin=None):
     db.session.add(whitelist_entry)
     try:
         db.session.commit()
-        print(f"Auto-whitelisted caller {normalized_caller} for tenant {tenant.screening_number}")
+        print(f"Auto-whitelisted caller {caller_number} for tenant {tenant.screening_number}")
     except Exception as e:
         db.session.rollback()
         print(f"Failed to auto-whitelist caller: {e}")
@@ -179,25 +154,32 @@ def voice_incoming():
     print(f"To: {to_number}, ForwardedFrom: {forwarded_from}, From: {from_digits}")
     
     # CHECK FOR MULTI-USER SYSTEM CALLS
-    # If this is a call to a number assigned to a user in the multi-user system, redirect there
+    # If this is a call to a number assigned to a user in the multi-user system, hand it over
+    user = None
     try:
-        from models_multi_user import User
-        user = User.query.filter_by(assigned_twilio_number=to_number).first()
-        if user:
-            print(f"MULTI-USER CALL DETECTED: {to_number} belongs to user {user.id} ({user.name})")
-            print(f"Redirecting to multi-user voice system...")
-            # Strip +1 from phone number for the URL
-            phone_for_url = to_number.replace('+1', '').replace('+', '')
-            redirect_url = f"/multi/voice/incoming/{phone_for_url}"
-            
-            # Forward the request to the multi-user system using TwiML redirect
-            vr = VoiceResponse()
-            vr.redirect(redirect_url, method="POST")
-            return xml_response(vr)
+        from utils.routing_table import routing_table
+        user = routing_table.get(to_number)
     except Exception as e:
         print(f"Error checking for multi-user calls: {e}")
         # Continue with old system as fallback
     
+    if user:
+        print(f"MULTI-USER CALL DETECTED: {to_number} belongs to user {user.id}")
+        
+        if INPROCESS_DISPATCH:
+            # Screen the call here instead of costing Twilio another webhook round-trip
+            from routes.multi_user_voice import handle_incoming_call
+            return handle_incoming_call(to_number, user)
+        
+        print(f"Redirecting to multi-user voice system...")
+        # Strip +1 from phone number for the URL
+        phone_for_url = to_number.replace('+1', '').replace('+', '')
+        redirect_url = f"/multi/voice/incoming/{phone_for_url}"
+        
+        # Forward the request to the multi-user system using TwiML redirect
+        vr = VoiceResponse()
+        vr.redirect(redirect_url, method="POST")
+        return xml_response(vr)
     
     # LOOP DETECTION: If the call is coming FROM CallBunker number, it's a loop
     if from_number == "+16316417727":
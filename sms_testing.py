@@ -2,6 +2,7 @@ import os
 from twilio.rest import Client
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from utils.status_store import status_store, status_callback_url
 
 # Twilio credentials
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
@@ -43,7 +44,8 @@ def send_protected_sms(to_number, message_body):
                 message = client.messages.create(
                     body=f"[CallBunker] {message_body}",
                     from_=attempt["from_"],
-                    to=to_number
+                    to=to_number,
+                    status_callback=status_callback_url('messages')
                 )
                 
                 # If successful, break out of loop
@@ -60,6 +62,12 @@ def send_protected_sms(to_number, message_body):
         if 'message' not in locals():
             raise last_error or Exception("All delivery attempts failed")
         
+        # Seed the status store so polls are answered locally until callbacks arrive
+        try:
+            status_store.record('message', message.sid, message.status, from_number=attempt["from_"], to_number=to_number)
+        except Exception as e:
+            print(f"Could not seed status for {message.sid}: {e}")
+        
         return {
             "success": True,
             "message_sid": message.sid,
@@ -79,18 +87,19 @@ def send_protected_sms(to_number, message_body):
 def get_sms_status(message_sid):
     """
     Check the delivery status of a sent message
+    Answered from the status store; Twilio is only asked when the state is missing or stale
     """
     try:
-        message = client.messages(message_sid).fetch()
+        entry = status_store.get('message', message_sid)
         return {
             "success": True,
-            "status": message.status,
-            "date_sent": str(message.date_sent),
-            "error_code": message.error_code,
-            "error_message": message.error_message
+            "status": entry.status,
+            "date_sent": str(entry.started_at),
+            "error_code": entry.error_code,
+            "error_message": entry.error_message
         }
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,219 @@
+"""
+CallBunker Analytics Export
+Parquet export of calls (incremental), quality metrics and alerts (snapshots) partitioned by day
+"""
+import os
+import json
+import shutil
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, Integer, Float, Boolean, DateTime
+from utils.call_log_partitions import CALL_LOG_TABLE, history_tables
+from utils.call_log_archive import call_log_archive
+
+logger = logging.getLogger(__name__)
+
+# Try to import pyarrow, mark as unavailable if not installed
+PYARROW_AVAILABLE = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Configuration
+ANALYTICS_EXPORT_DIR = os.environ.get("ANALYTICS_EXPORT_DIR")                            # Defaults to <instance>/analytics_export
+ANALYTICS_EXPORT_BATCH_ROWS = int(os.environ.get("ANALYTICS_EXPORT_BATCH_ROWS", 10000))  # Rows per read batch and row group
+ANALYTICS_EXPORT_LAG_MINUTES = int(os.environ.get("ANALYTICS_EXPORT_LAG_MINUTES", 60))   # Let calls settle before export
+
+ANALYTICS_TABLES = (CALL_LOG_TABLE, 'call_quality_metrics', 'quality_alerts')
+SNAPSHOT_TABLES = ('call_quality_metrics', 'quality_alerts')  # Ratings, acknowledgements and resolutions land after insert
+WATERMARK_FILE = '_watermarks.json'
+
+def export_dir():
+    if ANALYTICS_EXPORT_DIR:
+        return ANALYTICS_EXPORT_DIR
+    from flask import current_app
+    return os.path.join(current_app.instance_path, 'analytics_export')
+
+def arrow_schema(table):
+    """Arrow schema mirroring a model table's columns"""
+    def arrow_type(column_type):
+        if isinstance(column_type, Integer):
+            return pa.int64()
+        if isinstance(column_type, Float):
+            return pa.float64()
+        if isinstance(column_type, Boolean):
+            return pa.bool_()
+        if isinstance(column_type, DateTime):
+            return pa.timestamp('us')
+        return pa.string()
+    return pa.schema([(column.name, arrow_type(column.type)) for column in table.columns])
+
+class DayPartitionWriter:
+    """
+    Writes rows to <table>/date=YYYY-MM-DD/part-<first id>.parquet.
+    A file is named after its first row, so re-running an interrupted export
+    from the same watermark overwrites the same files instead of adding
+    duplicates. Files appear under their final name only once closed.
+    With sequential=True (rows in id order, so days only move forward) a
+    new day closes the previous one; otherwise every day stays open until
+    close().
+    """
+
+    def __init__(self, directory, table_name, schema):
+        self.root = os.path.join(directory, table_name)
+        self.schema = schema
+        self.days = {}  # day -> [ParquetWriter, final path, buffered rows]
+        self.files = 0
+
+    def write(self, row, sequential=True):
+        created_at = row['created_at']
+        day = created_at.date() if created_at else None
+        if day not in self.days:
+            if sequential:
+                self.close()
+            partition = os.path.join(self.root, f"date={day.isoformat() if day else 'unknown'}")
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(partition, f"part-{row['id']:012d}.parquet")
+            self.days[day] = [pq.ParquetWriter(path + '.tmp', self.schema), path, []]
+
+        entry = self.days[day]
+        entry[2].append(row)
+        if len(entry[2]) >= ANALYTICS_EXPORT_BATCH_ROWS:
+            self._flush(entry)
+
+    def _flush(self, entry):
+        if entry[2]:
+            entry[0].write_table(pa.Table.from_pylist(entry[2], schema=self.schema))
+            entry[2] = []
+
+    def close(self):
+        for writer, path, rows in self.days.values():
+            self._flush([writer, path, rows])
+            writer.close()
+            os.replace(path + '.tmp', path)
+            self.files += 1
+        self.days = {}
+
+class AnalyticsExporter:
+    """
+    Batch job copying analytics tables into day-partitioned Parquet so that
+    offline analysis never queries production. Call logs have an id
+    watermark in <dir>/_watermarks.json; a run exports rows above it that
+    are older than ANALYTICS_EXPORT_LAG_MINUTES, then advances it. Rows
+    below the watermark are never revisited, so the lag has to cover the
+    time a call takes to settle. SNAPSHOT_TABLES are edited long after
+    insert and are rewritten in full on every run instead. Reads go to
+    the replica bind when one is configured.
+    """
+
+    def load_watermarks(self, directory):
+        path = os.path.join(directory, WATERMARK_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_watermarks(self, directory, watermarks):
+        path = os.path.join(directory, WATERMARK_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(watermarks, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _table_rows(self, connection, table, watermark, cutoff):
+        query = (select(*table.c)
+                 .where(table.c.id > watermark, table.c.created_at < cutoff)
+                 .order_by(table.c.id)
+                 .execution_options(stream_results=True, yield_per=ANALYTICS_EXPORT_BATCH_ROWS))
+        for row in connection.execute(query):
+            yield dict(row._mapping)
+
+    def export_table(self, connection, table, directory, watermark, cutoff):
+        """Export one table above its watermark; returns (rows, files, new watermark)"""
+        writer = DayPartitionWriter(directory, table.name, arrow_schema(table))
+        count = 0
+        latest = watermark
+        if table.name == CALL_LOG_TABLE:
+            # Archived months first: segments are grouped by user, so keep each month's days open
+            for segment in reversed(call_log_archive.segments()):
+                if segment.index['max_id'] is None or segment.index['max_id'] <= watermark:
+                    continue
+                for call in segment.rows():
+                    if call.id > watermark:
+                        writer.write(call._asdict(), sequential=False)
+                        latest = max(latest, call.id)
+                        count += 1
+                writer.close()
+            tables = reversed(history_tables(connection))
+        else:
+            tables = [table]
+
+        # A failure leaves only .tmp files behind; the watermark stays put
+        for source in tables:
+            for row in self._table_rows(connection, source, watermark, cutoff):
+                writer.write(row)
+                latest = max(latest, row['id'])
+                count += 1
+        writer.close()
+        return count, writer.files, latest
+
+    def snapshot_table(self, connection, table, directory, cutoff):
+        """
+        Rewrite a mutable table in full; returns (rows, files). The new copy
+        is built beside the old one and only swapped in once complete.
+        """
+        staging = os.path.join(directory, f"{table.name}.snapshot")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(os.path.join(staging, table.name))
+
+        writer = DayPartitionWriter(staging, table.name, arrow_schema(table))
+        count = 0
+        for row in self._table_rows(connection, table, 0, cutoff):
+            writer.write(row)
+            count += 1
+        writer.close()
+
+        final = os.path.join(directory, table.name)
+        previous = f"{final}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(final):
+            os.replace(final, previous)
+        os.replace(os.path.join(staging, table.name), final)
+        shutil.rmtree(previous, ignore_errors=True)
+        shutil.rmtree(staging, ignore_errors=True)
+        return count, writer.files
+
+    def run(self, db, directory=None, now=None):
+        """Export every analytics table; returns {table: (rows, files)}"""
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is not installed; install the 'analytics' extra")
+
+        directory = directory or export_dir()
+        os.makedirs(directory, exist_ok=True)
+        cutoff = (now or datetime.utcnow()) - timedelta(minutes=ANALYTICS_EXPORT_LAG_MINUTES)
+        watermarks = self.load_watermarks(directory)
+        engine = db.engines.get('replica', db.engine)
+
+        results = {}
+        for name in ANALYTICS_TABLES:
+            table = db.metadata.tables[name]
+            if name in SNAPSHOT_TABLES:
+                with engine.connect() as connection:
+                    results[name] = self.snapshot_table(connection, table, directory, cutoff)
+            else:
+                with engine.connect() as connection:
+                    rows, files, watermark = self.export_table(
+                        connection, table, directory, watermarks.get(name, 0), cutoff)
+                watermarks[name] = watermark
+                self.save_watermarks(directory, watermarks)
+                results[name] = (rows, files)
+            rows, files = results[name]
+            logger.info(f"Exported {rows} {name} rows into {files} file(s)")
+        return results
+
+# Global analytics exporter instance
+analytics_exporter = AnalyticsExporter()
@@ -0,0 +1,79 @@
+"""
+CallBunker Async Serving Mode
+Optional gevent-based serving for the Twilio voice webhook surface
+"""
+import os
+import logging
+import threading
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SERVING_MODE = os.environ.get("SERVING_MODE", "sync").strip().lower()
+WEBHOOK_MAX_CONCURRENCY = int(os.environ.get("WEBHOOK_MAX_CONCURRENCY", 500))  # In-flight webhooks per worker
+WEBHOOK_QUEUE_TIMEOUT = float(os.environ.get("WEBHOOK_QUEUE_TIMEOUT", 5))  # Seconds to wait for a free slot
+
+# voice_bp, multi_user_voice_bp and the /multi/voice/* handlers in multi_user_bp
+WEBHOOK_PATH_PREFIXES = ('/voice/', '/multi/voice/')
+
+def async_mode_enabled() -> bool:
+    """True when the app is served by cooperative (gevent) workers"""
+    return SERVING_MODE == "async"
+
+def patch_database_driver() -> bool:
+    """
+    Make psycopg2 cooperative under gevent so a webhook waiting on the
+    database yields its worker instead of blocking it.
+
+    The Twilio REST client needs no equivalent: it talks HTTP through
+    requests, which gevent's socket patching already makes non-blocking.
+    """
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        logger.warning("psycogreen not installed - database calls will block async workers")
+        return False
+
+    patch_psycopg()
+    logger.info("psycopg2 patched for gevent")
+    return True
+
+class WebhookConcurrencyLimiter:
+    """
+    WSGI middleware capping the number of in-flight voice webhooks.
+
+    Requests beyond the cap wait up to `queue_timeout` seconds for a slot and
+    are then rejected with 503 so Twilio falls back instead of timing out.
+    Non-webhook paths pass straight through.
+    """
+
+    def __init__(self, wsgi_app, max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+                 queue_timeout=WEBHOOK_QUEUE_TIMEOUT, prefixes=WEBHOOK_PATH_PREFIXES):
+        self.wsgi_app = wsgi_app
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.prefixes = tuple(prefixes)
+        # threading primitives are gevent-aware once gunicorn has monkey patched
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.rejected = 0
+
+    def __call__(self, environ, start_response):
+        if not environ.get('PATH_INFO', '').startswith(self.prefixes):
+            return self.wsgi_app(environ, start_response)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.rejected += 1
+            logger.warning(f"Webhook capacity exceeded ({self.max_concurrency} in flight), rejected {environ.get('PATH_INFO')}")
+            response = Response('Webhook capacity exceeded', status=503, headers={'Retry-After': '1'})
+            return response(environ, start_response)
+
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except Exception:
+            self._slots.release()
+            raise
+
+        # Hold the slot until the TwiML body has been fully sent
+        return ClosingIterator(app_iter, self._slots.release)
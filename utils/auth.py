@@ -3,10 +3,11 @@ import re
 from functools import wraps
 from flask import request, redirect, url_for, flash, session, abort
 from typing import Tuple, Optional
+from utils.phone_numbers import digits_only
 
 def norm_digits(s: str) -> str:
     """Extract only digits from a string"""
-    return re.sub(r"\D", "", s or "")
+    return digits_only(s)
 
 def norm_speech(s: str) -> str:
     """Normalize speech input for comparison"""
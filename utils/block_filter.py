@@ -0,0 +1,116 @@
+"""
+CallBunker Blocklist Filter
+In-memory set of active (owner, caller) blocks so unblocked callers skip the blocklist query
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BLOCK_FILTER_REFRESH_SECONDS = int(os.environ.get("BLOCK_FILTER_REFRESH_SECONDS", 5))  # Rebuild interval
+
+TENANT_BLOCKS = 'tenant'  # Legacy Blocklist: (screening_number, caller_digits)
+USER_BLOCKS = 'user'      # UserBlocklist: (user_id, caller_number)
+
+class BlockFilter:
+    """
+    Negative-lookup filter over currently active blocks.
+
+    Holds one hash per active (kind, owner, caller) block. A miss means the
+    caller is not blocked and the database check can be skipped; a hit
+    (including a rare hash collision) still goes to the database, which
+    stays authoritative. Blocks created in this worker are added right
+    away; blocks created by other workers appear at the next rebuild, at
+    most BLOCK_FILTER_REFRESH_SECONDS later.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._added_at = {}  # key -> monotonic time added, so a rebuild in flight keeps it
+        self._loaded = False
+        self._last_rebuild = 0.0
+
+    @staticmethod
+    def _key(kind, owner, caller):
+        return hash((kind, str(owner), caller))
+
+    def rebuild(self):
+        """Reload every block whose unblock_at is still in the future"""
+        from app import db
+        from models import Blocklist
+        from models_multi_user import UserBlocklist
+
+        started = time.monotonic()
+        now = datetime.utcnow()
+        keys = set()
+        for owner, caller in db.session.query(Blocklist.screening_number, Blocklist.caller_digits).filter(
+            Blocklist.unblock_at > now
+        ):
+            keys.add(self._key(TENANT_BLOCKS, owner, caller))
+        for owner, caller in db.session.query(UserBlocklist.user_id, UserBlocklist.caller_number).filter(
+            UserBlocklist.unblock_at > now
+        ):
+            keys.add(self._key(USER_BLOCKS, owner, caller))
+
+        with self._lock:
+            # Keep blocks this worker added while the query was running
+            self._added_at = {key: added for key, added in self._added_at.items() if added >= started}
+            keys.update(self._added_at)
+            self._keys = keys
+            self._loaded = True
+            self._last_rebuild = time.monotonic()
+        return len(keys)
+
+    def _maybe_rebuild(self):
+        now = time.monotonic()
+        if self._loaded and now - self._last_rebuild < BLOCK_FILTER_REFRESH_SECONDS:
+            return True
+
+        # Only one request per worker pays for the rebuild
+        if not self._lock.acquire(blocking=False):
+            return self._loaded
+        try:
+            if self._loaded and now - self._last_rebuild < BLOCK_FILTER_REFRESH_SECONDS:
+                return True
+            self._last_rebuild = now
+        finally:
+            self._lock.release()
+
+        try:
+            self.rebuild()
+        except Exception as e:
+            logger.error(f"Block filter rebuild failed: {e}")
+            with self._lock:
+                self._loaded = False
+        return self._loaded
+
+    def might_be_blocked(self, kind, owner, caller):
+        """False only when the caller is definitely not blocked"""
+        if not self._maybe_rebuild():
+            return True  # No usable filter: let the database decide
+        return self._key(kind, owner, caller) in self._keys
+
+    def add(self, kind, owner, caller):
+        """Record a block created by this worker"""
+        key = self._key(kind, owner, caller)
+        with self._lock:
+            self._keys.add(key)
+            self._added_at[key] = time.monotonic()
+
+    def discard(self, kind, owner, caller):
+        """Forget a block that was lifted or found expired"""
+        key = self._key(kind, owner, caller)
+        with self._lock:
+            self._keys.discard(key)
+            self._added_at.pop(key, None)
+
+    def __len__(self):
+        return len(self._keys)
+
+# Global block filter instance
+block_filter = BlockFilter()
@@ -0,0 +1,123 @@
+"""
+CallBunker Caching Primitives
+Single-flight call collapsing and an optional Redis store shared across workers
+"""
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Try to import redis, mark as unavailable if not installed
+REDIS_AVAILABLE = False
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Configuration
+REDIS_URL = os.environ.get("REDIS_URL")
+SHARED_CACHE_PREFIX = os.environ.get("SHARED_CACHE_PREFIX", "callbunker:")
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._flights
+
+class SharedStore:
+    """
+    JSON values shared by every worker through Redis when REDIS_URL is set.
+    Without Redis every call is a no-op miss, so callers fall back to their
+    per-process cache.
+    """
+
+    def __init__(self, url=REDIS_URL, prefix=SHARED_CACHE_PREFIX):
+        self.prefix = prefix
+        self._client = None
+        if url and REDIS_AVAILABLE:
+            try:
+                self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            except Exception as e:
+                logger.warning(f"Shared cache disabled, could not connect to Redis: {e}")
+        elif url:
+            logger.warning("REDIS_URL is set but the redis package is not installed; shared cache disabled")
+
+    @property
+    def enabled(self):
+        return self._client is not None
+
+    def get(self, key):
+        if not self._client:
+            return None
+        try:
+            raw = self._client.get(self.prefix + key)
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            logger.warning(f"Shared cache get failed for {key}: {e}")
+            return None
+
+    def set(self, key, value, ttl):
+        if not self._client:
+            return False
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+            return True
+        except Exception as e:
+            logger.warning(f"Shared cache set failed for {key}: {e}")
+            return False
+
+    def delete(self, key):
+        if not self._client:
+            return
+        try:
+            self._client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+# Global shared store instance
+shared_store = SharedStore()
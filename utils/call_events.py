@@ -0,0 +1,214 @@
+"""
+CallBunker Call Events
+Live call status fan-out to server-sent event streams, in-process or across workers via Redis
+"""
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from flask import Response
+from utils.caching import REDIS_URL, REDIS_AVAILABLE, SHARED_CACHE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CALL_EVENTS_BACKEND = os.environ.get("CALL_EVENTS_BACKEND")                      # local or redis (default: redis when REDIS_URL is set)
+SSE_KEEPALIVE_SECONDS = int(os.environ.get("SSE_KEEPALIVE_SECONDS", 15))         # Comment line so proxies keep the stream open
+SSE_MAX_SECONDS = int(os.environ.get("SSE_MAX_SECONDS", 300))                    # Streams end after this; EventSource reconnects
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", 100))                      # Events buffered per slow subscriber
+SSE_RETRY_MILLISECONDS = 3000
+
+class Subscription:
+    """One stream's queue of (event, data) messages; the oldest is dropped when full"""
+
+    def __init__(self, broker, channel, max_size=SSE_QUEUE_SIZE):
+        self.broker = broker
+        self.channel = channel
+        self._queue = queue.Queue(maxsize=max_size)
+
+    def put(self, message):
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class LocalBackend:
+    """Single process: published events go straight to this worker's subscribers"""
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+class RedisBackend:
+    """
+    Redis pub/sub: every worker publishes to Redis and a listener thread
+    per worker delivers what it hears to local subscribers, including
+    the worker's own events.
+    """
+
+    def __init__(self, url=REDIS_URL, prefix=SHARED_CACHE_PREFIX + "events:"):
+        import redis
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def start(self, deliver):
+        self.deliver = deliver
+        threading.Thread(target=self._listen, name='call-events', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for item in pubsub.listen():
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    self.deliver(channel, tuple(json.loads(item['data'])))
+            except Exception as e:
+                logger.warning(f"Call event listener lost Redis, reconnecting: {e}")
+                time.sleep(1)
+
+    def publish(self, channel, message):
+        try:
+            self.client.publish(self.prefix + channel, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Call event publish failed for {channel}: {e}")
+
+def default_backend():
+    backend = CALL_EVENTS_BACKEND or ('redis' if REDIS_URL else 'local')
+    if backend == 'redis':
+        if REDIS_URL and REDIS_AVAILABLE:
+            return RedisBackend()
+        logger.warning("Redis call event backend needs REDIS_URL and the redis package; using in-process fan-out")
+    return LocalBackend()
+
+class EventBroker:
+    """
+    Channel-based fan-out of events to open streams in this worker. The
+    backend decides how published events reach each worker; it is started
+    on first use so forked workers each get their own listener.
+    """
+
+    def __init__(self, backend_factory=default_backend):
+        self._backend_factory = backend_factory
+        self._backend = None
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of Subscription
+
+    def _ensure_backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._backend_factory()
+                self._backend.start(self._deliver)
+            return self._backend
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+
+    def subscribe(self, channel):
+        self._ensure_backend()
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event, data):
+        self._ensure_backend().publish(channel, (event, data))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': type(self._backend).__name__ if self._backend else None,
+                'channels': len(self._subscribers),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+            }
+
+# Global call event broker instance
+call_event_broker = EventBroker()
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+def call_event(call_log, status, source, **extra):
+    """Payload of a call_status event"""
+    return {
+        'call_id': call_log.id,
+        'call_sid': call_log.twilio_call_sid,
+        'status': status,
+        'duration_seconds': call_log.duration_seconds,
+        'source': source,
+        'at': datetime.utcnow().isoformat(),
+        **extra,
+    }
+
+def publish_call_status(call_log, status, source, **extra):
+    """Push a call state change to the owner's open streams; never fails the webhook"""
+    try:
+        call_event_broker.publish(user_channel(call_log.user_id), 'call_status',
+                                  call_event(call_log, status, source, **extra))
+    except Exception as e:
+        logger.warning(f"Could not publish status for call {call_log.id}: {e}")
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def sse_response(subscription, initial=(), call_id=None):
+    """
+    text/event-stream of a subscription: initial (event, data) pairs, then
+    live events (only call_id's when given), keepalive comments while idle.
+    The stream ends after SSE_MAX_SECONDS and EventSource reconnects. The
+    generator needs no request context, so the request's database session
+    is released before streaming starts.
+    """
+    def generate():
+        try:
+            yield f"retry: {SSE_RETRY_MILLISECONDS}\n\n"
+            for event, data in initial:
+                yield _sse(event, data)
+
+            deadline = time.monotonic() + SSE_MAX_SECONDS
+            while time.monotonic() < deadline:
+                message = subscription.get(timeout=min(SSE_KEEPALIVE_SECONDS, max(0.0, deadline - time.monotonic())))
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event, data = message
+                if call_id is not None and data.get('call_id') != call_id:
+                    continue
+                yield _sse(event, data)
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Do not let nginx buffer the stream
+    })
@@ -0,0 +1,137 @@
+"""
+CallBunker Call Export
+Streaming CSV/NDJSON export of a user's full call history with quality metrics
+"""
+import io
+import os
+import csv
+import logging
+from flask import g, Response, stream_with_context
+from sqlalchemy import select, func
+from app import db
+from utils.call_log_partitions import history_tables
+from utils.call_log_archive import call_log_archive
+from utils.fast_json import ndjson_response
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 1000))          # Rows fetched per server-side cursor batch
+EXPORT_CHUNK_BYTES = int(os.environ.get("EXPORT_CHUNK_BYTES", 64 * 1024))   # Bytes buffered per streamed CSV write
+
+CALL_EXPORT_FIELDS = ('id', 'created_at', 'direction', 'status', 'from_number', 'to_number',
+                      'duration_seconds', 'twilio_call_sid')
+QUALITY_EXPORT_FIELDS = ('mos_score', 'jitter_ms', 'latency_ms', 'packet_loss_percent',
+                         'quality_category', 'user_rating')
+EXPORT_FIELDS = CALL_EXPORT_FIELDS + QUALITY_EXPORT_FIELDS
+
+def _metrics_model():
+    from models_multi_user import CallQualityMetrics
+    return CallQualityMetrics
+
+def _latest_metrics(user_id):
+    """(latest metrics id per call subquery, metrics table) for one user"""
+    metrics = _metrics_model().__table__
+    latest = (select(metrics.c.call_log_id, func.max(metrics.c.id).label('metrics_id'))
+              .where(metrics.c.user_id == user_id)
+              .group_by(metrics.c.call_log_id)
+              .subquery())
+    return latest, metrics
+
+def _export_row(call, quality=None):
+    row = {name: getattr(call, name) for name in CALL_EXPORT_FIELDS}
+    if row['created_at'] is not None:
+        row['created_at'] = row['created_at'].isoformat()
+    for name in QUALITY_EXPORT_FIELDS:
+        row[name] = getattr(quality, name, None) if quality is not None else None
+    return row
+
+def _table_rows(table, user_id, after):
+    """One hot or rollover table joined to each call's latest metrics, ascending id, streamed"""
+    latest, metrics = _latest_metrics(user_id)
+    query = (select(*(table.c[name] for name in CALL_EXPORT_FIELDS),
+                    *(metrics.c[name] for name in QUALITY_EXPORT_FIELDS))
+             .select_from(table
+                          .outerjoin(latest, latest.c.call_log_id == table.c.id)
+                          .outerjoin(metrics, metrics.c.id == latest.c.metrics_id))
+             .where(table.c.user_id == user_id, table.c.id > after)
+             .order_by(table.c.id)
+             .execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS))
+    for row in db.session.execute(query):
+        yield _export_row(row, row)
+
+def _quality_for(user_id, call_ids):
+    """{call_log_id: latest metrics row} for a batch of archived calls"""
+    metrics = _metrics_model().__table__
+    rows = db.session.execute(
+        select(metrics.c.call_log_id, *(metrics.c[name] for name in QUALITY_EXPORT_FIELDS))
+        .where(metrics.c.user_id == user_id, metrics.c.call_log_id.in_(call_ids))
+        .order_by(metrics.c.id)
+    )
+    return {row.call_log_id: row for row in rows}
+
+def _segment_rows(segment, user_id, after):
+    """
+    One archive segment, oldest first. Segments store each user's calls
+    newest first, so pages are read from the end backwards and reversed.
+    """
+    index = segment.index
+    if index['max_id'] is None or index['max_id'] <= after:
+        return
+    end = segment.count(user_id)
+    while end > 0:
+        start = max(0, end - EXPORT_CHUNK_ROWS)
+        calls = [call for call in reversed(segment.read(user_id, start, end - start)) if call.id > after]
+        end = start
+        if not calls:
+            continue
+        quality = _quality_for(user_id, [call.id for call in calls])
+        for call in calls:
+            yield _export_row(call, quality.get(call.id))
+
+def iter_call_export(user_id, after=0, use_replica=False):
+    """
+    Yield every call of a user as a flat dict, oldest first, with the
+    call's latest quality metrics. Archive segments come first, then
+    SQLite rollover tables, then the hot table. Calls are ordered by id
+    within each tier and ids grow across tiers, so a client resumes an
+    interrupted export with after=<id of the last row it received>.
+    Database tiers stream through a server-side cursor as Core rows; no
+    ORM objects are built and memory stays at one batch.
+    """
+    # Streaming runs after the view returned; keep its replica choice
+    g.use_read_replica = use_replica
+
+    for segment in reversed(call_log_archive.segments()):
+        yield from _segment_rows(segment, user_id, after)
+
+    for table in reversed(history_tables(db.session.connection())):
+        yield from _table_rows(table, user_id, after)
+
+def csv_response(rows, fields, filename=None):
+    """Stream dict rows as CSV with a header line"""
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def call_export_response(user_id, export_format='csv', after=0):
+    """Streaming export response; export_format is 'csv' or 'ndjson'"""
+    rows = iter_call_export(user_id, after, g.get('use_read_replica', False))
+    filename = f"callbunker-calls-{user_id}.{'ndjson' if export_format == 'ndjson' else 'csv'}"
+    if export_format == 'ndjson':
+        return ndjson_response(rows, filename=filename)
+    return csv_response(rows, EXPORT_FIELDS, filename)
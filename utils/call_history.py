@@ -0,0 +1,63 @@
+"""
+CallBunker Call History
+Newest-first call history paged across hot tables and archived segments
+"""
+import logging
+from itertools import islice
+from sqlalchemy import select, func
+from app import db
+from utils.call_log_partitions import history_tables
+from utils.call_log_archive import call_log_archive
+
+logger = logging.getLogger(__name__)
+
+def iter_call_history(user_id, offset=0, limit=None, columns=None):
+    """
+    Yield a user's calls newest first, skipping offset rows and stopping
+    after limit (None = everything). Tiers are visited newest first: the
+    hot table (PostgreSQL partitions included), SQLite rollover tables,
+    then archive segments. A tier is only counted when the page starts
+    past its end, so ordinary first pages cost one query.
+    Rows expose call log columns as attributes.
+    """
+    remaining = limit
+
+    for table in history_tables(db.session.connection()):
+        if remaining == 0:
+            return
+        selected = [table.c[name] for name in columns] if columns else list(table.c)
+        query = select(*selected).where(table.c.user_id == user_id).order_by(
+            table.c.created_at.desc(), table.c.id.desc())
+        if remaining is None:
+            rows = db.session.execute(query.offset(offset).execution_options(yield_per=500))
+        else:
+            rows = db.session.execute(query.offset(offset).limit(remaining))
+
+        returned = 0
+        for row in rows:
+            returned += 1
+            yield row
+        if remaining is not None:
+            remaining -= returned
+
+        if returned:
+            offset = 0
+        elif offset:
+            total = db.session.execute(select(func.count()).select_from(table).where(table.c.user_id == user_id)).scalar()
+            offset = max(0, offset - total)
+
+    for segment in call_log_archive.segments():
+        if remaining == 0:
+            return
+        count = segment.count(user_id)
+        if offset >= count:
+            offset -= count
+            continue
+        rows = segment.read(user_id, offset, remaining)
+        offset = 0
+        if remaining is not None:
+            remaining -= len(rows)
+        yield from rows
+
+def call_history_page(user_id, limit=50, offset=0, columns=None):
+    return list(islice(iter_call_history(user_id, offset, limit, columns), limit))
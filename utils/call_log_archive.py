@@ -0,0 +1,266 @@
+"""
+CallBunker Call Log Archive
+Append-only gzip NDJSON segments for call logs older than the hot retention window
+"""
+import os
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy import select, text
+from utils.call_log_partitions import (
+    CALL_LOG_COLUMNS, add_months, month_start, month_tables, call_log_table,
+    ensure_partitions, roll_over, is_postgres, is_partitioned,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CALL_LOG_ARCHIVE_DIR = os.environ.get("CALL_LOG_ARCHIVE_DIR")                  # Shared, durable storage; months are only archived once set
+CALL_LOG_HOT_MONTHS = max(2, int(os.environ.get("CALL_LOG_HOT_MONTHS", 6)))    # Months kept in the database
+ARCHIVE_BLOCK_ROWS = int(os.environ.get("ARCHIVE_BLOCK_ROWS", 256))            # Rows per gzip member (index granularity)
+
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+class ArchivedCall(NamedTuple):
+    id: int
+    user_id: int
+    from_number: str
+    to_number: str
+    direction: str
+    status: str
+    twilio_call_sid: Optional[str]
+    conference_name: Optional[str]
+    duration_seconds: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+def _encode(row):
+    data = {key: getattr(row, key) for key in CALL_LOG_COLUMNS}
+    for key in DATETIME_FIELDS:
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return json.dumps(data, separators=(",", ":")).encode()
+
+def _decode(line):
+    data = json.loads(line)
+    for key in DATETIME_FIELDS:
+        if data[key] is not None:
+            data[key] = datetime.fromisoformat(data[key])
+    return ArchivedCall(**data)
+
+def archive_dir():
+    """Where segments are read from; archival itself needs CALL_LOG_ARCHIVE_DIR"""
+    if CALL_LOG_ARCHIVE_DIR:
+        return CALL_LOG_ARCHIVE_DIR
+    from flask import current_app
+    return os.path.join(current_app.instance_path, 'call_log_archive')
+
+class Segment:
+    """
+    One archived month (or a later top-up of it): <name>.ndjson.gz holds the
+    rows sorted by (user_id, created_at desc, id desc) as one gzip member per
+    ARCHIVE_BLOCK_ROWS rows; <name>.idx.json is the sparse index - the byte
+    range of each member plus each user's first row and row count - so a
+    page of one user's history decompresses only the blocks it touches.
+    The index is written last and marks the segment complete.
+    """
+
+    def __init__(self, directory, name, index):
+        self.directory = directory
+        self.name = name
+        self.index = index
+        self.month = datetime.strptime(index['month'], '%Y-%m')
+
+    @property
+    def data_path(self):
+        return os.path.join(self.directory, f"{self.name}.ndjson.gz")
+
+    @classmethod
+    def load(cls, directory, name):
+        with open(os.path.join(directory, f"{name}.idx.json")) as f:
+            return cls(directory, name, json.load(f))
+
+    def count(self, user_id):
+        return self.index['users'].get(str(user_id), (0, 0))[1]
+
+    def _read_blocks(self, first, last):
+        rows = []
+        with open(self.data_path, 'rb') as f:
+            for offset, length in self.index['blocks'][first:last + 1]:
+                f.seek(offset)
+                rows.extend(gzip.decompress(f.read(length)).splitlines())
+        return rows
+
+    def read(self, user_id, offset=0, limit=None):
+        """One user's archived calls, newest first"""
+        start, count = self.index['users'].get(str(user_id), (0, 0))
+        if offset >= count:
+            return []
+        first_row = start + offset
+        end_row = start + count if limit is None else min(start + count, first_row + limit)
+
+        block_rows = self.index['block_rows']
+        first_block, last_block = first_row // block_rows, (end_row - 1) // block_rows
+        lines = self._read_blocks(first_block, last_block)
+        skip = first_row - first_block * block_rows
+        return [_decode(line) for line in lines[skip:skip + end_row - first_row]]
+
+    def rows(self):
+        """Every archived call in file order, one block in memory at a time"""
+        for block in range(len(self.index['blocks'])):
+            for line in self._read_blocks(block, block):
+                yield _decode(line)
+
+    def ids(self):
+        return {row.id for row in self.rows()}
+
+    @classmethod
+    def write(cls, directory, name, month, rows):
+        """Write rows (already in segment order) as a new segment; returns it, or None if empty"""
+        os.makedirs(directory, exist_ok=True)
+        data_path = os.path.join(directory, f"{name}.ndjson.gz")
+        index_path = os.path.join(directory, f"{name}.idx.json")
+        index = {'month': month.strftime('%Y-%m'), 'rows': 0, 'block_rows': ARCHIVE_BLOCK_ROWS,
+                 'blocks': [], 'users': {}, 'min_id': None, 'max_id': None}
+
+        block = []
+        with open(data_path + '.tmp', 'wb') as f:
+            def flush():
+                member = gzip.compress(b"\n".join(block) + b"\n", mtime=0)
+                index['blocks'].append((f.tell(), len(member)))
+                f.write(member)
+                block.clear()
+
+            for row in rows:
+                user = index['users'].setdefault(str(row.user_id), [index['rows'], 0])
+                user[1] += 1
+                index['rows'] += 1
+                index['min_id'] = row.id if index['min_id'] is None else min(index['min_id'], row.id)
+                index['max_id'] = row.id if index['max_id'] is None else max(index['max_id'], row.id)
+                block.append(_encode(row))
+                if len(block) == ARCHIVE_BLOCK_ROWS:
+                    flush()
+            if block:
+                flush()
+            f.flush()
+            os.fsync(f.fileno())
+
+        if not index['rows']:
+            os.remove(data_path + '.tmp')
+            return None
+
+        os.replace(data_path + '.tmp', data_path)
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump(index, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(index_path + '.tmp', index_path)
+        return cls(directory, name, index)
+
+class CallLogArchive:
+    """Segments in the archive directory, newest month first; indexes are cached per worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments = {}  # (directory, name) -> (index mtime, Segment)
+
+    def segments(self, directory=None):
+        directory = directory or archive_dir()
+        if not os.path.isdir(directory):
+            return []
+
+        found = []
+        for filename in os.listdir(directory):
+            if not filename.endswith('.idx.json'):
+                continue
+            name = filename[:-len('.idx.json')]
+            mtime = os.path.getmtime(os.path.join(directory, filename))
+            with self._lock:
+                cached = self._segments.get((directory, name))
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, Segment.load(directory, name))
+                with self._lock:
+                    self._segments[(directory, name)] = cached
+            found.append(cached[1])
+        return sorted(found, key=lambda segment: (segment.month, segment.name), reverse=True)
+
+    def _segment_name(self, directory, month):
+        base = f"call_logs_y{month.year:04d}m{month.month:02d}"
+        existing = {segment.name for segment in self.segments(directory)}
+        if base not in existing:
+            return base
+        suffix = 2
+        while f"{base}_{suffix}" in existing:
+            suffix += 1
+        return f"{base}_{suffix}"
+
+    def archive_table(self, connection, table_name, month):
+        """
+        Copy one month table into a segment under CALL_LOG_ARCHIVE_DIR (where
+        history and exports read it back), then drop the table.
+        Rows a previous, interrupted run already archived are skipped, so
+        re-running after a crash does not duplicate them.
+        """
+        directory = CALL_LOG_ARCHIVE_DIR
+        if not directory:
+            raise ValueError("CALL_LOG_ARCHIVE_DIR is not set; refusing to drop call logs into local storage")
+        source = call_log_table(table_name)
+        already = set()
+        for segment in self.segments(directory):
+            if segment.month == month:
+                already |= segment.ids()
+
+        rows = connection.execute(
+            select(*source.c)
+            .order_by(source.c.user_id, source.c.created_at.desc(), source.c.id.desc())
+            .execution_options(yield_per=1000)
+        )
+        segment = Segment.write(directory, self._segment_name(directory, month), month,
+                                (row for row in rows if row.id not in already))
+
+        connection.execute(text(f"DROP TABLE {table_name}"))
+        archived = segment.index['rows'] if segment else 0
+        logger.info(f"Archived {archived} call logs from {table_name}")
+        return archived
+
+    def archive_old_months(self, engine, now=None):
+        """
+        Scheduled job: create upcoming partitions (PostgreSQL) or roll
+        finished months into rollover tables (SQLite), then archive and drop
+        every month table older than CALL_LOG_HOT_MONTHS.
+        Archival only runs once CALL_LOG_ARCHIVE_DIR is set: segments on an instance's local disk would be invisible to the other
+        instances, or lost with it, once the tables are dropped.
+        Returns {month table: rows archived}.
+        """
+        now = now or datetime.utcnow()
+        horizon = add_months(month_start(now), -CALL_LOG_HOT_MONTHS)
+
+        with engine.begin() as connection:
+            if is_postgres(connection) and not is_partitioned(connection):
+                logger.warning("multi_user_call_logs is not partitioned; run migrate_call_log_partitions.py first")
+                return {}
+            ensure_partitions(connection, now)
+            roll_over(connection, now)
+
+        if not CALL_LOG_ARCHIVE_DIR:
+            logger.warning("CALL_LOG_ARCHIVE_DIR is not set; keeping old call log months in the database")
+            return {}
+
+        results = {}
+        with engine.connect() as connection:
+            tables = month_tables(connection)
+        for month, table_name in sorted(tables.items()):
+            if month >= horizon:
+                continue
+            with engine.begin() as connection:
+                results[table_name] = self.archive_table(connection, table_name, month)
+        return results
+
+    def count(self, user_id):
+        return sum(segment.count(user_id) for segment in self.segments())
+
+# Global call log archive instance
+call_log_archive = CallLogArchive()
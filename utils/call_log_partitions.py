@@ -0,0 +1,153 @@
+"""
+CallBunker Call Log Partitions
+Monthly partitions of multi_user_call_logs (PostgreSQL) and rollover tables (SQLite)
+"""
+import os
+import re
+import logging
+from datetime import datetime
+from sqlalchemy import text, inspect, select, insert, delete, func
+from sqlalchemy.sql import table, column
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CALL_LOG_PARTITIONS_AHEAD = int(os.environ.get("CALL_LOG_PARTITIONS_AHEAD", 2))  # Future months pre-created
+
+CALL_LOG_TABLE = 'multi_user_call_logs'
+MONTH_TABLE = re.compile(r'^multi_user_call_logs_y(\d{4})m(\d{2})$')
+
+# Every column of a call log row, in declaration order
+CALL_LOG_COLUMNS = ('id', 'user_id', 'from_number', 'to_number', 'direction', 'status', 'twilio_call_sid',
+                    'conference_name', 'duration_seconds', 'created_at', 'updated_at')
+
+def month_start(when):
+    return datetime(when.year, when.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + (month.month - 1) + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def month_table_name(month):
+    return f"{CALL_LOG_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def month_of_table(name):
+    match = MONTH_TABLE.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+def call_log_table(name=CALL_LOG_TABLE):
+    """Lightweight Core table for the hot table, a partition or a rollover table"""
+    from models_multi_user import MultiUserCallLog
+    columns = MultiUserCallLog.__table__.columns
+    return table(name, *(column(key, columns[key].type) for key in CALL_LOG_COLUMNS))
+
+def is_postgres(engine):
+    return engine.dialect.name == 'postgresql'
+
+def is_partitioned(connection):
+    """True when multi_user_call_logs is a PostgreSQL partitioned table"""
+    if not is_postgres(connection):
+        return False
+    return bool(connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {'name': CALL_LOG_TABLE}).scalar())
+
+def month_tables(connection):
+    """{month: table name} for partitions (PostgreSQL) or rollover tables (SQLite)"""
+    tables = {}
+    for name in inspect(connection).get_table_names():
+        month = month_of_table(name)
+        if month:
+            tables[month] = name
+    return tables
+
+def create_partition(connection, month):
+    """Attach the partition for one month to the partitioned table (idempotent)"""
+    name = month_table_name(month)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {CALL_LOG_TABLE} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    ))
+    return name
+
+def ensure_partitions(connection, now=None):
+    """PostgreSQL: make sure this month's and the next few months' partitions exist"""
+    if not is_partitioned(connection):
+        return []
+    current = month_start(now or datetime.utcnow())
+    return [create_partition(connection, add_months(current, offset))
+            for offset in range(CALL_LOG_PARTITIONS_AHEAD + 1)]
+
+def uses_autoincrement(connection):
+    """SQLite: True when the hot table was created with AUTOINCREMENT and never reuses ids"""
+    sql = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+    ), {'name': CALL_LOG_TABLE}).scalar()
+    return bool(sql) and 'AUTOINCREMENT' in sql.upper()
+
+def reserve_ids(connection, max_id):
+    """SQLite: make the hot table's next id come after max_id"""
+    seq = connection.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :name"),
+                             {'name': CALL_LOG_TABLE}).scalar()
+    if seq is None:
+        connection.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                           {'name': CALL_LOG_TABLE, 'seq': max_id})
+    elif seq < max_id:
+        connection.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+                           {'name': CALL_LOG_TABLE, 'seq': max_id})
+
+def roll_over(connection, now=None):
+    """
+    SQLite: move rows from months before last month out of the hot table
+    into per-month rollover tables (same naming as PostgreSQL partitions).
+    The current and previous month stay hot so in-flight calls can still
+    be updated by their status callbacks. Returns {table: rows moved}.
+    Ids must keep growing across the hot and rolled tables (quality metrics,
+    export resume and the analytics watermark rely on it), so a hot table
+    created without AUTOINCREMENT is left alone until it is rebuilt.
+    """
+    if connection.dialect.name != 'sqlite':
+        return {}
+    if not uses_autoincrement(connection):
+        logger.warning(f"{CALL_LOG_TABLE} would reuse rolled-over ids; run migrate_call_log_partitions.py first")
+        return {}
+
+    hot = call_log_table()
+    keep_from = add_months(month_start(now or datetime.utcnow()), -1)
+    oldest = connection.execute(select(func.min(hot.c.created_at)).where(hot.c.created_at < keep_from)).scalar()
+    if oldest is None:
+        return {}
+
+    moved = {}
+    month = month_start(oldest)
+    while month < keep_from:
+        next_month = add_months(month, 1)
+        in_month = (hot.c.created_at >= month) & (hot.c.created_at < next_month)
+        if connection.execute(select(func.count()).select_from(hot).where(in_month)).scalar():
+            name = month_table_name(month)
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM {CALL_LOG_TABLE} WHERE 0"
+            ))
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{name}_user_created ON {name} (user_id, created_at)"
+            ))
+            rollover = call_log_table(name)
+            connection.execute(insert(rollover).from_select(CALL_LOG_COLUMNS, select(*hot.c).where(in_month)))
+            moved[name] = connection.execute(delete(hot).where(in_month)).rowcount
+        month = next_month
+
+    if moved:
+        logger.info(f"Rolled call logs over into {moved}")
+    return moved
+
+def history_tables(connection):
+    """
+    Tables holding call logs still in the database, newest first.
+    PostgreSQL partitions are reached through the parent table; SQLite
+    rollover tables are queried one by one.
+    """
+    tables = [call_log_table()]
+    if connection.dialect.name == 'sqlite':
+        tables.extend(call_log_table(name) for month, name in sorted(month_tables(connection).items(), reverse=True))
+    return tables
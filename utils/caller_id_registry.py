@@ -0,0 +1,129 @@
+"""
+CallBunker Verified Caller ID Registry
+Cached list of Twilio verified outgoing caller IDs, refreshed in the background
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from utils.caching import SingleFlight, shared_store
+from utils.twilio_helpers import twilio_client
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CALLER_ID_TTL_SECONDS = int(os.environ.get("CALLER_ID_TTL_SECONDS", 900))          # Serve without refetching
+CALLER_ID_REFRESH_SECONDS = int(os.environ.get("CALLER_ID_REFRESH_SECONDS", 300))  # Background schedule
+CALLER_ID_FAILURE_BACKOFF_SECONDS = int(os.environ.get("CALLER_ID_FAILURE_BACKOFF_SECONDS", 30))  # Retry delay until a first list loads
+
+SHARED_KEY = "verified_caller_ids"
+
+class CallerIdRegistry:
+    """
+    Verified caller IDs for the Twilio account.
+
+    Outbound dialing reads the cached list and never waits for Twilio. The
+    background thread is started (and the list warmed) when a gunicorn
+    worker boots, then refreshes every CALLER_ID_REFRESH_SECONDS, adopting
+    another worker's fresher copy from the shared store when one exists;
+    until a first list loads it retries every CALLER_ID_FAILURE_BACKOFF_SECONDS.
+    A stale list is served while a refresh runs, and concurrent refreshes
+    collapse into one Twilio call. A dial that arrives before the first
+    list has loaded sees no verified numbers. An empty list (the usual
+    case, purchased numbers are not verified caller IDs) is cached like
+    any other.
+    """
+
+    def __init__(self):
+        self._numbers = ()
+        self._fetched_at = 0.0  # Wall clock, comparable across workers; 0 = never loaded
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def _set(self, numbers, fetched_at):
+        with self._lock:
+            if fetched_at >= self._fetched_at:
+                self._numbers = tuple(numbers)
+                self._fetched_at = fetched_at
+
+    @property
+    def loaded(self):
+        return self._fetched_at > 0
+
+    def _age(self):
+        return time.time() - self._fetched_at
+
+    def _fetch(self):
+        client = twilio_client()
+        numbers = tuple(caller_id.phone_number for caller_id in client.outgoing_caller_ids.list())
+        fetched_at = time.time()
+        self._set(numbers, fetched_at)
+        shared_store.set(SHARED_KEY, {'numbers': list(numbers), 'fetched_at': fetched_at}, CALLER_ID_TTL_SECONDS)
+        logger.info(f"Refreshed {len(numbers)} verified caller IDs from Twilio")
+        return numbers
+
+    def _adopt_shared(self):
+        """Use another worker's copy if it is newer than ours"""
+        data = shared_store.get(SHARED_KEY)
+        if data and data.get('fetched_at', 0) > self._fetched_at:
+            self._set(data.get('numbers', []), data['fetched_at'])
+
+    def refresh(self):
+        """Fetch from Twilio now; concurrent callers share one request"""
+        return self._flight.do(SHARED_KEY, self._fetch)
+
+    def _refresh_in_background(self):
+        if self._flight.in_flight(SHARED_KEY):
+            return
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background caller ID refresh failed: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self._adopt_shared()
+                if self._age() >= CALLER_ID_REFRESH_SECONDS:
+                    self.refresh()
+            except Exception as e:
+                logger.error(f"Scheduled caller ID refresh failed: {e}")
+            time.sleep(CALLER_ID_REFRESH_SECONDS if self.loaded else CALLER_ID_FAILURE_BACKOFF_SECONDS)
+
+    def start(self):
+        """Start the background refresher, whose first pass loads the list (once per worker process)"""
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name="caller-id-refresh", daemon=True)
+            self._refresher.start()
+
+    def verified_numbers(self):
+        """Verified caller IDs in Twilio's order; never blocks, () until a first list has loaded"""
+        self.start()
+
+        if self.loaded and self._age() < CALLER_ID_TTL_SECONDS:
+            return self._numbers
+
+        self._adopt_shared()
+        if self.loaded and self._age() >= CALLER_ID_TTL_SECONDS:
+            self._refresh_in_background()
+        return self._numbers
+
+    def status(self):
+        return {
+            'count': len(self._numbers),
+            'numbers': list(self._numbers),
+            'fetched_at': datetime.utcfromtimestamp(self._fetched_at).isoformat() if self._fetched_at else None,
+            'age_seconds': int(self._age()) if self._fetched_at else None,
+            'shared_store': shared_store.enabled,
+        }
+
+# Global caller ID registry instance
+caller_id_registry = CallerIdRegistry()
@@ -0,0 +1,65 @@
+"""
+CallBunker Response Compression
+Brotli/gzip for JSON and page responses above a size threshold
+"""
+import os
+import gzip
+import logging
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+# Try to import brotli, mark as unavailable if not installed
+BROTLI_AVAILABLE = False
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Configuration
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))   # Smaller bodies go out as-is
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))  # Low latency, still beats gzip
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/csv', 'text/css', 'application/javascript',
+}
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if BROTLI_AVAILABLE and accepted.quality('br') > 0:
+        return 'br'
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+def compress_response(response):
+    """after_request hook: compress buffered 200 responses the client accepts"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if not encoding:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def install_compression(app):
+    app.after_request(compress_response)
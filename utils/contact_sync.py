@@ -0,0 +1,169 @@
+"""
+CallBunker Contact Sync
+Diff a client's address book against a user's whitelist and apply it with bulk statements
+"""
+import os
+import re
+import logging
+from sqlalchemy import select, insert, update, delete
+from app import db
+from models_multi_user import UserWhitelist
+from utils.phone_numbers import canonicalize_many, digits_only
+from utils.sync_journal import sync_journal
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CONTACT_SYNC_MAX = int(os.environ.get("CONTACT_SYNC_MAX", 5000))  # Contacts accepted per request
+
+PIN_PATTERN = re.compile(r'^\d{4}$')
+TRUE_VALUES = {'true', '1', 'yes'}
+FALSE_VALUES = {'false', '0', 'no', ''}
+REJECTED_SAMPLE = 20  # Invalid entries echoed back to the client
+
+class ContactSyncError(ValueError):
+    """Payload problem the client must fix"""
+
+def _parse_bool(value):
+    """JSON booleans, 0/1 and 'true'/'false' strings; None for anything else"""
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+    return None
+
+def _parse_text(value):
+    """Strings as sent, JSON integers as their digits, None as ''; None for anything else"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+def _parse_contacts(entries, country=None):
+    """
+    Canonicalize a contact list in one batch; numbers without an
+    international prefix are read in the user's country.
+    Returns ({caller_number: fields}, rejected); later duplicates win, and
+    fields only carries the keys the client actually sent.
+    """
+    if not isinstance(entries, list):
+        raise ContactSyncError("contacts must be a list")
+    if len(entries) > CONTACT_SYNC_MAX:
+        raise ContactSyncError(f"At most {CONTACT_SYNC_MAX} contacts per sync")
+
+    raw = [entry.get('phone_number') if isinstance(entry, dict) else entry for entry in entries]
+    texts = [_parse_text(value) for value in raw]
+    contacts = {}
+    rejected = []
+    numbers = canonicalize_many([text or '' for text in texts], country)
+    for entry, original, text, number in zip(entries, raw, texts, numbers):
+        if text is None or not number or len(digits_only(number)) < 10:
+            rejected.append(original)
+            continue
+
+        fields = {}
+        if isinstance(entry, dict):
+            if 'custom_pin' in entry:
+                pin = _parse_text(entry.get('custom_pin'))
+                pin = pin.strip() if pin is not None else None
+                if pin is None or (pin and not PIN_PATTERN.match(pin)):
+                    rejected.append(original)
+                    continue
+                fields['custom_pin'] = pin or None
+            if 'allows_verbal' in entry:
+                allows_verbal = _parse_bool(entry.get('allows_verbal'))
+                if allows_verbal is None:
+                    rejected.append(original)
+                    continue
+                fields['allows_verbal'] = allows_verbal
+        contacts[number] = fields
+    return contacts, rejected
+
+def sync_contacts(user_id, entries, full=False, remove=(), country=None):
+    """
+    Apply a contact set to the user's whitelist without committing.
+
+    full=True treats entries as the complete address book and removes any
+    whitelisted number not in it; otherwise entries are upserted and only
+    the numbers in remove are deleted. Reads the current whitelist with one
+    query and writes with at most one INSERT, UPDATE and DELETE statement,
+    plus one sync journal INSERT. country is the user's ISO country
+    (User.country) for numbers written without an international prefix.
+    Returns a summary of the changes.
+    """
+    if not isinstance(remove, (list, tuple)):
+        raise ContactSyncError("remove must be a list")
+    contacts, rejected = _parse_contacts(entries, country)
+    removals = set(n for n in canonicalize_many([text for text in map(_parse_text, remove) if text], country) if n) - set(contacts)
+
+    existing = {
+        row.caller_number: row
+        for row in db.session.execute(
+            select(UserWhitelist.id, UserWhitelist.caller_number, UserWhitelist.custom_pin, UserWhitelist.allows_verbal)
+            .where(UserWhitelist.user_id == user_id)
+        )
+    }
+
+    inserts, updates = [], []
+    unchanged = 0
+    for number, fields in contacts.items():
+        row = existing.get(number)
+        if row is None:
+            inserts.append({
+                'user_id': user_id,
+                'caller_number': number,
+                'custom_pin': fields.get('custom_pin'),
+                'allows_verbal': fields.get('allows_verbal', False),
+            })
+            continue
+
+        changes = {}
+        if 'custom_pin' in fields and (row.custom_pin or None) != fields['custom_pin']:
+            changes['custom_pin'] = fields['custom_pin']
+        if 'allows_verbal' in fields and bool(row.allows_verbal) != fields['allows_verbal']:
+            changes['allows_verbal'] = fields['allows_verbal']
+        if changes:
+            updates.append(dict(changes, id=row.id))
+        else:
+            unchanged += 1
+
+    if full:
+        delete_ids = [row.id for number, row in existing.items() if number not in contacts]
+    else:
+        delete_ids = [existing[number].id for number in removals if number in existing]
+
+    inserted_ids = []
+    if inserts:
+        inserted_ids = db.session.scalars(insert(UserWhitelist).returning(UserWhitelist.id), inserts).all()
+    if updates:
+        db.session.execute(update(UserWhitelist), updates)
+    if delete_ids:
+        db.session.execute(
+            delete(UserWhitelist).where(UserWhitelist.id.in_(delete_ids)).execution_options(synchronize_session=False)
+        )
+
+    # Bulk statements skip the flush-time journal
+    sync_journal.record(db.session, user_id, 'contacts',
+                        upserted=list(inserted_ids) + [row['id'] for row in updates], deleted=delete_ids)
+
+    logger.info(f"Contact sync for user {user_id}: +{len(inserts)} ~{len(updates)} -{len(delete_ids)}")
+    return {
+        'mode': 'full' if full else 'partial',
+        'received': len(entries),
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(delete_ids),
+        'unchanged': unchanged,
+        'rejected': len(rejected),
+        'rejected_numbers': [str(n) for n in rejected[:REJECTED_SAMPLE]],
+        'total': len(existing) + len(inserts) - len(delete_ids),
+    }
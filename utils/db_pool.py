@@ -0,0 +1,155 @@
+"""
+CallBunker Database Connection Pool
+Per-deployment pool sizing, error-driven invalidation and pool telemetry
+"""
+import os
+import time
+import logging
+import threading
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing per deployment profile
+POOL_PROFILES = {
+    'sync': {'pool_size': 2, 'max_overflow': 3},        # One request at a time per worker
+    'async': {'pool_size': 20, 'max_overflow': 30},     # gevent workers multiplex many webhooks
+    'autoscale': {'pool_size': 1, 'max_overflow': 4},   # Many small instances sharing one Postgres
+}
+
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 300))  # Seconds before a connection is replaced
+
+def pool_profile() -> str:
+    """Resolve the pool profile from DB_POOL_PROFILE, falling back to the serving mode"""
+    profile = os.environ.get("DB_POOL_PROFILE")
+    if not profile:
+        profile = os.environ.get("SERVING_MODE", "sync")
+    profile = profile.strip().lower()
+    if profile not in POOL_PROFILES:
+        logger.warning(f"Unknown DB_POOL_PROFILE '{profile}', using 'sync'")
+        profile = 'sync'
+    return profile
+
+def _is_memory_sqlite(database_url: str) -> bool:
+    return database_url in ('sqlite://', 'sqlite:///:memory:') or ':memory:' in database_url
+
+def engine_options(database_url: str) -> dict:
+    """
+    Build SQLAlchemy engine options for a database URL.
+
+    pool_pre_ping is deliberately off: it costs a round-trip on every
+    checkout. Dead connections are instead invalidated when they raise a
+    disconnect error (see install_pool_listeners), which also recycles every
+    connection that was opened before the failure.
+    """
+    options = {
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": False,
+    }
+
+    if _is_memory_sqlite(database_url):
+        # In-memory SQLite uses a per-thread pool that takes no sizing
+        return options
+
+    sizing = dict(POOL_PROFILES[pool_profile()])
+    if os.environ.get("DB_POOL_SIZE"):
+        sizing['pool_size'] = int(os.environ["DB_POOL_SIZE"])
+    if os.environ.get("DB_MAX_OVERFLOW"):
+        sizing['max_overflow'] = int(os.environ["DB_MAX_OVERFLOW"])
+
+    options.update(sizing)
+    options["pool_timeout"] = DB_POOL_TIMEOUT
+    options["poolclass"] = InstrumentedQueuePool
+    return options
+
+class PoolWaitStats:
+    """Thread-safe counters for checkout wait time and invalidations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            if seconds > self.max_wait:
+                self.max_wait = seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        # Keep counters across pool recreation (dispose / invalidation)
+        new_pool = super().recreate()
+        new_pool.wait_stats = self.wait_stats
+        return new_pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record_wait(time.perf_counter() - started)
+        return connection
+
+def install_pool_listeners(engine):
+    """Count disconnect-driven invalidations for an engine's pool"""
+    @event.listens_for(engine, "handle_error")
+    def _on_db_error(context):
+        if context.is_disconnect:
+            stats = getattr(engine.pool, 'wait_stats', None)
+            if stats:
+                stats.record_invalidation()
+            logger.warning(f"Database disconnect detected, invalidating pool: {context.original_exception}")
+
+def pool_statistics(engine) -> dict:
+    """Snapshot of an engine's pool: checked out, overflow and wait times"""
+    pool = engine.pool
+    stats = {
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+    }
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        })
+
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats:
+        stats.update(wait_stats.as_dict())
+
+    return stats
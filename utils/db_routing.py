@@ -0,0 +1,143 @@
+"""
+CallBunker Read-Replica Routing
+Sends designated read-only routes to the 'replica' bind with a freshness guard
+"""
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from flask import g, request, has_app_context, has_request_context, session as client_session
+from sqlalchemy import event
+from sqlalchemy.sql.expression import UpdateBase
+from flask_sqlalchemy.session import Session
+from utils.caching import shared_store
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPLICA_BIND_KEY = 'replica'
+REPLICA_FRESHNESS_SECONDS = float(os.environ.get("REPLICA_FRESHNESS_SECONDS", 5))  # Read own writes from primary
+TENANT_SCOPE = 'tenants'  # Freshness scope for legacy screening-number models
+
+SESSION_KEY = 'last_write_at'
+WEBHOOK_BLUEPRINTS = {'voice', 'multi_user_voice', 'status_callbacks'}  # Twilio callers, never a browser session
+
+# scope -> monotonic time of the last committed write seen by this worker
+_last_writes = {}
+_last_writes_lock = threading.Lock()
+
+def _shared_key(scope):
+    return f"last_write:{scope}"
+
+def _write_scope(obj):
+    """Freshness scope for a written row: its user id, or the legacy tenant scope"""
+    user_id = getattr(obj, 'user_id', None)
+    if user_id is not None:
+        return user_id
+    if getattr(obj, '__tablename__', None) == 'users':
+        return obj.id
+    if hasattr(obj, 'screening_number'):
+        return TENANT_SCOPE
+    return None
+
+def note_write(scope):
+    """
+    Record a committed write so reads for this scope stay on the primary:
+    in this worker, in the shared store for every other worker, and, when
+    the write is the logged-in user's own, in their session so their next
+    request sees it on any worker even without Redis.
+    """
+    if scope is None:
+        return
+    with _last_writes_lock:
+        _last_writes[scope] = time.monotonic()
+    shared_store.set(_shared_key(scope), time.time(), REPLICA_FRESHNESS_SECONDS)
+    if _own_write(scope):
+        client_session[SESSION_KEY] = time.time()
+
+def _own_write(scope):
+    """A browser request writing the logged-in user's rows; webhooks never touch the session"""
+    if not has_request_context() or request.blueprint in WEBHOOK_BLUEPRINTS:
+        return False
+    return client_session.get('logged_in') and client_session.get('user_id') == scope
+
+def _written_locally(scope):
+    with _last_writes_lock:
+        written_at = _last_writes.get(scope)
+        if written_at is None:
+            return False
+        if time.monotonic() - written_at > REPLICA_FRESHNESS_SECONDS:
+            del _last_writes[scope]
+            return False
+        return True
+
+def recently_written(scope) -> bool:
+    """True when scope, or this client, committed a write inside the freshness window"""
+    if _written_locally(scope):
+        return True
+    if has_request_context() and time.time() - client_session.get(SESSION_KEY, 0) <= REPLICA_FRESHNESS_SECONDS:
+        return True
+    return shared_store.get(_shared_key(scope)) is not None
+
+def _replica_requested() -> bool:
+    return has_app_context() and g.get('use_read_replica', False)
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica bind while a route has opted in
+    via @use_read_replica. Flushes, DML statements and any read after the
+    session has written in this request always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _replica_requested() and not self._flushing and not isinstance(clause, UpdateBase):
+            engines = self._db.engines
+            if REPLICA_BIND_KEY in engines:
+                return engines[REPLICA_BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _collect_write_scopes(session, flush_context):
+    scopes = session.info.setdefault('write_scopes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        scopes.add(_write_scope(obj))
+
+    # Once a request writes, its remaining reads must see those writes
+    if has_app_context():
+        g.use_read_replica = False
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _bulk_write_stays_on_primary(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and has_app_context():
+        g.use_read_replica = False
+
+@event.listens_for(RoutingSession, "after_commit")
+def _stamp_write_scopes(session):
+    for scope in session.info.pop('write_scopes', ()):
+        note_write(scope)
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_write_scopes(session):
+    session.info.pop('write_scopes', None)
+
+def use_read_replica(f):
+    """
+    Route this view's reads to the replica bind.
+
+    The freshness scope is the view's user_id argument, or the legacy tenant
+    scope for admin views. If any worker committed a write for that scope
+    (shared store), or this client wrote anything (session), in the last
+    REPLICA_FRESHNESS_SECONDS the view reads from the primary instead.
+    Without DATABASE_REPLICA_URL the decorator is a no-op.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        scope = kwargs.get('user_id', TENANT_SCOPE)
+        previous = g.get('use_read_replica', False)
+        g.use_read_replica = not recently_written(scope)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.use_read_replica = previous
+    return decorated_function
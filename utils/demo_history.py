@@ -0,0 +1,142 @@
+"""
+CallBunker Demo History
+Bounded call history for the public demo API, optionally shared across workers
+"""
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from utils.caching import shared_store
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DEMO_HISTORY_PER_USER = int(os.environ.get("DEMO_HISTORY_PER_USER", 50))                  # Newest calls kept per demo user
+DEMO_HISTORY_MAX_USERS = int(os.environ.get("DEMO_HISTORY_MAX_USERS", 1000))              # Demo users kept per worker
+DEMO_HISTORY_TTL_SECONDS = int(os.environ.get("DEMO_HISTORY_TTL_SECONDS", 3600))          # Idle histories expire
+DEMO_HISTORY_MAX_BYTES = int(os.environ.get("DEMO_HISTORY_MAX_BYTES", 5 * 1024 * 1024))   # Approximate cap per worker
+
+def _entry_size(entry):
+    return len(json.dumps(entry, default=str))
+
+class _UserHistory:
+    __slots__ = ('calls', 'size', 'touched')
+
+    def __init__(self):
+        self.calls = deque(maxlen=DEMO_HISTORY_PER_USER)
+        self.size = 0
+        self.touched = time.monotonic()
+
+class DemoHistoryStore:
+    """
+    Per-user ring buffers of demo calls, newest first.
+
+    Only the newest DEMO_HISTORY_PER_USER calls are kept per user; users
+    idle for DEMO_HISTORY_TTL_SECONDS expire, and the least recently used
+    users are dropped beyond DEMO_HISTORY_MAX_USERS or DEMO_HISTORY_MAX_BYTES.
+    With REDIS_URL set, histories live in the shared store instead so every
+    worker sees the same demo state (Redis expires them after the same TTL;
+    concurrent writes to one demo user are last-writer-wins).
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()  # user_id -> _UserHistory
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _key(self, user_id):
+        return f"demo_history:{user_id}"
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._users:
+            user_id, history = next(iter(self._users.items()))
+            expired = now - history.touched > DEMO_HISTORY_TTL_SECONDS
+            if not (expired or len(self._users) > DEMO_HISTORY_MAX_USERS or self._bytes > DEMO_HISTORY_MAX_BYTES):
+                break
+            del self._users[user_id]
+            self._bytes -= history.size
+
+    def _local(self, user_id, create=False):
+        history = self._users.get(user_id)
+        if history is not None and time.monotonic() - history.touched > DEMO_HISTORY_TTL_SECONDS:
+            del self._users[user_id]
+            self._bytes -= history.size
+            history = None
+        if history is None and create:
+            history = self._users[user_id] = _UserHistory()
+        if history is not None:
+            history.touched = time.monotonic()
+            self._users.move_to_end(user_id)
+        return history
+
+    def _store_local(self, user_id, calls):
+        history = self._local(user_id, create=True)
+        history.calls.clear()
+        history.calls.extend(calls[:DEMO_HISTORY_PER_USER])
+        size = sum(_entry_size(call) for call in history.calls)
+        self._bytes += size - history.size
+        history.size = size
+        self._evict()
+
+    def get(self, user_id):
+        """A user's demo calls, newest first (a copy)"""
+        user_id = int(user_id)
+        if shared_store.enabled:
+            return shared_store.get(self._key(user_id)) or []
+        with self._lock:
+            history = self._local(user_id)
+            return [dict(call) for call in history.calls] if history else []
+
+    def set(self, user_id, calls):
+        """Replace a user's history (newest first)"""
+        user_id = int(user_id)
+        calls = list(calls)[:DEMO_HISTORY_PER_USER]
+        if shared_store.enabled:
+            shared_store.set(self._key(user_id), calls, DEMO_HISTORY_TTL_SECONDS)
+            return
+        with self._lock:
+            self._store_local(user_id, calls)
+
+    def add(self, user_id, call):
+        """Record a new call; the oldest falls off once the user's buffer is full"""
+        if shared_store.enabled:
+            self.set(user_id, [call] + self.get(user_id))
+            return
+        with self._lock:
+            history = self._local(int(user_id), create=True)
+            if len(history.calls) == history.calls.maxlen:
+                dropped = _entry_size(history.calls[-1])
+                history.size -= dropped
+                self._bytes -= dropped
+            history.calls.appendleft(call)
+            size = _entry_size(call)
+            history.size += size
+            self._bytes += size
+            self._evict()
+
+    def update(self, user_id, call_id, **changes):
+        """Apply changes to one call; returns False when it is not (or no longer) stored"""
+        calls = self.get(user_id)
+        for call in calls:
+            if call['id'] == call_id:
+                call.update(changes)
+                self.set(user_id, calls)
+                return True
+        return False
+
+    def count(self, user_id):
+        return len(self.get(user_id))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'shared' if shared_store.enabled else 'local',
+                'users': len(self._users),
+                'approx_bytes': self._bytes,
+            }
+
+# Global demo history store instance
+demo_history = DemoHistoryStore()
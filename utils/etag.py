@@ -0,0 +1,42 @@
+"""
+CallBunker Conditional Responses
+ETags from cheap per-user version tokens so polling clients get 304 before the expensive queries run
+"""
+import time
+import hashlib
+import logging
+from flask import g, request, Response
+
+logger = logging.getLogger(__name__)
+
+def version_token(*parts):
+    """Stable opaque token for a resource version (ids, timestamps, counts, query args)"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def time_bucket(seconds):
+    """Current window number, for responses that also change as time passes"""
+    return int(time.time() // seconds)
+
+def check_not_modified(*parts):
+    """
+    Compute the resource's ETag and compare it with If-None-Match.
+    Returns a 304 response when the client's copy is current, else None;
+    the view then builds its body and passes it through with_etag().
+    """
+    etag = version_token(request.path, *parts)
+    g.etag = etag
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+def with_etag(response):
+    """Attach the ETag computed by check_not_modified() to a full response"""
+    etag = g.get('etag')
+    if etag and response.status_code == 200:
+        # Weak: the same version may be re-encoded (e.g. compressed) differently
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
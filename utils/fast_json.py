@@ -0,0 +1,84 @@
+"""
+CallBunker Fast JSON
+orjson-backed Flask JSON provider and streaming NDJSON responses
+"""
+import os
+import json
+import logging
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+# Try to import orjson, mark as unavailable if not installed
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Configuration
+NDJSON_CHUNK_BYTES = int(os.environ.get("NDJSON_CHUNK_BYTES", 64 * 1024))  # Bytes buffered per streamed write
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's provider that encodes with orjson when
+    installed. Output matches the default provider (sorted keys, compact,
+    datetimes as HTTP dates via the same default hook); anything orjson
+    refuses falls back to the standard encoder. Debug pretty-printing is
+    left to the default provider.
+    """
+
+    def _orjson_options(self):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj):
+        """Compact UTF-8 JSON"""
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+            except TypeError:
+                pass  # e.g. integers beyond 64 bits
+        return json.dumps(obj, default=self.default, ensure_ascii=False, sort_keys=self.sort_keys,
+                          separators=(",", ":")).encode()
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or not ORJSON_AVAILABLE:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def response(self, *args, **kwargs):
+        if self.compact is None and self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+def ndjson_response(rows, serialize=None, filename=None):
+    """
+    Stream rows as newline-delimited JSON without building the body in memory.
+    rows may be any iterable (e.g. a yield_per query); serialize maps each row
+    to a JSON-compatible object.
+    """
+    from flask import current_app
+    provider = current_app.json
+    encode = provider.dumps_bytes if isinstance(provider, FastJSONProvider) else (lambda obj: provider.dumps(obj).encode())
+
+    def generate():
+        buffer = bytearray()
+        for row in rows:
+            buffer += encode(serialize(row) if serialize else row)
+            buffer += b"\n"
+            if len(buffer) >= NDJSON_CHUNK_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,365 @@
+"""
+CallBunker Background Jobs
+Database-backed job queue with retries, periodic schedules and a leader-elected scheduler
+"""
+import os
+import json
+import time
+import random
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import NamedTuple, Callable, Optional
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", 2))                 # Worker sleep when the queue is empty
+JOB_RETRY_BASE_SECONDS = int(os.environ.get("JOB_RETRY_BASE_SECONDS", 30))      # First retry delay, doubled per attempt
+JOB_RETRY_MAX_SECONDS = int(os.environ.get("JOB_RETRY_MAX_SECONDS", 3600))
+JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", 900))               # No heartbeat this long = worker died; requeue
+JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", 60))        # Running jobs refresh locked_at this often
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 30))                # Scheduler leadership lease
+JOB_RETENTION_DAYS = int(os.environ.get("JOB_RETENTION_DAYS", 7))               # Finished jobs kept this long
+
+SCHEDULER_LEASE = 'scheduler'
+
+class JobSpec(NamedTuple):
+    name: str
+    handler: Callable
+    max_attempts: int
+    singleton: bool
+
+class Schedule(NamedTuple):
+    name: str
+    every_seconds: int
+    payload: Optional[dict]
+
+def _models():
+    from models_multi_user import BackgroundJob, JobLease
+    return BackgroundJob, JobLease
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class JobQueue:
+    """
+    Jobs live in background_jobs and are claimed by job_worker.py processes.
+
+    Claiming selects due rows FOR UPDATE SKIP LOCKED (PostgreSQL) and flips
+    them to running with a compare-and-set update, which is also what keeps
+    SQLite (no SKIP LOCKED) correct. Failed jobs are retried with
+    exponential backoff up to max_attempts. Singleton jobs and periodic
+    schedules carry a unique_key while queued or running, so at most one
+    is pending at a time. One worker at a time holds the scheduler lease
+    and enqueues periodic jobs and requeues jobs whose worker died.
+
+    Workers refresh locked_at on their running jobs every
+    JOB_HEARTBEAT_SECONDS, so only jobs whose worker has gone silent for
+    JOB_STALE_SECONDS are requeued (or failed once out of attempts, so a
+    job that kills its worker does not cycle forever). A worker only
+    records the outcome of a job it still owns.
+    """
+
+    def __init__(self):
+        self.jobs = {}       # name -> JobSpec
+        self.schedules = {}  # name -> Schedule
+
+    def register(self, name, max_attempts=5, singleton=False):
+        """Decorator registering a handler(payload) for a job name"""
+        def decorator(handler):
+            self.jobs[name] = JobSpec(name, handler, max_attempts, singleton)
+            return handler
+        return decorator
+
+    def every(self, name, seconds, payload=None):
+        """Run a registered job periodically"""
+        self.schedules[name] = Schedule(name, seconds, payload)
+
+    def enqueue(self, name, payload=None, run_at=None, unique_key=None, commit=True):
+        """
+        Queue a job; returns its id, or None when a job with the same
+        unique_key (singletons: the job name) is already pending.
+        commit=False adds it to the caller's transaction instead.
+        """
+        BackgroundJob, _ = _models()
+        spec = self.jobs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown job: {name}")
+        if unique_key is None and spec.singleton:
+            unique_key = name
+
+        job = BackgroundJob(
+            name=name,
+            payload=json.dumps(payload) if payload is not None else None,
+            unique_key=unique_key,
+            max_attempts=spec.max_attempts,
+            run_at=run_at or datetime.utcnow(),
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(job)
+        except IntegrityError:
+            logger.info(f"Job {name} already pending ({unique_key})")
+            return None
+        if commit:
+            db.session.commit()
+        return job.id
+
+    def claim(self, worker_id, limit=1):
+        """Claim up to limit due jobs for this worker"""
+        BackgroundJob, _ = _models()
+        now = datetime.utcnow()
+        candidates = db.session.execute(
+            select(BackgroundJob.id)
+            .where(BackgroundJob.status == 'queued', BackgroundJob.run_at <= now)
+            .order_by(BackgroundJob.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+
+        claimed = []
+        for job_id in candidates:
+            result = db.session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id, BackgroundJob.status == 'queued')
+                .values(status='running', locked_by=worker_id, locked_at=now,
+                        attempts=BackgroundJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(job_id)
+        db.session.commit()
+        return [db.session.get(BackgroundJob, job_id) for job_id in claimed]
+
+    def _backoff(self, attempts):
+        delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def _finish(self, job_id, worker_id, **values):
+        """Record an outcome only if this worker still owns the job"""
+        BackgroundJob, _ = _models()
+        result = db.session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == 'running',
+                   BackgroundJob.locked_by == worker_id)
+            .values(locked_by=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if not result.rowcount:
+            logger.warning(f"Job #{job_id} was requeued while {worker_id} ran it; outcome discarded")
+        return bool(result.rowcount)
+
+    def run(self, job):
+        """Run a claimed job and record success, a retry or failure"""
+        spec = self.jobs.get(job.name)
+        job_id, name, attempts = job.id, job.name, job.attempts
+        worker_id, max_attempts = job.locked_by, job.max_attempts
+        try:
+            if spec is None:
+                raise ValueError(f"No handler registered for {name}")
+            result = spec.handler(json.loads(job.payload) if job.payload else {})
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"
+            if spec is not None and attempts < max_attempts:
+                run_at = datetime.utcnow() + self._backoff(attempts)
+                if self._finish(job_id, worker_id, status='queued', run_at=run_at, last_error=error):
+                    logger.warning(f"Job {name}#{job_id} failed (attempt {attempts}), retrying at {run_at}: {e}")
+            elif self._finish(job_id, worker_id, status='failed', unique_key=None,
+                              finished_at=datetime.utcnow(), last_error=error):
+                logger.error(f"Job {name}#{job_id} failed permanently after {attempts} attempts: {e}")
+            return False
+
+        if self._finish(job_id, worker_id, status='done', unique_key=None,
+                        finished_at=datetime.utcnow(), last_error=None):
+            logger.info(f"Job {name}#{job_id} done: {result}")
+        return True
+
+    def heartbeat(self, worker_id, connection):
+        """Refresh locked_at on this worker's running jobs"""
+        BackgroundJob, _ = _models()
+        connection.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.status == 'running', BackgroundJob.locked_by == worker_id)
+            .values(locked_at=datetime.utcnow())
+        )
+
+    def acquire_lease(self, name, holder, seconds=JOB_LEASE_SECONDS):
+        """Take or renew a lease; True while this holder owns it"""
+        _, JobLease = _models()
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=seconds)
+        result = db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == name, (JobLease.holder == holder) | (JobLease.expires_at < now))
+            .values(holder=holder, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            db.session.commit()
+            return True
+        try:
+            db.session.add(JobLease(name=name, holder=holder, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def release_lease(self, name, holder):
+        _, JobLease = _models()
+        db.session.execute(delete(JobLease).where(JobLease.name == name, JobLease.holder == holder))
+        db.session.commit()
+
+    def schedule_due(self, now=None):
+        """Enqueue periodic jobs whose interval has passed since their last run; returns names queued"""
+        BackgroundJob, _ = _models()
+        now = now or datetime.utcnow()
+        queued = []
+        for schedule in self.schedules.values():
+            last = db.session.execute(
+                select(func.max(BackgroundJob.run_at)).where(BackgroundJob.name == schedule.name)
+            ).scalar()
+            if last is not None and last + timedelta(seconds=schedule.every_seconds) > now:
+                continue
+            # Singletons share their manual key so a scheduled and a manual run never overlap
+            unique_key = schedule.name if self.jobs[schedule.name].singleton else f"periodic:{schedule.name}"
+            if self.enqueue(schedule.name, schedule.payload, unique_key=unique_key) is not None:
+                queued.append(schedule.name)
+        return queued
+
+    def requeue_stale(self):
+        """Put jobs back whose worker stopped heartbeating; fail those out of attempts"""
+        BackgroundJob, _ = _models()
+        now = datetime.utcnow()
+        stale = (BackgroundJob.status == 'running', BackgroundJob.locked_at < now - timedelta(seconds=JOB_STALE_SECONDS))
+        failed = db.session.execute(
+            update(BackgroundJob)
+            .where(*stale, BackgroundJob.attempts >= BackgroundJob.max_attempts)
+            .values(status='failed', locked_by=None, unique_key=None, finished_at=now,
+                    last_error='worker lost (out of attempts)')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        requeued = db.session.execute(
+            update(BackgroundJob)
+            .where(*stale)
+            .values(status='queued', locked_by=None, last_error='worker lost')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if failed or requeued:
+            logger.warning(f"Stale jobs: {requeued} requeued, {failed} failed after their last attempt")
+        return requeued
+
+    def purge_finished(self):
+        """Delete done and failed jobs older than JOB_RETENTION_DAYS (the last run of each name is kept)"""
+        BackgroundJob, _ = _models()
+        cutoff = datetime.utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+        latest = select(func.max(BackgroundJob.id)).group_by(BackgroundJob.name)
+        result = db.session.execute(
+            delete(BackgroundJob)
+            .where(BackgroundJob.status.in_(('done', 'failed')),
+                   BackgroundJob.finished_at < cutoff,
+                   BackgroundJob.id.not_in(latest))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def stats(self):
+        BackgroundJob, _ = _models()
+        counts = dict(db.session.execute(
+            select(BackgroundJob.status, func.count()).group_by(BackgroundJob.status)
+        ).all())
+        return {
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'registered': sorted(self.jobs),
+            'schedules': {name: schedule.every_seconds for name, schedule in self.schedules.items()},
+        }
+
+class JobWorker:
+    """Claim-and-run loop; the lease holder also runs the scheduler"""
+
+    def __init__(self, queue, worker_id=None, batch=1):
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.batch = batch
+        self.leader = False
+        self.stopping = False
+
+    def scheduler_tick(self):
+        self.leader = self.queue.acquire_lease(SCHEDULER_LEASE, self.worker_id)
+        if self.leader:
+            self.queue.requeue_stale()
+            self.queue.schedule_due()
+
+    @contextmanager
+    def heartbeat(self):
+        """Keep this worker's running jobs fresh from a side thread (own connection)"""
+        engine = db.engine
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(JOB_HEARTBEAT_SECONDS):
+                try:
+                    with engine.begin() as connection:
+                        self.queue.heartbeat(self.worker_id, connection)
+                except Exception as e:
+                    logger.warning(f"Job heartbeat failed for {self.worker_id}: {e}")
+
+        thread = threading.Thread(target=beat, name='job-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def run_once(self):
+        """Run due jobs until none are left; returns how many ran"""
+        ran = 0
+        while not self.stopping:
+            jobs = self.queue.claim(self.worker_id, self.batch)
+            if not jobs:
+                break
+            with self.heartbeat():
+                for job in jobs:
+                    self.queue.run(job)
+                    ran += 1
+            db.session.remove()
+        return ran
+
+    def run_forever(self):
+        logger.info(f"Job worker {self.worker_id} started")
+        next_tick = 0
+        try:
+            while not self.stopping:
+                try:
+                    if time.monotonic() >= next_tick:
+                        self.scheduler_tick()
+                        next_tick = time.monotonic() + JOB_LEASE_SECONDS / 3
+                    if not self.run_once():
+                        time.sleep(JOB_POLL_SECONDS)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Job worker loop error: {e}")
+                    time.sleep(JOB_POLL_SECONDS)
+                finally:
+                    db.session.remove()
+        finally:
+            if self.leader:
+                self.queue.release_lease(SCHEDULER_LEASE, self.worker_id)
+            logger.info(f"Job worker {self.worker_id} stopped")
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,48 @@
+"""
+CallBunker Maintenance Jobs
+Background job handlers and periodic schedules run by job_worker.py
+"""
+import os
+import logging
+from app import db
+from utils.jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+REPLENISH_INTERVAL_SECONDS = int(os.environ.get("REPLENISH_INTERVAL_SECONDS", 900))     # Pool check cadence
+WEBHOOK_RECONCILE_SECONDS = int(os.environ.get("WEBHOOK_RECONCILE_SECONDS", 86400))     # Re-point unconfigured numbers
+RETENTION_CLEANUP_SECONDS = int(os.environ.get("RETENTION_CLEANUP_SECONDS", 86400))
+CALL_LOG_ARCHIVE_SECONDS = int(os.environ.get("CALL_LOG_ARCHIVE_SECONDS", 86400))
+
+@job_queue.register('replenish_pool', max_attempts=3, singleton=True)
+def replenish_pool(payload):
+    """Top the phone pool back up when it is below threshold"""
+    from utils.phone_provisioning import phone_provisioning
+    result = phone_provisioning.check_and_replenish()
+    return {key: value for key, value in result.items() if key in ('replenished', 'reason', 'purchased_count')}
+
+@job_queue.register('reconcile_webhooks', singleton=True)
+def reconcile_webhooks(payload):
+    """Configure webhooks on pool numbers that are still missing them"""
+    from utils.phone_provisioning import phone_provisioning
+    return phone_provisioning.configure_all_webhooks()
+
+@job_queue.register('retention_cleanup', singleton=True)
+def retention_cleanup(payload):
+    """Prune the sync journal and finished jobs past their retention windows"""
+    from utils.sync_journal import sync_journal
+    journal = sync_journal.prune(db.session)
+    db.session.commit()
+    return {'sync_changes': journal, 'jobs': job_queue.purge_finished()}
+
+@job_queue.register('archive_call_logs', max_attempts=2, singleton=True)
+def archive_call_logs(payload):
+    """Roll and archive call log months past the hot window"""
+    from utils.call_log_archive import call_log_archive
+    return call_log_archive.archive_old_months(db.engine)
+
+job_queue.every('replenish_pool', REPLENISH_INTERVAL_SECONDS)
+job_queue.every('reconcile_webhooks', WEBHOOK_RECONCILE_SECONDS)
+job_queue.every('retention_cleanup', RETENTION_CLEANUP_SECONDS)
+job_queue.every('archive_call_logs', CALL_LOG_ARCHIVE_SECONDS)
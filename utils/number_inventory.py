@@ -0,0 +1,86 @@
+"""
+CallBunker Number Inventory
+Area-code buckets of unassigned Defense Numbers: local allocation at signup and targeted replenishment
+"""
+import os
+import math
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from app import db
+from models_multi_user import TwilioPhonePool
+from utils.phone_numbers import area_code
+from utils.pool_status import pool_status_cache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+INVENTORY_DEMAND_WINDOW_HOURS = float(os.environ.get("INVENTORY_DEMAND_WINDOW_HOURS", 168))  # Signups used to split purchases by area code
+INVENTORY_MIN_BUCKET_DEMAND = int(os.environ.get("INVENTORY_MIN_BUCKET_DEMAND", 2))          # Smaller buckets are bought from any area code
+
+def _next_unassigned(wanted=None):
+    """
+    Lock the lowest unassigned row (in one area code when given). Served by
+    the partial indexes on unassigned rows; rows locked by a concurrent
+    signup are skipped rather than waited on.
+    """
+    query = select(TwilioPhonePool).where(TwilioPhonePool.is_assigned == False)
+    if wanted:
+        query = query.where(TwilioPhonePool.area_code == wanted)
+    return db.session.execute(
+        query.order_by(TwilioPhonePool.id).limit(1).with_for_update(skip_locked=True)
+    ).scalar()
+
+def allocate_number(real_phone_number, country=None):
+    """
+    Pick the Defense Number for a new signup: one local to real_phone_number
+    when that area code's bucket has stock, otherwise the next free number.
+    Returns the locked, still unassigned TwilioPhonePool row (the caller
+    assigns it in its transaction), or None when the pool is empty.
+    """
+    wanted = area_code(real_phone_number, country)
+    number = None
+    if wanted and pool_status_cache.available_in(wanted) > 0:
+        number = _next_unassigned(wanted)
+    if number is None:
+        number = _next_unassigned()
+    if number is not None:
+        number.requested_area_code = wanted
+    return number
+
+def bucket_demand(now=None):
+    """Signups per requested area code over INVENTORY_DEMAND_WINDOW_HOURS"""
+    now = now or datetime.utcnow()
+    rows = db.session.execute(
+        select(TwilioPhonePool.requested_area_code, func.count())
+        .where(TwilioPhonePool.assigned_at >= now - timedelta(hours=INVENTORY_DEMAND_WINDOW_HOURS),
+               TwilioPhonePool.requested_area_code.is_not(None))
+        .group_by(TwilioPhonePool.requested_area_code)
+    ).all()
+    return dict(rows)
+
+def replenishment_buckets(purchase, target, now=None):
+    """
+    Split a purchase across area codes: each bucket with enough recent
+    demand gets its share of the target, depleted buckets first; the rest
+    is bought from any area code (key None). Returns {area_code: count}.
+    """
+    demand = {code: count for code, count in bucket_demand(now).items() if count >= INVENTORY_MIN_BUCKET_DEMAND}
+    total_demand = sum(demand.values())
+    stock = pool_status_cache.snapshot(fresh=True)['available_by_area_code']
+
+    deficits = []
+    for code, count in demand.items():
+        deficit = math.ceil(target * count / total_demand) - stock.get(code, 0)
+        if deficit > 0:
+            deficits.append((deficit, code))
+
+    buckets, remaining = {}, purchase
+    for deficit, code in sorted(deficits, reverse=True):
+        if remaining <= 0:
+            break
+        buckets[code] = min(deficit, remaining)
+        remaining -= buckets[code]
+    if remaining > 0:
+        buckets[None] = remaining
+    return buckets
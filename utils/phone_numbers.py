@@ -0,0 +1,121 @@
+"""
+CallBunker Phone Number Normalization
+Single home for phone parsing: digits, canonical E.164 and display formatting
+"""
+import os
+import re
+from functools import lru_cache
+
+# Configuration
+PHONE_CACHE_SIZE = int(os.environ.get("PHONE_CACHE_SIZE", 4096))  # Memoized numbers per worker
+
+DEFAULT_COUNTRY = "US"
+
+# ISO country (User.country) -> calling code
+COUNTRY_CALLING_CODES = {
+    'US': '1', 'CA': '1', 'PR': '1',
+    'GB': '44', 'ES': '34', 'FR': '33', 'DE': '49', 'IT': '39',
+    'PT': '351', 'RU': '7', 'JP': '81', 'KR': '82', 'CN': '86',
+    'MX': '52', 'BR': '55', 'AU': '61', 'IN': '91',
+}
+
+# Precompiled patterns
+NON_DIGITS = re.compile(r'\D')
+NANP_E164 = re.compile(r'^\+1\d{10}$')
+E164 = re.compile(r'^\+[1-9]\d{6,14}$')
+
+def digits_only(phone):
+    """Strip everything but digits"""
+    return NON_DIGITS.sub('', phone or '')
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _canonicalize(phone, country):
+    raw = phone.strip()
+    digits = NON_DIGITS.sub('', raw)
+    if not digits:
+        return ""
+
+    # Already international: +CC... or 00CC...
+    if raw.startswith('+'):
+        return f"+{digits}"
+    if raw.startswith('00'):
+        return f"+{digits[2:]}"
+
+    calling_code = COUNTRY_CALLING_CODES.get(country, '1')
+
+    if calling_code == '1':
+        # NANP: 10-digit national number, optionally with the leading 1
+        if len(digits) == 10:
+            return f"+1{digits}"
+        return f"+{digits}"
+
+    # Elsewhere a leading 0 is the national trunk prefix
+    if digits.startswith('0'):
+        return f"+{calling_code}{digits[1:]}"
+    if digits.startswith(calling_code) and len(digits) > 10:
+        return f"+{digits}"
+    return f"+{calling_code}{digits}"
+
+def canonical_e164(phone, country=DEFAULT_COUNTRY):
+    """
+    Canonical storage form for a phone number: '+' followed by digits.
+
+    country is the ISO code from User.country and only matters for numbers
+    written without an international prefix: '5551234567' is '+15551234567'
+    for US users, '0612345678' is '+33612345678' for FR users. Returns ''
+    when there are no digits (anonymous or withheld caller ID).
+    """
+    if not phone:
+        return ""
+    return _canonicalize(str(phone), (country or DEFAULT_COUNTRY).upper())
+
+def canonicalize_many(numbers, country=DEFAULT_COUNTRY):
+    """Canonicalize a batch (imports, contact sync, migrations) in input order"""
+    country = (country or DEFAULT_COUNTRY).upper()
+    seen = {}
+    result = []
+    for phone in numbers:
+        if not phone:
+            result.append("")
+            continue
+        phone = str(phone)
+        canonical = seen.get(phone)
+        if canonical is None:
+            canonical = seen[phone] = _canonicalize(phone, country)
+        result.append(canonical)
+    return result
+
+def is_nanp_e164(number):
+    """True for a canonical US/Canada number (+1 and ten digits)"""
+    return bool(number) and NANP_E164.match(number) is not None
+
+def is_valid_e164(number):
+    """True for a plausible canonical international number"""
+    return bool(number) and E164.match(number) is not None
+
+def area_code(phone, country=DEFAULT_COUNTRY):
+    """NANP area code of a number ('+16315551234' -> '631'), None outside US/Canada"""
+    number = canonical_e164(phone, country)
+    return number[2:5] if is_nanp_e164(number) else None
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _format_display(phone):
+    digits = NON_DIGITS.sub('', phone)
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if len(digits) == 10:
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    return phone
+
+def format_display(phone):
+    """Format a US/Canada number for display: (555) 123-4567. Others are returned unchanged."""
+    if not phone:
+        return phone
+    return _format_display(phone)
+
+def cache_info():
+    """LRU statistics for the canonicalizer and display formatter"""
+    return {
+        'canonical_e164': _canonicalize.cache_info()._asdict(),
+        'format_display': _format_display.cache_info()._asdict(),
+    }
@@ -6,6 +6,9 @@ import os
 from twilio.rest import Client
 from models_multi_user import TwilioPhonePool
 from app import db
+from utils.pool_forecast import pool_forecaster
+from utils.pool_status import pool_status_cache
+from utils.number_inventory import replenishment_buckets
 from datetime import datetime
 import logging
 
@@ -26,11 +29,13 @@ class PhoneProvisioning:
         )
         self.public_url = os.environ.get('PUBLIC_APP_URL')
     
-    def get_pool_status(self):
-        """Get current pool statistics"""
-        total = TwilioPhonePool.query.count()
-        available = TwilioPhonePool.query.filter_by(is_assigned=False).count()
-        assigned = TwilioPhonePool.query.filter_by(is_assigned=True).count()
+    def get_pool_status(self, fresh=False):
+        """
+        Get current pool statistics
+        Served from the cached snapshot unless fresh=True (e.g. before purchasing)
+        """
+        counts = pool_status_cache.snapshot(fresh=fresh)
+        total, available, assigned = counts['total'], counts['available'], counts['assigned']
         
         status = 'healthy'
         if available <= POOL_THRESHOLD_CRITICAL:
@@ -44,7 +49,8 @@ class PhoneProvisioning:
             'assigned': assigned,
             'status': status,
             'threshold_low': POOL_THRESHOLD_LOW,
-            'threshold_critical': POOL_THRESHOLD_CRITICAL
+            'threshold_critical': POOL_THRESHOLD_CRITICAL,
+            'computed_at': counts['computed_at']
         }
     
     def purchase_phone_number(self, area_code=None, country_code='US'):
@@ -131,13 +137,16 @@ class PhoneProvisioning:
             else:
                 failed += 1
                 logger.warning(f"Failed to purchase number {i+1}/{count}")
+                if area_code:
+                    # Usually the area code has no numbers left; don't search it again per number
+                    break
         
         logger.info(f"Batch purchase complete: {len(purchased)} purchased, {failed} failed")
         return purchased
     
     def check_and_replenish(self):
         """
-        Check pool status and replenish if below threshold
+        Check pool status and replenish up to the forecast target
         Uses database advisory lock to prevent concurrent replenishment
         
         Returns:
@@ -160,32 +169,42 @@ class PhoneProvisioning:
                     'status': self.get_pool_status()
                 }
             
-            # Check status within lock
-            status = self.get_pool_status()
+            # Size the purchase from signup velocity within lock
+            status = self.get_pool_status(fresh=True)
+            plan = pool_forecaster.plan(available=status['available'])
             
-            if status['available'] > POOL_THRESHOLD_LOW:
-                logger.info(f"Pool healthy: {status['available']} available")
+            if plan['purchase'] <= 0:
+                reason = 'pool_healthy' if plan['needed'] <= 0 else 'purchase_capped'
+                logger.info(f"No purchase ({reason}): {status['available']} available, target {plan['target']}, capped by {plan['capped_by']}")
                 return {
                     'replenished': False,
-                    'reason': 'pool_healthy',
-                    'status': status
+                    'reason': reason,
+                    'status': status,
+                    'forecast': plan
                 }
             
-            # Calculate how many to purchase
-            target_count = POOL_THRESHOLD_LOW + REPLENISHMENT_BATCH_SIZE
-            needed = target_count - status['available']
-            
-            logger.warning(f"Pool below threshold ({status['available']} < {POOL_THRESHOLD_LOW}). Replenishing {needed} numbers...")
+            logger.warning(f"Pool below forecast target ({status['available']} < {plan['target']}, {plan['projected_per_hour']}/hour). Replenishing {plan['purchase']} numbers...")
             
-            purchased = self.purchase_batch(count=needed)
+            # Buy for depleting area code buckets first; what a bucket can't get comes from anywhere
+            buckets = replenishment_buckets(plan['purchase'], plan['target'])
+            purchased = []
+            shortfall = buckets.pop(None, 0)
+            for area_code, count in buckets.items():
+                bought = self.purchase_batch(count=count, area_code=area_code)
+                purchased.extend(bought)
+                shortfall += count - len(bought)
+            if shortfall:
+                purchased.extend(self.purchase_batch(count=shortfall))
             
-            new_status = self.get_pool_status()
+            new_status = self.get_pool_status(fresh=True)
             
             return {
                 'replenished': True,
                 'purchased_count': len(purchased),
                 'previous_status': status,
                 'new_status': new_status,
+                'forecast': plan,
+                'area_codes': buckets,
                 'purchased_numbers': [p.phone_number for p in purchased]
             }
             
@@ -0,0 +1,119 @@
+"""
+CallBunker Pool Forecast
+Sizes phone pool inventory from recent signup velocity, within cost caps
+"""
+import os
+import math
+import time
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from app import db
+from models_multi_user import TwilioPhonePool
+from utils.pool_status import pool_status_cache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+POOL_FORECAST_WINDOWS_HOURS = [float(h) for h in os.environ.get("POOL_FORECAST_WINDOWS_HOURS", "1,6,24,168").split(',')]
+POOL_FORECAST_MIN_EVENTS = int(os.environ.get("POOL_FORECAST_MIN_EVENTS", 3))          # Fewer signups in a window is noise, not a trend
+POOL_LEAD_TIME_HOURS = float(os.environ.get("POOL_LEAD_TIME_HOURS", 1))                # Worker cadence + purchase + webhook setup
+POOL_COVERAGE_HOURS = float(os.environ.get("POOL_COVERAGE_HOURS", 24))                 # Projected demand held in stock
+POOL_SAFETY_FACTOR = float(os.environ.get("POOL_SAFETY_FACTOR", 1.5))
+POOL_MIN_AVAILABLE = int(os.environ.get("POOL_MIN_AVAILABLE", 10))                     # Floor regardless of forecast
+POOL_MAX_AVAILABLE = int(os.environ.get("POOL_MAX_AVAILABLE", 200))                    # Idle inventory cap
+POOL_MAX_PURCHASE_PER_RUN = int(os.environ.get("POOL_MAX_PURCHASE_PER_RUN", 25))
+POOL_MAX_PURCHASES_PER_DAY = int(os.environ.get("POOL_MAX_PURCHASES_PER_DAY", 100))
+POOL_MONTHLY_BUDGET = float(os.environ.get("POOL_MONTHLY_BUDGET", 0))                  # Total pool $/month; 0 = no budget cap
+POOL_FORECAST_CACHE_SECONDS = int(os.environ.get("POOL_FORECAST_CACHE_SECONDS", 300))  # Target reuse on the signup path
+POOL_NUMBER_MONTHLY_COST = 1.00
+
+class PoolForecaster:
+    """
+    Projects hourly demand as the highest signup rate (TwilioPhonePool.assigned_at)
+    across the sliding windows, ignoring windows with too few signups to
+    be a trend, so a burst raises the target within the hour while quiet
+    periods fall back to the weekly rate. The target covers lead time plus
+    POOL_COVERAGE_HOURS of that demand with a safety factor, and a purchase
+    is capped per run, per day, by idle inventory and by monthly budget.
+    The target moves slowly, so signups reuse it for POOL_FORECAST_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self._target = None  # (expires_at, target)
+
+    def rates(self, now):
+        rates = {}
+        for hours in POOL_FORECAST_WINDOWS_HOURS:
+            count = db.session.execute(
+                select(func.count()).select_from(TwilioPhonePool)
+                .where(TwilioPhonePool.assigned_at >= now - timedelta(hours=hours))
+            ).scalar()
+            rates[hours] = (count, count / hours)
+        return rates
+
+    def plan(self, now=None, available=None):
+        """How many numbers to buy now and why"""
+        now = now or datetime.utcnow()
+        if available is None:
+            available = pool_status_cache.snapshot(fresh=True)['available']
+
+        rates = self.rates(now)
+        trends = [rate for count, rate in rates.values() if count >= POOL_FORECAST_MIN_EVENTS]
+        per_hour = max(trends, default=0.0)
+        target = math.ceil(per_hour * (POOL_LEAD_TIME_HOURS + POOL_COVERAGE_HOURS) * POOL_SAFETY_FACTOR)
+        target = min(max(target, POOL_MIN_AVAILABLE), POOL_MAX_AVAILABLE)
+        needed = max(0, target - available)
+        self._target = (time.monotonic() + POOL_FORECAST_CACHE_SECONDS, target)
+
+        purchase, capped_by = needed, []
+        bought_today = db.session.execute(
+            select(func.count()).select_from(TwilioPhonePool)
+            .where(TwilioPhonePool.created_at >= now - timedelta(days=1))
+        ).scalar()
+        limits = {
+            'per_run': POOL_MAX_PURCHASE_PER_RUN,
+            'per_day': max(0, POOL_MAX_PURCHASES_PER_DAY - bought_today),
+        }
+        if POOL_MONTHLY_BUDGET:
+            monthly = float(db.session.execute(select(func.coalesce(func.sum(TwilioPhonePool.monthly_cost), 0))).scalar())
+            limits['budget'] = max(0, int((POOL_MONTHLY_BUDGET - monthly) // POOL_NUMBER_MONTHLY_COST))
+        for name, limit in limits.items():
+            if purchase > limit:
+                purchase, capped_by = limit, capped_by + [name]
+
+        return {
+            'available': available,
+            'signups': {f"{hours:g}h": count for hours, (count, _) in rates.items()},
+            'projected_per_hour': round(per_hour, 3),
+            'target': target,
+            'needed': needed,
+            'purchase': purchase,
+            'capped_by': capped_by,
+        }
+
+    def target(self):
+        """Forecast target, recomputed at most every POOL_FORECAST_CACHE_SECONDS"""
+        cached = self._target
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        return self.plan()['target']
+
+# Global pool forecaster instance
+pool_forecaster = PoolForecaster()
+
+def request_replenishment(force=False):
+    """
+    Queue a replenish_pool job when inventory is below the forecast target
+    (always when force). Called after signups from cached counts and the
+    cached target, so it usually does no queries; never raises.
+    """
+    try:
+        if not force and pool_status_cache.available() >= pool_forecaster.target():
+            return None
+        from utils.maintenance_jobs import job_queue
+        return job_queue.enqueue('replenish_pool')
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Could not queue pool replenishment: {e}")
+        return None
@@ -0,0 +1,194 @@
+"""
+CallBunker Pool Status
+Cached phone pool counts, refreshed with one grouped query and adjusted in place as the pool changes
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import event, select, func, inspect
+from sqlalchemy.orm import Session
+from utils.caching import shared_store
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+POOL_STATUS_CACHE_SECONDS = int(os.environ.get("POOL_STATUS_CACHE_SECONDS", 30))   # Bounds staleness from other workers and bulk updates
+
+SHARED_KEY = "pool_status"
+DELTA_KEY = 'pool_status_delta'
+UNKNOWN = 'unknown'
+
+def _pool_model():
+    from models_multi_user import TwilioPhonePool
+    return TwilioPhonePool
+
+class PoolStatusCache:
+    """
+    Snapshot of {total, available, assigned, available_by_area_code} for
+    TwilioPhonePool.
+
+    A miss runs a single GROUP BY area_code, is_assigned query. ORM flushes
+    that insert pool rows or flip is_assigned (purchases, assignments,
+    releases) are summed per session and applied to the cached counts
+    (here and in the shared store) once that session commits, so a signup
+    never pays for a recount. Deletes and other changes the delta cannot
+    describe drop the snapshot instead. Other workers' local copies, and
+    bulk statements that bypass the unit of work, are covered by
+    POOL_STATUS_CACHE_SECONDS.
+    """
+
+    def __init__(self, ttl=POOL_STATUS_CACHE_SECONDS):
+        self.ttl = ttl
+        self._snapshot = None  # (expires_at, dict)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Register the session listeners once"""
+        for name, listener in (('after_flush', self._after_flush),
+                               ('after_commit', self._after_commit),
+                               ('after_soft_rollback', self._after_rollback)):
+            if not event.contains(Session, name, listener):
+                event.listen(Session, name, listener)
+
+    def _after_flush(self, session, flush_context):
+        TwilioPhonePool = _pool_model()
+        changes = []  # (is_assigned, area_code, +1 / -1)
+        unknown = any(isinstance(obj, TwilioPhonePool) for obj in session.deleted)
+        for obj in session.new:
+            if isinstance(obj, TwilioPhonePool):
+                changes.append((obj.is_assigned, obj.area_code, 1))
+        for obj in session.dirty:
+            if not isinstance(obj, TwilioPhonePool):
+                continue
+            attrs = inspect(obj).attrs
+            assigned = attrs.is_assigned.history
+            if attrs.area_code.history.has_changes() or (assigned.has_changes() and not assigned.deleted):
+                unknown = True
+            elif assigned.has_changes():
+                changes.append((assigned.deleted[0], obj.area_code, -1))
+                changes.append((obj.is_assigned, obj.area_code, 1))
+        if not changes and not unknown:
+            return
+
+        delta = session.info.setdefault(DELTA_KEY, {'available': 0, 'assigned': 0, 'available_by_area_code': {}})
+        if unknown:
+            delta[UNKNOWN] = True
+        for is_assigned, code, sign in changes:
+            if is_assigned:
+                delta['assigned'] += sign
+                continue
+            delta['available'] += sign
+            if code:
+                buckets = delta['available_by_area_code']
+                buckets[code] = buckets.get(code, 0) + sign
+
+    def _after_commit(self, session):
+        delta = session.info.pop(DELTA_KEY, None)
+        if delta is None:
+            return
+        if delta.get(UNKNOWN):
+            self.invalidate()
+        else:
+            self.adjust(delta)
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop(DELTA_KEY, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+        shared_store.delete(SHARED_KEY)
+
+    @staticmethod
+    def _apply(counts, delta):
+        counts = dict(counts)
+        counts['available'] += delta['available']
+        counts['assigned'] += delta['assigned']
+        counts['total'] = counts['available'] + counts['assigned']
+        buckets = dict(counts['available_by_area_code'])
+        for code, change in delta['available_by_area_code'].items():
+            buckets[code] = buckets.get(code, 0) + change
+            if buckets[code] <= 0:
+                buckets.pop(code)
+        counts['available_by_area_code'] = buckets
+        return counts
+
+    def adjust(self, delta):
+        """Apply committed pool changes to the cached counts without querying"""
+        if not (delta['available'] or delta['assigned'] or any(delta['available_by_area_code'].values())):
+            return
+        with self._lock:
+            # An in-flight query may predate this commit; let it go uncached
+            self._generation += 1
+            cached = self._snapshot
+            if cached and cached[0] > time.monotonic():
+                counts = self._apply(cached[1], delta)
+                self._snapshot = (cached[0], counts)
+                ttl = cached[0] - time.monotonic()
+            else:
+                self._snapshot = None
+                counts, ttl = None, self.ttl
+
+        if counts is None:
+            shared = shared_store.get(SHARED_KEY)
+            counts = self._apply(shared, delta) if shared is not None else None
+        if counts is not None and ttl > 0:
+            # Read-modify-write: a concurrent adjustment from another worker can be lost, bounded by the TTL
+            shared_store.set(SHARED_KEY, counts, max(1, int(ttl)))
+
+    def _query(self, session):
+        TwilioPhonePool = _pool_model()
+        rows = session.execute(
+            select(TwilioPhonePool.area_code, TwilioPhonePool.is_assigned, func.count())
+            .group_by(TwilioPhonePool.area_code, TwilioPhonePool.is_assigned)
+        ).all()
+        available = assigned = 0
+        by_area_code = {}
+        for area_code, is_assigned, count in rows:
+            if is_assigned:
+                assigned += count
+                continue
+            available += count
+            if area_code:
+                by_area_code[area_code] = count
+        return {
+            'total': available + assigned,
+            'available': available,
+            'assigned': assigned,
+            'available_by_area_code': by_area_code,
+            'computed_at': datetime.utcnow().isoformat(),
+        }
+
+    def snapshot(self, fresh=False):
+        """Pool counts; a cache hit does no database work. fresh=True always queries."""
+        with self._lock:
+            cached, generation = self._snapshot, self._generation
+        if not fresh and cached and cached[0] > time.monotonic():
+            return dict(cached[1])
+
+        counts = None if fresh else shared_store.get(SHARED_KEY)
+        if counts is None:
+            from app import db
+            counts = self._query(db.session)
+            shared_store.set(SHARED_KEY, counts, self.ttl)
+
+        with self._lock:
+            # A commit that invalidated while we were querying wins
+            if generation == self._generation:
+                self._snapshot = (time.monotonic() + self.ttl, counts)
+        return dict(counts)
+
+    def available(self):
+        return self.snapshot()['available']
+
+    def available_in(self, area_code):
+        """Unassigned numbers in one area code bucket"""
+        return self.snapshot()['available_by_area_code'].get(area_code, 0)
+
+# Global pool status cache instance
+pool_status_cache = PoolStatusCache()
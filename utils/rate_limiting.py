@@ -2,12 +2,17 @@ from datetime import datetime, timedelta
 from typing import Optional
 from app import db
 from models import Tenant, FailLog, Blocklist
+from utils.block_filter import block_filter, TENANT_BLOCKS
 
 def is_blocked(tenant: Tenant, caller_digits: str) -> Optional[int]:
     """
     Check if caller is currently blocked for this tenant.
     Returns remaining block time in seconds, or None if not blocked.
     """
+    # Most callers are not blocked: skip the query when the filter says so
+    if not block_filter.might_be_blocked(TENANT_BLOCKS, tenant.screening_number, caller_digits):
+        return None
+    
     blocked_entry = Blocklist.query.filter_by(
         screening_number=tenant.screening_number,
         caller_digits=caller_digits
@@ -22,6 +27,7 @@ def is_blocked(tenant: Tenant, caller_digits: str) -> Optional[int]:
         # Block has expired, remove it
         db.session.delete(blocked_entry)
         db.session.commit()
+        block_filter.discard(TENANT_BLOCKS, tenant.screening_number, caller_digits)
         return None
     
     return remaining_seconds
@@ -48,7 +54,8 @@ def note_failure_and_maybe_block(tenant: Tenant, caller_digits: str):
     recent_count += 1
     
     # Check if we should block
-    if recent_count >= tenant.rl_max_attempts:
+    blocked = recent_count >= tenant.rl_max_attempts
+    if blocked:
         unblock_at = datetime.utcnow() + timedelta(minutes=tenant.rl_block_minutes)
         
         # Check if already blocked
@@ -70,6 +77,9 @@ def note_failure_and_maybe_block(tenant: Tenant, caller_digits: str):
             db.session.add(new_block)
     
     db.session.commit()
+    
+    if blocked:
+        block_filter.add(TENANT_BLOCKS, tenant.screening_number, caller_digits)
 
 def clear_failures(tenant: Tenant, caller_digits: str):
     """
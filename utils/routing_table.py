@@ -0,0 +1,217 @@
+"""
+CallBunker Defense Number Routing Table
+In-memory map of assigned Twilio numbers to the user fields the call path needs
+"""
+import os
+import time
+import logging
+import threading
+from datetime import timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ROUTING_TABLE_REFRESH_SECONDS = int(os.environ.get("ROUTING_TABLE_REFRESH_SECONDS", 30))  # Incremental refresh
+ROUTING_TABLE_RELOAD_SECONDS = int(os.environ.get("ROUTING_TABLE_RELOAD_SECONDS", 600))  # Full reload (picks up deletes)
+
+class RouteEntry(NamedTuple):
+    """Routing fields for one Defense Number"""
+    user_id: int
+    real_phone_number: str
+    is_active: bool
+    pin: str
+    verbal_code: str
+    retry_limit: int
+
+    @property
+    def id(self):
+        # Lets call-path helpers accept a RouteEntry wherever they take a User
+        return self.user_id
+
+class DefenseNumberRoutingTable:
+    """
+    Maps E.164 Defense Number -> RouteEntry for every assigned user.
+
+    Loaded once at startup, updated from committed User changes in this
+    worker, and refreshed from updated_at for changes made by other workers.
+    A miss falls back to the database so a brand-new signup on another
+    worker is still routed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}            # Defense Number -> RouteEntry
+        self._numbers_by_user = {}   # user_id -> Defense Number
+        self._watermark = None       # Highest User.updated_at seen
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._last_reload = 0.0
+        self._user_model = None
+
+    def install(self, user_model):
+        """Register User mapper events so committed changes update the table"""
+        self._user_model = user_model
+        event.listen(user_model, 'after_insert', self._queue_change)
+        event.listen(user_model, 'after_update', self._queue_change)
+        event.listen(user_model, 'after_delete', self._queue_delete)
+        event.listen(Session, 'after_commit', self._apply_changes)
+        event.listen(Session, 'after_rollback', self._discard_changes)
+
+    def _columns(self):
+        User = self._user_model
+        return (User.id, User.assigned_twilio_number, User.real_phone_number, User.is_active,
+                User.pin, User.verbal_code, User.retry_limit, User.updated_at)
+
+    @staticmethod
+    def _entry(row):
+        return RouteEntry(row.id, row.real_phone_number, bool(row.is_active),
+                          row.pin, row.verbal_code, row.retry_limit)
+
+    def load(self):
+        """(Re)build the whole table from the users table"""
+        from app import db
+        rows = db.session.query(*self._columns()).all()
+
+        routes = {}
+        numbers_by_user = {}
+        watermark = None
+        for row in rows:
+            routes[row.assigned_twilio_number] = self._entry(row)
+            numbers_by_user[row.id] = row.assigned_twilio_number
+            if row.updated_at and (watermark is None or row.updated_at > watermark):
+                watermark = row.updated_at
+
+        with self._lock:
+            self._routes = routes
+            self._numbers_by_user = numbers_by_user
+            self._watermark = watermark
+            self._loaded = True
+            self._last_refresh = self._last_reload = time.monotonic()
+
+        logger.info(f"Routing table loaded with {len(routes)} Defense Numbers")
+        return len(routes)
+
+    def refresh(self):
+        """Apply users changed since the watermark"""
+        from app import db
+        User = self._user_model
+        query = db.session.query(*self._columns())
+        if self._watermark is not None:
+            # Overlap one interval so rows committed out of updated_at order are not skipped
+            since = self._watermark - timedelta(seconds=ROUTING_TABLE_REFRESH_SECONDS)
+            query = query.filter(User.updated_at > since)
+
+        changed = 0
+        for row in query.all():
+            self._put(row.id, row.assigned_twilio_number, self._entry(row), row.updated_at)
+            changed += 1
+
+        self._last_refresh = time.monotonic()
+        if changed:
+            logger.info(f"Routing table refreshed {changed} Defense Numbers")
+        return changed
+
+    def _put(self, user_id, twilio_number, entry, updated_at=None):
+        with self._lock:
+            previous_number = self._numbers_by_user.get(user_id)
+            if previous_number and previous_number != twilio_number:
+                self._routes.pop(previous_number, None)
+            self._routes[twilio_number] = entry
+            self._numbers_by_user[user_id] = twilio_number
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+
+    def _remove(self, user_id):
+        with self._lock:
+            twilio_number = self._numbers_by_user.pop(user_id, None)
+            if twilio_number:
+                self._routes.pop(twilio_number, None)
+
+    def _maybe_refresh(self):
+        if not self._loaded:
+            self.load()
+            return
+
+        now = time.monotonic()
+        if now - self._last_refresh < ROUTING_TABLE_REFRESH_SECONDS:
+            return
+
+        # Only one request per worker pays for the refresh
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if now - self._last_refresh < ROUTING_TABLE_REFRESH_SECONDS:
+                return
+            self._last_refresh = now
+        finally:
+            self._lock.release()
+
+        try:
+            if now - self._last_reload >= ROUTING_TABLE_RELOAD_SECONDS:
+                self.load()
+            else:
+                self.refresh()
+        except Exception as e:
+            logger.error(f"Routing table refresh failed: {e}")
+
+    def get(self, twilio_number) -> Optional[RouteEntry]:
+        """Table-only lookup (no database fallback)"""
+        self._maybe_refresh()
+        return self._routes.get(twilio_number)
+
+    def lookup(self, twilio_number) -> Optional[RouteEntry]:
+        """Lookup with a database fallback for numbers assigned since the last refresh"""
+        entry = self.get(twilio_number)
+        if entry is not None:
+            return entry
+
+        from app import db
+        User = self._user_model
+        row = db.session.query(*self._columns()).filter(User.assigned_twilio_number == twilio_number).first()
+        if row is None:
+            return None
+
+        entry = self._entry(row)
+        self._put(row.id, row.assigned_twilio_number, entry, row.updated_at)
+        return entry
+
+    def __len__(self):
+        return len(self._routes)
+
+    # Mapper/session events: queue User changes at flush, apply them once committed
+
+    def _queue_change(self, mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        session.info.setdefault('routing_changes', {})[target.id] = (
+            target.assigned_twilio_number,
+            RouteEntry(target.id, target.real_phone_number, bool(target.is_active),
+                       target.pin, target.verbal_code, target.retry_limit),
+        )
+
+    def _queue_delete(self, mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        session.info.setdefault('routing_changes', {})[target.id] = None
+
+    def _apply_changes(self, session):
+        changes = session.info.pop('routing_changes', None)
+        if not changes:
+            return
+        for user_id, change in changes.items():
+            if change is None:
+                self._remove(user_id)
+            else:
+                twilio_number, entry = change
+                self._put(user_id, twilio_number, entry)
+
+    def _discard_changes(self, session):
+        session.info.pop('routing_changes', None)
+
+# Global routing table instance
+routing_table = DefenseNumberRoutingTable()
@@ -0,0 +1,269 @@
+"""
+CallBunker Status Store
+Message and call state written by Twilio status callbacks and read by polling endpoints
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy.exc import IntegrityError
+from twilio.base import values
+from app import db
+from utils.caching import SingleFlight, shared_store
+from utils.twilio_helpers import twilio_client
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STATUS_STALE_SECONDS = int(os.environ.get("STATUS_STALE_SECONDS", 30))   # Re-fetch an unfinished status older than this
+STATUS_CACHE_SECONDS = int(os.environ.get("STATUS_CACHE_SECONDS", 2))    # Per-worker cache of unfinished statuses
+STATUS_CACHE_SIZE = int(os.environ.get("STATUS_CACHE_SIZE", 10000))      # Sids kept per worker
+STATUS_TERMINAL_CACHE_SECONDS = 300                                      # Finished statuses no longer change
+
+# Progress of each status; callbacks arriving out of order never move a sid backwards
+MESSAGE_STATUS_ORDER = {
+    'accepted': 0, 'scheduled': 0, 'queued': 1, 'sending': 2, 'receiving': 2, 'sent': 3,
+    'received': 4, 'delivered': 4, 'undelivered': 4, 'failed': 4, 'canceled': 4, 'read': 5,
+}
+CALL_STATUS_ORDER = {
+    'queued': 0, 'initiated': 1, 'ringing': 2, 'in-progress': 3,
+    'completed': 4, 'busy': 4, 'no-answer': 4, 'failed': 4, 'canceled': 4,
+}
+STATUS_ORDER = {'message': MESSAGE_STATUS_ORDER, 'call': CALL_STATUS_ORDER}
+TERMINAL_STATUSES = {
+    'message': {'received', 'delivered', 'undelivered', 'failed', 'canceled', 'read'},
+    'call': {'completed', 'busy', 'no-answer', 'failed', 'canceled'},
+}
+
+STATUS_FIELDS = ('error_code', 'error_message', 'duration_seconds', 'from_number', 'to_number',
+                 'started_at', 'ended_at')
+
+class StatusEntry(NamedTuple):
+    sid: str
+    kind: str
+    status: str
+    error_code: Optional[int] = None
+    error_message: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    from_number: Optional[str] = None
+    to_number: Optional[str] = None
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @property
+    def terminal(self):
+        return self.status in TERMINAL_STATUSES[self.kind]
+
+    @property
+    def stale(self):
+        if self.terminal or self.updated_at is None:
+            return False
+        return datetime.utcnow() - self.updated_at > timedelta(seconds=STATUS_STALE_SECONDS)
+
+    def to_cache(self):
+        return {key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in self._asdict().items()}
+
+    @classmethod
+    def from_cache(cls, data):
+        for key in ('started_at', 'ended_at', 'updated_at'):
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**{key: getattr(row, key) for key in cls._fields})
+
+def status_callback_url(kind):
+    """StatusCallback URL for outgoing 'messages' or 'calls', unset without PUBLIC_APP_URL"""
+    public_url = os.environ.get('PUBLIC_APP_URL')
+    return f"{public_url.rstrip('/')}/status/{kind}" if public_url else values.unset
+
+def _status_model():
+    from models_multi_user import TwilioStatus
+    return TwilioStatus
+
+def _duration(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+def fetch_message_status(sid):
+    """Current message state from the Twilio API"""
+    message = twilio_client().messages(sid).fetch()
+    return {
+        'status': message.status,
+        'error_code': message.error_code,
+        'error_message': message.error_message,
+        'from_number': message.from_,
+        'to_number': message.to,
+        'started_at': message.date_sent.replace(tzinfo=None) if message.date_sent else None,
+    }
+
+def fetch_call_status(sid):
+    """Current call state from the Twilio API"""
+    call = twilio_client().calls(sid).fetch()
+    return {
+        'status': call.status,
+        'duration_seconds': _duration(call.duration),
+        'from_number': call.from_,
+        'to_number': call.to,
+        'started_at': call.start_time.replace(tzinfo=None) if call.start_time else None,
+        'ended_at': call.end_time.replace(tzinfo=None) if call.end_time else None,
+    }
+
+FETCHERS = {'message': fetch_message_status, 'call': fetch_call_status}
+
+class StatusStore:
+    """
+    Latest state per message/call SID, kept in the twilio_statuses table.
+
+    Status callbacks write transitions with record(); polling endpoints
+    read with get(), which answers from a short per-worker cache (and the
+    shared Redis store when configured), then the table. Twilio is only
+    asked when a SID is unknown or an unfinished status has not moved in
+    STATUS_STALE_SECONDS (e.g. a lost callback); concurrent polls for the
+    same SID share that one fetch.
+    """
+
+    def __init__(self, max_entries=STATUS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # sid -> (expires_at, StatusEntry)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.fetches = 0
+
+    def _cache_key(self, sid):
+        return f"status:{sid}"
+
+    def _remember(self, entry):
+        ttl = STATUS_TERMINAL_CACHE_SECONDS if entry.terminal else STATUS_CACHE_SECONDS
+        with self._lock:
+            self._entries[entry.sid] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(entry.sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        shared_store.set(self._cache_key(entry.sid), entry.to_cache(), ttl)
+
+    def _cached(self, sid):
+        with self._lock:
+            cached = self._entries.get(sid)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+        data = shared_store.get(self._cache_key(sid))
+        return StatusEntry.from_cache(data) if data else None
+
+    def record(self, kind, sid, status, **fields):
+        """
+        Store a transition reported by a callback or fetch and commit it.
+        A status behind the stored one (late, out-of-order callback) only
+        fills in fields that are still empty.
+        """
+        TwilioStatus = _status_model()
+        order = STATUS_ORDER[kind]
+        fields = {key: value for key, value in fields.items() if key in STATUS_FIELDS and value is not None}
+
+        for attempt in range(2):
+            row = db.session.get(TwilioStatus, sid)
+            if row is None:
+                row = TwilioStatus(sid=sid, kind=kind, status=status, **fields)
+                db.session.add(row)
+            elif order.get(status, -1) >= order.get(row.status, -1):
+                row.status = status
+                for key, value in fields.items():
+                    setattr(row, key, value)
+            else:
+                for key, value in fields.items():
+                    if getattr(row, key) is None:
+                        setattr(row, key, value)
+            row.updated_at = datetime.utcnow()
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Another worker inserted this SID first; apply ours as an update
+                db.session.rollback()
+                if attempt:
+                    raise
+
+        entry = StatusEntry.from_row(row)
+        self._remember(entry)
+        return entry
+
+    def _refresh(self, kind, sid):
+        # Re-check: a callback may have landed while we waited for the flight
+        row = db.session.get(_status_model(), sid)
+        if row is not None:
+            db.session.refresh(row)
+            entry = StatusEntry.from_row(row)
+            if not entry.stale:
+                return entry
+        self.fetches += 1
+        state = FETCHERS[kind](sid)
+        return self.record(kind, sid, state.pop('status'), **state)
+
+    def get(self, kind, sid):
+        """
+        Latest known state of a SID. Falls back to Twilio when unknown or
+        stale; if that fetch fails a stale entry is still returned, an
+        unknown SID re-raises the error.
+        """
+        entry = self._cached(sid)
+        if entry and not entry.stale:
+            return entry
+
+        row = db.session.get(_status_model(), sid)
+        entry = StatusEntry.from_row(row) if row is not None else None
+        if entry and not entry.stale:
+            self._remember(entry)
+            return entry
+
+        try:
+            return self._flight.do(sid, self._refresh, kind, sid)
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Status refresh failed for {sid}, serving stored state: {e}")
+            return entry
+
+    def stats(self):
+        return {
+            'cached_sids': len(self._entries),
+            'twilio_fetches': self.fetches,
+            'stale_seconds': STATUS_STALE_SECONDS,
+        }
+
+# Global status store instance
+status_store = StatusStore()
+
+def advance_call_log(call_log, entry):
+    """
+    Copy the store's state of a call onto its log without moving the log
+    backwards: a late callback (ringing after in-progress) leaves it alone.
+    Returns True when the log changed; the caller commits.
+    """
+    changed = False
+    if CALL_STATUS_ORDER.get(entry.status, -1) > CALL_STATUS_ORDER.get(call_log.status, -1):
+        call_log.status = entry.status
+        changed = True
+    if entry.duration_seconds is not None and entry.duration_seconds != call_log.duration_seconds:
+        call_log.duration_seconds = entry.duration_seconds
+        changed = True
+    return changed
+
+def call_log_status(call_log):
+    """(status, duration_seconds) for a call log, preferring the store's state of its Twilio call"""
+    if call_log.twilio_call_sid:
+        try:
+            entry = status_store.get('call', call_log.twilio_call_sid)
+            duration = entry.duration_seconds if entry.duration_seconds is not None else call_log.duration_seconds
+            return entry.status, duration
+        except Exception as e:
+            logger.warning(f"No status for call {call_log.twilio_call_sid}: {e}")
+    return call_log.status, call_log.duration_seconds
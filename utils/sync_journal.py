@@ -0,0 +1,169 @@
+"""
+CallBunker Sync Journal
+Records per-user changes to contacts, blocks and call history for mobile delta sync
+"""
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert, select, delete
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SYNC_RETENTION_DAYS = int(os.environ.get("SYNC_RETENTION_DAYS", 30))        # Older cursors get a full resync
+SYNC_SETTLE_SECONDS = int(os.environ.get("SYNC_SETTLE_SECONDS", 5))         # Re-send changes this recent
+SYNC_PAGE_SIZE = int(os.environ.get("SYNC_PAGE_SIZE", 500))                 # Journal entries per response
+SYNC_PRUNE_INTERVAL_SECONDS = int(os.environ.get("SYNC_PRUNE_INTERVAL_SECONDS", 3600))
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+class SyncJournal:
+    """
+    Append-only journal of (user, resource, row, op) entries.
+
+    ORM flushes of the tracked models are journaled automatically in the
+    same transaction; bulk statements that bypass the unit of work call
+    record(). The journal id is the client's sync cursor.
+
+    Ids are assigned at insert but become visible at commit, so a slow
+    transaction can commit an id below a cursor already handed out. The
+    cursor returned to clients therefore stops before changes younger than
+    SYNC_SETTLE_SECONDS; those are sent again on the next sync, which is
+    harmless because applying an upsert or tombstone is idempotent.
+    """
+
+    def __init__(self):
+        self._resources = {}  # model class -> resource name
+        self._last_prune = 0.0
+
+    def install(self, resources):
+        """Journal flushes of {model: resource} and register the listener once"""
+        self._resources = dict(resources)
+        if not event.contains(Session, 'after_flush', self._after_flush):
+            event.listen(Session, 'after_flush', self._after_flush)
+
+    @property
+    def resources(self):
+        return tuple(self._resources.values())
+
+    @staticmethod
+    def _model():
+        from models_multi_user import SyncChange
+        return SyncChange
+
+    def _after_flush(self, session, flush_context):
+        if not self._resources:
+            return
+
+        rows = []
+        for objects, op in ((session.new, UPSERT), (session.dirty, UPSERT), (session.deleted, DELETE)):
+            for obj in objects:
+                resource = self._resources.get(type(obj))
+                if resource is None:
+                    continue
+                if objects is session.dirty and not session.is_modified(obj, include_collections=False):
+                    continue
+                rows.append({'user_id': obj.user_id, 'resource': resource, 'row_id': obj.id,
+                             'op': op, 'changed_at': datetime.utcnow()})
+
+        if rows:
+            SyncChange = self._model()
+            # Flush-time connection: same transaction as the change itself
+            session.connection(bind_arguments={'mapper': SyncChange}).execute(insert(SyncChange.__table__), rows)
+
+    def record(self, session, user_id, resource, upserted=(), deleted=()):
+        """Journal changes made with bulk statements"""
+        now = datetime.utcnow()
+        rows = [{'user_id': user_id, 'resource': resource, 'row_id': row_id, 'op': UPSERT, 'changed_at': now}
+                for row_id in upserted]
+        rows.extend({'user_id': user_id, 'resource': resource, 'row_id': row_id, 'op': DELETE, 'changed_at': now}
+                    for row_id in deleted)
+        if rows:
+            session.execute(insert(self._model()), rows)
+
+    def settled_cursor(self, session):
+        """Journal id to hand out with a full snapshot: the newest entry older than the settle window"""
+        SyncChange = self._model()
+        cutoff = datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+        return session.execute(
+            select(SyncChange.id).where(SyncChange.changed_at <= cutoff)
+            .order_by(SyncChange.changed_at.desc()).limit(1)
+        ).scalar() or 0
+
+    def version(self, session, user_id, resources):
+        """Latest journal id for the user's resources; changes whenever any of them does"""
+        SyncChange = self._model()
+        return session.execute(
+            select(func.max(SyncChange.id)).where(SyncChange.user_id == user_id, SyncChange.resource.in_(resources))
+        ).scalar() or 0
+
+    def cursor_expired(self, session, since):
+        """True when entries after this cursor may have been pruned (or never existed)"""
+        SyncChange = self._model()
+        oldest, newest = session.execute(select(func.min(SyncChange.id), func.max(SyncChange.id))).one()
+        if oldest is None:
+            return True
+        return since < oldest - 1 or since > newest
+
+    def changes_since(self, session, user_id, since, resources, limit=SYNC_PAGE_SIZE):
+        """
+        Net changes after the cursor, oldest first.
+        Returns ({resource: {row_id: op}}, next_cursor, has_more).
+        """
+        SyncChange = self._model()
+        entries = session.execute(
+            select(SyncChange.id, SyncChange.resource, SyncChange.row_id, SyncChange.op, SyncChange.changed_at)
+            .where(SyncChange.user_id == user_id, SyncChange.id > since, SyncChange.resource.in_(resources))
+            .order_by(SyncChange.id)
+            .limit(limit + 1)
+        ).all()
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        # Later entries for the same row supersede earlier ones
+        net = {resource: {} for resource in resources}
+        for entry in entries:
+            net[entry.resource][entry.row_id] = entry.op
+
+        cutoff = datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+        if has_more:
+            cursor = entries[-1].id
+        else:
+            settled = [entry.id for entry in entries if entry.changed_at <= cutoff]
+            cursor = max(settled) if settled else since
+        return net, cursor, has_more
+
+    def prune(self, session):
+        """Delete entries older than the retention window; keeps the newest entry so ids stay monotonic"""
+        SyncChange = self._model()
+        newest = session.execute(select(func.max(SyncChange.id))).scalar()
+        if newest is None:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(days=SYNC_RETENTION_DAYS)
+        result = session.execute(
+            delete(SyncChange).where(SyncChange.changed_at < cutoff, SyncChange.id < newest)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def maybe_prune(self, session):
+        """Prune at most once per SYNC_PRUNE_INTERVAL_SECONDS per worker"""
+        now = time.monotonic()
+        if now - self._last_prune < SYNC_PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        try:
+            removed = self.prune(session)
+            session.commit()
+            if removed:
+                logger.info(f"Pruned {removed} sync journal entries")
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Sync journal prune failed: {e}")
+
+# Global sync journal instance
+sync_journal = SyncJournal()
@@ -1,6 +1,8 @@
 import os
-from flask import Response, abort
+from functools import wraps
+from flask import Response, abort, request
 from twilio.rest import Client
+from twilio.request_validator import RequestValidator
 from twilio.twiml.voice_response import VoiceResponse
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import VoiceGrant
@@ -28,6 +30,17 @@ def public_app_url() -> str:
         raise ValueError("PUBLIC_APP_URL environment variable not set")
     return url.rstrip("/")
 
+def validate_twilio_request(f):
+    """Reject webhook requests that do not carry a valid X-Twilio-Signature"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = os.environ.get("TWILIO_AUTH_TOKEN")
+        signature = request.headers.get('X-Twilio-Signature', '')
+        if not token or not RequestValidator(token).validate(request.url, request.form, signature):
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
+
 def get_tenant_or_404(screening_number: str) -> Tenant:
     """Get tenant by screening number or return 404"""
     tenant = Tenant.query.get(screening_number)
@@ -50,7 +63,11 @@ def get_tenant_by_real_number(real_number: str) -> Tenant:
     
     return tenant
 
-def generate_voice_access_token(user_id: int) -> str:
+def voice_identity(user_id: int) -> str:
+    """Voice SDK client identity for a user (see voice_sdk_outbound)"""
+    return f"callbunker_user_{user_id}"
+
+def generate_voice_access_token(user_id: int, ttl: int = 3600) -> str:
     """Generate Twilio Voice Access Token for mobile app calling"""
     account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
     api_key = os.environ.get("TWILIO_API_KEY") 
@@ -65,10 +82,10 @@ def generate_voice_access_token(user_id: int) -> str:
         raise ValueError("TWIML_APP_SID must be set for Voice SDK calling")
     
     # Create unique identity for this user
-    identity = f"callbunker_user_{user_id}"
+    identity = voice_identity(user_id)
     
     # Create access token with proper API key credentials
-    access_token = AccessToken(account_sid, api_key, api_secret, identity=identity)
+    access_token = AccessToken(account_sid, api_key, api_secret, identity=identity, ttl=ttl)
     
     # Create Voice grant with TwiML Application SID
     voice_grant = VoiceGrant(
@@ -0,0 +1,109 @@
+"""
+CallBunker User Context
+Request-scoped user loading shared by auth helpers, handlers and the locale selector
+"""
+import os
+import time
+import logging
+import threading
+from typing import NamedTuple
+from flask import g, session, abort
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+USER_PROFILE_CACHE_SECONDS = int(os.environ.get("USER_PROFILE_CACHE_SECONDS", 0))  # 0 disables the cross-request cache
+
+def _user_model():
+    from models_multi_user import User
+    return User
+
+def load_user(user_id):
+    """
+    The User for this id, loaded at most once per request.
+    Later calls in the same request (auth helper, handler, locale
+    selector) return the same instance from g.
+    """
+    if user_id is None:
+        return None
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    users = g.setdefault('users', {})
+    if user_id not in users:
+        from app import db
+        users[user_id] = db.session.get(_user_model(), user_id)
+    return users[user_id]
+
+def load_user_or_404(user_id):
+    user = load_user(user_id)
+    if user is None:
+        abort(404)
+    return user
+
+def session_user():
+    """The logged-in user for this request, if any"""
+    return load_user(session.get('user_id'))
+
+class UserProfile(NamedTuple):
+    """Fields that change rarely enough to serve across requests"""
+    id: int
+    email: str
+    name: str
+    assigned_twilio_number: str
+    preferred_language: str
+
+class UserProfileCache:
+    """
+    Optional per-worker cache of UserProfile, for lookups that do not need
+    the ORM object (e.g. picking the locale). Off unless
+    USER_PROFILE_CACHE_SECONDS is set. Entries are dropped when this
+    worker updates or deletes the user; other workers' updates show up
+    after the TTL.
+    """
+
+    def __init__(self, ttl=USER_PROFILE_CACHE_SECONDS):
+        self.ttl = ttl
+        self._profiles = {}  # user_id -> (expires_at, UserProfile)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def install(self, user_model):
+        event.listen(user_model, 'after_update', self._invalidate)
+        event.listen(user_model, 'after_delete', self._invalidate)
+
+    def _invalidate(self, mapper, connection, target):
+        self.discard(target.id)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._profiles.pop(user_id, None)
+
+    def get(self, user_id):
+        """Cached profile, or one built from the request-scoped user"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        if self.enabled:
+            cached = self._profiles.get(user_id)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+        user = load_user(user_id)
+        if user is None:
+            return None
+        profile = UserProfile(user.id, user.email, user.name, user.assigned_twilio_number, user.preferred_language)
+        if self.enabled:
+            with self._lock:
+                self._profiles[user.id] = (time.monotonic() + self.ttl, profile)
+        return profile
+
+# Global user profile cache instance
+user_profile_cache = UserProfileCache()
@@ -0,0 +1,113 @@
+"""
+CallBunker Voice Token Cache
+Reuses still-valid Twilio Voice access tokens per identity instead of minting one per request
+"""
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from sqlalchemy import event, inspect
+from utils.caching import SingleFlight
+from utils.twilio_helpers import generate_voice_access_token, voice_identity
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+VOICE_TOKEN_TTL_SECONDS = int(os.environ.get("VOICE_TOKEN_TTL_SECONDS", 3600))           # Lifetime of a minted token
+VOICE_TOKEN_REFRESH_SECONDS = int(os.environ.get("VOICE_TOKEN_REFRESH_SECONDS", 300))    # Re-mint when less than this remains
+VOICE_TOKEN_CACHE_SIZE = int(os.environ.get("VOICE_TOKEN_CACHE_SIZE", 10000))            # Identities kept per worker
+
+class VoiceToken(NamedTuple):
+    token: str
+    identity: str
+    expires_at: float  # Unix time
+
+    @property
+    def expires_in(self):
+        """Whole seconds of validity left"""
+        return max(0, int(self.expires_at - time.time()))
+
+class VoiceTokenCache:
+    """
+    Access tokens keyed by Voice SDK identity (callbunker_user_<id>).
+
+    A cached token is returned until fewer than VOICE_TOKEN_REFRESH_SECONDS
+    remain, so clients always get at least that long to use it; the next
+    request then mints a replacement. Concurrent requests for the same
+    identity share one mint. Least recently used identities are evicted
+    beyond VOICE_TOKEN_CACHE_SIZE. A user's token is dropped when the row
+    is deleted or deactivated through the ORM; bulk deletes call
+    invalidate() themselves.
+    """
+
+    def __init__(self, max_entries=VOICE_TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._tokens = OrderedDict()  # identity -> VoiceToken
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, identity):
+        with self._lock:
+            cached = self._tokens.get(identity)
+            if cached and cached.expires_at - time.time() > VOICE_TOKEN_REFRESH_SECONDS:
+                self._tokens.move_to_end(identity)
+                self.hits += 1
+                return cached
+        return None
+
+    def _mint(self, user_id, identity):
+        # Re-check: another request may have minted while we waited for the flight
+        cached = self._fresh(identity)
+        if cached:
+            return cached
+
+        issued_at = time.time()
+        token = VoiceToken(
+            token=generate_voice_access_token(user_id, ttl=VOICE_TOKEN_TTL_SECONDS),
+            identity=identity,
+            expires_at=issued_at + VOICE_TOKEN_TTL_SECONDS,
+        )
+        with self._lock:
+            self.misses += 1
+            self._tokens[identity] = token
+            self._tokens.move_to_end(identity)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+        return token
+
+    def get(self, user_id):
+        """A token valid for at least VOICE_TOKEN_REFRESH_SECONDS"""
+        identity = voice_identity(user_id)
+        return self._fresh(identity) or self._flight.do(identity, self._mint, user_id, identity)
+
+    def install(self, user_model):
+        event.listen(user_model, 'after_update', self._deactivated)
+        event.listen(user_model, 'after_delete', self._deleted)
+
+    def _deactivated(self, mapper, connection, target):
+        if inspect(target).attrs.is_active.history.has_changes() and not target.is_active:
+            self.invalidate(target.id)
+
+    def _deleted(self, mapper, connection, target):
+        self.invalidate(target.id)
+
+    def invalidate(self, user_id):
+        """Drop a user's token so it is not served again"""
+        with self._lock:
+            self._tokens.pop(voice_identity(user_id), None)
+
+    def stats(self):
+        return {
+            'cached_identities': len(self._tokens),
+            'hits': self.hits,
+            'misses': self.misses,
+            'ttl_seconds': VOICE_TOKEN_TTL_SECONDS,
+            'refresh_seconds': VOICE_TOKEN_REFRESH_SECONDS,
+        }
+
+# Global voice token cache instance
+voice_token_cache = VoiceTokenCache()
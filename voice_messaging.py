@@ -6,6 +6,8 @@ Uses Twilio Programmable Voice with Text-to-Speech for privacy-protected messagi
 import os
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse
+from utils.status_store import status_store, status_callback_url
+from utils.phone_numbers import format_display
 
 # Twilio credentials
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
@@ -55,9 +57,17 @@ def send_voice_message(to_number, message_body):
         call = client.calls.create(
             twiml=twiml_message,
             to=to_number,
-            from_=CALLBUNKER_VOICE_NUMBER
+            from_=CALLBUNKER_VOICE_NUMBER,
+            status_callback=status_callback_url('calls'),
+            status_callback_event=['initiated', 'ringing', 'answered', 'completed']
         )
         
+        # Seed the status store so polls are answered locally until callbacks arrive
+        try:
+            status_store.record('call', call.sid, call.status, from_number=CALLBUNKER_VOICE_NUMBER, to_number=to_number)
+        except Exception as e:
+            print(f"Could not seed status for {call.sid}: {e}")
+        
         return {
             "success": True,
             "call_sid": call.sid,
@@ -78,19 +88,20 @@ def send_voice_message(to_number, message_body):
 def get_voice_message_status(call_sid):
     """
     Get the status of a voice message call
+    Answered from the status store; Twilio is only asked when the state is missing or stale
     """
     try:
-        call = client.calls(call_sid).fetch()
+        entry = status_store.get('call', call_sid)
         
         return {
             "success": True,
-            "call_sid": call.sid,
-            "status": call.status,
-            "duration": call.duration,
-            "start_time": call.start_time.isoformat() if call.start_time else None,
-            "end_time": call.end_time.isoformat() if call.end_time else None,
-            "from_number": call.from_formatted,
-            "to_number": call.to_formatted
+            "call_sid": entry.sid,
+            "status": entry.status,
+            "duration": entry.duration_seconds,
+            "start_time": entry.started_at.isoformat() if entry.started_at else None,
+            "end_time": entry.ended_at.isoformat() if entry.ended_at else None,
+            "from_number": format_display(entry.from_number),
+            "to_number": format_display(entry.to_number)
         }
         
     except Exception as e: